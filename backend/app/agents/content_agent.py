@@ -1,7 +1,8 @@
 from .base_agent import BaseAgent
 from typing import Dict, Any, List
-import re
 import json
+from app.services.summarizer import summarizer
+from app.services.text_analysis import analyze_text, strip_terminal_punctuation
 
 class ContentAgent(BaseAgent):
     """Intelligent content processing agent that adapts text dynamically"""
@@ -272,37 +273,30 @@ class ContentAgent(BaseAgent):
     async def _create_multiple_summaries(self, text: str, summary_type: str, user_conditions: List[str]) -> Dict[str, Any]:
         """Create multiple summary versions for different needs"""
         
-        # Extract key sentences using simple heuristics
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
+        # Rank sentences with the local TextRank summarizer
+        analysis = analyze_text(text)
+        sentences = analysis.sentence_texts()
+        ranked = summarizer.rank(analysis, min_chars=10)
+        key_sentences = [strip_terminal_punctuation(sentences[index]) for index in ranked]
         
-        # Simple scoring based on position and length
-        key_sentences = []
-        for i, sentence in enumerate(sentences):
-            score = 1.0
-            if i < len(sentences) * 0.3:  # First third gets bonus
-                score += 0.3
-            if len(sentence.split()) > 15:  # Longer sentences get bonus
-                score += 0.2
-            key_sentences.append((sentence, score))
-        
-        # Sort by score and take top sentences
-        key_sentences.sort(key=lambda x: x[1], reverse=True)
+        def in_reading_order(count: int) -> str:
+            """Top sentences joined in the order they appear in the text"""
+            return ". ".join(strip_terminal_punctuation(sentences[index]) for index in sorted(ranked[:count]))
         
         if summary_type == "simple":
-            primary = ". ".join([s[0] for s in key_sentences[:2]])
+            primary = in_reading_order(2)
         elif summary_type == "bullet_points":
-            primary = "\n• " + "\n• ".join([s[0] for s in key_sentences[:3]])
+            primary = "\n• " + "\n• ".join(key_sentences[:3])
         else:
-            primary = ". ".join([s[0] for s in key_sentences[:3]])
+            primary = in_reading_order(3)
         
         return {
             "primary": primary,
             "alternatives": [
-                {"type": "ultra_short", "text": key_sentences[0][0] if key_sentences else ""},
-                {"type": "detailed", "text": ". ".join([s[0] for s in key_sentences[:5]])}
+                {"type": "ultra_short", "text": key_sentences[0] if key_sentences else ""},
+                {"type": "detailed", "text": in_reading_order(5)}
             ],
-            "key_points": [s[0] for s in key_sentences[:3]],
+            "key_points": key_sentences[:3],
             "accessibility_features": ["simplified_language", "shorter_sentences"]
         }
     
@@ -310,11 +304,18 @@ class ContentAgent(BaseAgent):
         """Create semantic chunks based on content structure"""
         
         # Simple paragraph-based chunking
-        paragraphs = text.split('\n\n')
-        if not paragraphs or len(paragraphs) == 1:
+        analysis = analyze_text(text)
+        paragraphs = [
+            (paragraph, sum(analysis.sentence_word_count(i) for i in range(first, end)))
+            for paragraph, (first, end) in zip(analysis.paragraph_texts(), analysis.paragraphs)
+        ]
+        if len(paragraphs) <= 1:
             # Split by sentences if no paragraphs
-            sentences = re.split(r'[.!?]+', text)
-            paragraphs = [s.strip() for s in sentences if len(s.strip()) > 10]
+            paragraphs = [
+                (sentence, analysis.sentence_word_count(i))
+                for i, sentence in enumerate(analysis.sentence_texts())
+                if len(strip_terminal_punctuation(sentence)) > 10
+            ]
         
         # Determine chunk size based on attention span
         chunk_sizes = {
@@ -327,12 +328,13 @@ class ContentAgent(BaseAgent):
         
         chunks = []
         for i in range(0, len(paragraphs), chunk_size):
-            chunk_content = '\n\n'.join(paragraphs[i:i+chunk_size])
+            group = paragraphs[i:i+chunk_size]
+            chunk_words = sum(word_count for _, word_count in group)
             chunks.append({
                 "id": f"chunk_{i//chunk_size + 1}",
-                "content": chunk_content,
-                "word_count": len(chunk_content.split()),
-                "estimated_time": len(chunk_content.split()) / 200 * 60  # seconds
+                "content": '\n\n'.join(paragraph for paragraph, _ in group),
+                "word_count": chunk_words,
+                "estimated_time": chunk_words / 200 * 60  # seconds
             })
         
         return {
@@ -366,7 +368,7 @@ class ContentAgent(BaseAgent):
     def _estimate_reading_time(self, text: str, user_profile: Dict) -> Dict[str, float]:
         """Estimate reading time based on user profile"""
         
-        word_count = len(text.split())
+        word_count = analyze_text(text).word_count
         
         # Base reading speeds (words per minute)
         base_speeds = {
@@ -410,8 +412,8 @@ class ContentAgent(BaseAgent):
     
     def _fallback_summary(self, text: str, summary_type: str) -> Dict[str, Any]:
         """Fallback summary generation"""
-        sentences = text.split('.')[:2]
-        summary = '. '.join(sentences) + '.'
+        sentences = summarizer.summarize(analyze_text(text), max_sentences=2)
+        summary = ' '.join(sentences)
         
         return {
             "primary_summary": summary,
@@ -428,17 +430,17 @@ class ComplexityAnalyzer:
     def analyze(self, text: str) -> Dict[str, Any]:
         """Analyze text complexity"""
         
-        words = text.split()
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 0]
+        analysis = analyze_text(text)
+        word_count = analysis.word_count
+        sentence_count = analysis.sentence_count
         
         # Basic metrics
-        avg_sentence_length = len(words) / len(sentences) if sentences else 0
-        avg_word_length = sum(len(word) for word in words) / len(words) if words else 0
+        avg_sentence_length = word_count / sentence_count if sentence_count else 0
+        avg_word_length = analysis.average_word_length()
         
         # Difficult words (simple heuristic: words > 6 characters)
-        difficult_words = [word for word in words if len(word) > 6]
-        difficult_words_ratio = len(difficult_words) / len(words) if words else 0
+        difficult_words = sum(1 for start, end in analysis.words if end - start > 6)
+        difficult_words_ratio = difficult_words / word_count if word_count else 0
         
         # Overall complexity score (0-1, higher = more complex)
         complexity_score = min(
@@ -462,21 +464,25 @@ class ComplexityAnalyzer:
             "avg_sentence_length": round(avg_sentence_length, 1),
             "avg_word_length": round(avg_word_length, 1),
             "difficult_words_ratio": round(difficult_words_ratio, 2),
-            "word_count": len(words),
-            "sentence_count": len(sentences)
+            "word_count": word_count,
+            "sentence_count": sentence_count
         }
     
     def _generate_intelligent_highlights(self, text: str, purpose: str, user_conditions: List[str]) -> Dict[str, Any]:
         """Generate intelligent highlights based on content analysis"""
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
+        analysis = analyze_text(text)
+        sentences = [
+            (sentence, analysis.sentence_word_count(i))
+            for i, sentence in enumerate(analysis.sentence_texts())
+            if len(strip_terminal_punctuation(sentence)) > 10
+        ]
         
         # Simple highlighting logic
         highlight_map = {}
-        for i, sentence in enumerate(sentences):
+        for i, (sentence, word_count) in enumerate(sentences):
             if i == 0 or "important" in sentence.lower() or "key" in sentence.lower():
                 highlight_map[f"sentence_{i}"] = "high_importance"
-            elif len(sentence.split()) > 15:
+            elif word_count > 15:
                 highlight_map[f"sentence_{i}"] = "medium_importance"
         
         return {
@@ -576,20 +582,27 @@ class ComplexityAnalyzer:
     
     def _calculate_complexity_reduction(self, original: str, summary: str) -> float:
         """Calculate complexity reduction percentage"""
-        original_words = len(original.split())
+        original_words = analyze_text(original).word_count
         summary_words = len(summary.split())
         return round((original_words - summary_words) / original_words, 2) if original_words > 0 else 0
     
     def _calculate_time_savings(self, original: str, summary: str) -> float:
         """Calculate time savings in minutes"""
-        original_time = len(original.split()) / 200  # 200 WPM average
+        original_time = analyze_text(original).word_count / 200  # 200 WPM average
         summary_time = len(summary.split()) / 200
         return round(original_time - summary_time, 1)
     
     def _fallback_chunking(self, text: str) -> Dict[str, Any]:
         """Fallback chunking when AI fails"""
-        paragraphs = text.split('\n\n') if '\n\n' in text else [text]
-        chunks = [{"id": f"chunk_{i+1}", "content": p, "word_count": len(p.split())} for i, p in enumerate(paragraphs)]
+        analysis = analyze_text(text)
+        chunks = [
+            {
+                "id": f"chunk_{i+1}",
+                "content": paragraph,
+                "word_count": sum(analysis.sentence_word_count(s) for s in range(first, end))
+            }
+            for i, (paragraph, (first, end)) in enumerate(zip(analysis.paragraph_texts(), analysis.paragraphs))
+        ]
         
         return {
             "chunks": chunks,
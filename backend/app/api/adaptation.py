@@ -1,59 +1,56 @@
-from fastapi import APIRouter
-from app.models.predictions import TextAdaptation, VisionInput, VisionResult
-from app.services.text_service import text_service
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import copy
+import json
+import os
+from app.models.predictions import (
+    TextAdaptation, BatchTextAdaptation, IncrementalTextAdaptation, VisionInput, VisionResult
+)
+from app.services.adaptation_cache import AdaptationCache
+from app.services.executors import adaptation_executor, adaptation_batch_executor
+from app.services.text_service import text_service, adapt_text_worker, tldr_worker
 from app.services.ml_service import ml_service
 
 router = APIRouter()
 
-@router.post("/adapt-text")
-async def adapt_text(adaptation_request: TextAdaptation):
-    """Apply text adaptations based on user presets"""
-    result = text_service.adapt_text(
-        adaptation_request.text,
-        adaptation_request.dyslexia_preset,
-        adaptation_request.adhd_preset,
-        adaptation_request.vision_preset
-    )
-    
-    # Generate TL;DR if needed
+MAX_BATCH_DOCUMENTS = int(os.getenv("ADAPTATION_BATCH_MAX_DOCUMENTS", 1000))
+
+def _with_tldr(result: dict, text: str) -> dict:
+    """Attach the TL;DR when the presets ask for one"""
     if result["tldr_available"]:
-        result["tldr"] = text_service.generate_tldr(adaptation_request.text)
-    
+        result["tldr"] = text_service.generate_tldr(text)
     return result
 
-@router.post("/vision/classify", response_model=VisionResult)
-async def classify_vision(input_data: VisionInput):
-    """Classify vision level based on glasses prescription"""
-    result = ml_service.classify_vision(input_data.glasses_power)
-    return VisionResult(**result)
+async def _adapt_batch_item(index: int, text: str, presets: tuple, in_flight: dict) -> dict:
+    """Adapt one batch document in the process pool; errors are reported per item
 
-@router.get("/presets")
-async def get_adaptation_presets():
-    """Get available adaptation presets and their descriptions"""
-    return {
-        "dyslexia": {
-            "normal": "Standard text display",
-            "mild": "Moderate letter and line spacing",
-            "severe": "Heavy spacing, dyslexic letter highlighting, TTS support"
-        },
-        "adhd": {
-            "normal": "Standard text display",
-            "inattentive": "Highlight every 3rd word for focus",
-            "hyperactive": "Chunked sentences, word highlighting, TL;DR available",
-            "severe": "Full chunking, highlighting, TTS, and TL;DR support"
-        },
-        "vision": {
-            "normal": "Standard text size and contrast",
-            "mild": "25-30% text enlargement, slight spacing increase",
-            "low_vision": "50% larger fonts, high contrast, TTS support"
-        }
-    }
+    Duplicate documents within a batch share a single worker computation.
+    """
+    try:
+        key = AdaptationCache.make_key(text, *presets)
+        result = text_service.cache.get(key)
+        if result is None:
+            computation = in_flight.get(key)
+            if computation is None:
+                computation = asyncio.wrap_future(
+                    adaptation_batch_executor.submit(adapt_text_worker, text, *presets)
+                )
+                in_flight[key] = computation
+            result = await computation
+            text_service.cache.put(key, result)
 
-@router.get("/css-styles")
-async def get_css_styles():
-    """Get CSS classes for text adaptations"""
-    return {
-        "css": """
+        result = copy.deepcopy(result)
+        if result["tldr_available"]:
+            result["tldr"] = await adaptation_batch_executor.run(tldr_worker, text)
+        return {"index": index, "success": True, "result": result}
+    except BrokenProcessPool as e:
+        return {"index": index, "success": False, "error": f"Worker process failed: {str(e)}"}
+    except Exception as e:
+        return {"index": index, "success": False, "error": str(e)}
+
+ADAPTATION_CSS = """
         .dyslexic-mirror {
             background-color: #fef3c7;
             color: #92400e;
@@ -122,4 +119,167 @@ async def get_css_styles():
             border-left: 4px solid #ff9800;
         }
         """
-    }
\ No newline at end of file
+
+@router.post("/adapt-text")
+async def adapt_text(adaptation_request: TextAdaptation):
+    """Apply text adaptations based on user presets
+
+    With output_format="annotations" the original text is returned once with
+    (start, end, class) ranges instead of inline HTML spans.
+    """
+    if adaptation_request.output_format not in ("annotations", "html"):
+        raise HTTPException(status_code=400, detail=f"Unknown output format: {adaptation_request.output_format}")
+
+    def adapt():
+        if adaptation_request.output_format == "annotations":
+            result = text_service.annotate_text(
+                adaptation_request.text,
+                adaptation_request.dyslexia_preset,
+                adaptation_request.adhd_preset,
+                adaptation_request.vision_preset,
+                encoding=adaptation_request.annotation_encoding
+            )
+        else:
+            result = text_service.adapt_text(
+                adaptation_request.text,
+                adaptation_request.dyslexia_preset,
+                adaptation_request.adhd_preset,
+                adaptation_request.vision_preset
+            )
+        # Generate TL;DR if needed
+        return _with_tldr(result, adaptation_request.text)
+
+    # Large documents take a while to adapt; keep that work off the event loop
+    try:
+        return await adaptation_executor.run(adapt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/adapt-text/stream")
+async def adapt_text_stream(adaptation_request: TextAdaptation):
+    """Stream adapted text as NDJSON, one frame per paragraph
+
+    The first frame carries the CSS and feature metadata so the client can paint
+    the first paragraph before the rest of the document has been adapted.
+    Word highlighting and sentence alternation run on across paragraphs, so the
+    blocks together are the document /adapt-text returns.
+    """
+    def generate_frames():
+        tldr_available = False
+        for frame in text_service.adapt_text_stream(
+            adaptation_request.text,
+            adaptation_request.dyslexia_preset,
+            adaptation_request.adhd_preset,
+            adaptation_request.vision_preset
+        ):
+            if frame["type"] == "metadata":
+                frame["css"] = ADAPTATION_CSS
+                tldr_available = frame["tldr_available"]
+            elif frame["type"] == "end" and tldr_available:
+                frame["tldr"] = text_service.generate_tldr(adaptation_request.text)
+            yield json.dumps(frame) + "\n"
+
+    return StreamingResponse(generate_frames(), media_type="application/x-ndjson")
+
+@router.post("/adapt-text/incremental")
+async def adapt_text_incremental(adaptation_request: IncrementalTextAdaptation):
+    """Re-adapt an edited document, returning HTML only for blocks that changed
+
+    Send back the block ids from a previous response (or stream) as known_blocks;
+    blocks without adapted_text in the response are unchanged and can be kept as-is.
+    """
+    def adapt():
+        result = text_service.adapt_text_incremental(
+            adaptation_request.text,
+            adaptation_request.dyslexia_preset,
+            adaptation_request.adhd_preset,
+            adaptation_request.vision_preset,
+            known_blocks=adaptation_request.known_blocks
+        )
+        return _with_tldr(result, adaptation_request.text)
+
+    return await adaptation_executor.run(adapt)
+
+@router.post("/adapt-batch")
+async def adapt_batch(batch_request: BatchTextAdaptation):
+    """Adapt many documents with one preset set across the adaptation_batch process pool
+
+    Returns results in input order, or streams NDJSON results as they complete
+    when stream is set. A failing document never fails the whole batch.
+    """
+    if len(batch_request.texts) > MAX_BATCH_DOCUMENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large: at most {MAX_BATCH_DOCUMENTS} documents per request"
+        )
+
+    presets = (
+        batch_request.dyslexia_preset,
+        batch_request.adhd_preset,
+        batch_request.vision_preset
+    )
+    in_flight = {}
+    tasks = [
+        _adapt_batch_item(index, text, presets, in_flight)
+        for index, text in enumerate(batch_request.texts)
+    ]
+
+    if batch_request.stream:
+        async def generate_results():
+            running = [asyncio.ensure_future(task) for task in tasks]
+            try:
+                for next_result in asyncio.as_completed(running):
+                    yield json.dumps(await next_result) + "\n"
+            finally:
+                # The client went away mid-batch: drop the documents not yet adapted
+                for task in running:
+                    task.cancel()
+
+        return StreamingResponse(generate_results(), media_type="application/x-ndjson")
+
+    results = await asyncio.gather(*tasks)
+    return {
+        "total": len(results),
+        "succeeded": sum(1 for item in results if item["success"]),
+        "results": results
+    }
+
+@router.post("/vision/classify", response_model=VisionResult)
+async def classify_vision(input_data: VisionInput):
+    """Classify vision level based on glasses prescription"""
+    result = ml_service.classify_vision(input_data.glasses_power)
+    return VisionResult(**result)
+
+@router.get("/presets")
+async def get_adaptation_presets():
+    """Get available adaptation presets and their descriptions"""
+    return {
+        "dyslexia": {
+            "normal": "Standard text display",
+            "mild": "Moderate letter and line spacing",
+            "severe": "Heavy spacing, dyslexic letter highlighting, TTS support"
+        },
+        "adhd": {
+            "normal": "Standard text display",
+            "inattentive": "Highlight every 3rd word for focus",
+            "hyperactive": "Chunked sentences, word highlighting, TL;DR available",
+            "severe": "Full chunking, highlighting, TTS, and TL;DR support"
+        },
+        "vision": {
+            "normal": "Standard text size and contrast",
+            "mild": "25-30% text enlargement, slight spacing increase",
+            "low_vision": "50% larger fonts, high contrast, TTS support"
+        }
+    }
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Get adaptation result cache counters for monitoring"""
+    return text_service.cache.stats()
+
+@router.get("/css-styles")
+async def get_css_styles():
+    """Get CSS classes for text adaptations"""
+    return {
+        "css": ADAPTATION_CSS
+    }
@@ -1,6 +1,10 @@
-from fastapi import APIRouter
-from app.models.predictions import ADHDInput, ADHDResult
-from app.services.ml_service import ml_service
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from app.models.predictions import ADHDInput, ADHDResult, ADHDBatchInput, ADHDBatchResult
+from app.services.ml_service import ml_service, MAX_BATCH_ROWS
+from app.services import prediction_batcher
+from app.services.prediction_batcher import InvalidFeatures
+from app.services.executors import ml_executor
+from app.services.shadow_inference import shadow_scorer
 from pydantic import BaseModel
 from typing import List
 
@@ -40,6 +44,38 @@ async def predict_adhd(input_data: SimpleADHDInput):
         ]
     )
 
+@router.post("/predict-model")
+async def predict_adhd_model(input_data: ADHDInput, background_tasks: BackgroundTasks):
+    """Predict ADHD type with the trained model (Q1_1..Q1_9 and Q2_1..Q2_9 responses)
+
+    Concurrent requests are scored together in one micro-batch.
+    """
+    if len(input_data.q1_responses) != 9 or len(input_data.q2_responses) != 9:
+        raise HTTPException(status_code=400, detail="Expected 9 responses in each of q1_responses and q2_responses")
+    try:
+        result, scoring_us = await prediction_batcher.predict_adhd(input_data.q1_responses, input_data.q2_responses)
+    except InvalidFeatures as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # A candidate model, if any, sees the same answers after the response is sent
+    shadow_scorer.schedule(background_tasks, "adhd", list(input_data.q1_responses) + list(input_data.q2_responses),
+                           result["type"], result["confidence"], scoring_us)
+    return result
+
+@router.post("/predict-batch", response_model=ADHDBatchResult)
+async def predict_adhd_batch(batch: ADHDBatchInput):
+    """Score many questionnaires with the trained model in one pass
+
+    Each input row holds 18 answers (Q1_1..Q1_9 hyperactivity, Q2_1..Q2_9 inattention);
+    the output is columnar, row i of every list belonging to input row i.
+    """
+    if len(batch.responses) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=400, detail=f"Batch too large: at most {MAX_BATCH_ROWS} rows per request")
+    try:
+        result = await ml_executor.run(ml_service.predict_adhd_batch, batch.responses)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ADHDBatchResult(count=len(result["type"]), **result)
+
 @router.get("/questionnaire")
 async def get_adhd_questionnaire():
     """Get ADHD assessment questionnaire"""
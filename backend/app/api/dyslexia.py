@@ -1,16 +1,46 @@
-from fastapi import APIRouter
-from app.models.predictions import DyslexiaInput, DyslexiaResult
-from app.services.ml_service import ml_service
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from app.models.predictions import DyslexiaInput, DyslexiaResult, DyslexiaBatchInput, DyslexiaBatchResult
+from app.services.ml_service import ml_service, MAX_BATCH_ROWS
+from app.services import prediction_batcher
+from app.services.prediction_batcher import InvalidFeatures
+from app.services.executors import ml_executor
+from app.services.shadow_inference import shadow_scorer
 from pydantic import BaseModel
 from typing import Optional
 
 router = APIRouter()
 
 @router.post("/predict", response_model=DyslexiaResult)
-async def predict_dyslexia(input_data: DyslexiaInput):
+async def predict_dyslexia(input_data: DyslexiaInput, background_tasks: BackgroundTasks):
     """Predict dyslexia severity based on reading speed and comprehension"""
-    result = ml_service.predict_dyslexia(input_data.speed, input_data.survey_score)
-    return DyslexiaResult(**result)
+    # Concurrent requests are scored together in one micro-batch
+    try:
+        result, scoring_us = await prediction_batcher.predict_dyslexia(input_data.speed, input_data.survey_score)
+    except InvalidFeatures as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # A candidate model, if any, sees the same input after the response is sent
+    shadow_scorer.schedule(background_tasks, "dyslexia", [input_data.speed, input_data.survey_score],
+                           result["severity"], result["confidence"], scoring_us)
+    return DyslexiaResult(
+        severity=result["adaptation_preset"],
+        confidence=result["confidence"],
+        preset=result["severity"],
+        recommendations=[result["description"]]
+    )
+
+@router.post("/predict-batch", response_model=DyslexiaBatchResult)
+async def predict_dyslexia_batch(batch: DyslexiaBatchInput):
+    """Score a whole screening session at once
+
+    Input and output are columnar: row i of every list belongs to the same student.
+    """
+    if len(batch.speed) > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=400, detail=f"Batch too large: at most {MAX_BATCH_ROWS} rows per request")
+    try:
+        result = await ml_executor.run(ml_service.predict_dyslexia_batch, batch.speed, batch.survey_score)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return DyslexiaBatchResult(count=len(result["severity"]), **result)
 
 class EnhancedDyslexiaInput(BaseModel):
     reading_speed: float
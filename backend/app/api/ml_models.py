@@ -0,0 +1,100 @@
+from fastapi import APIRouter, HTTPException, Header
+from pydantic import BaseModel
+from typing import Optional
+import os
+from app.services import model_registry
+from app.services.executors import maintenance_executor
+from app.services.ml_service import ml_service
+from app.services.model_artifacts import MODEL_NAMES
+from app.services.shadow_inference import shadow_scorer
+
+router = APIRouter()
+
+# Shared secret for model administration; the reload endpoint is disabled while it is unset
+ADMIN_TOKEN = os.getenv("ML_ADMIN_TOKEN")
+
+class ModelReloadRequest(BaseModel):
+    version: Optional[str] = None   # default: the registry's live version
+    activate: bool = True           # mark it live so every worker's registry watcher follows
+
+class ShadowRequest(BaseModel):
+    version: Optional[str] = None   # None stops shadow scoring
+
+def _check_admin_token(x_admin_token: Optional[str]):
+    if not ADMIN_TOKEN or x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Model administration requires a valid X-Admin-Token")
+
+def _check_model_name(name: str):
+    if name not in MODEL_NAMES:
+        raise HTTPException(status_code=404, detail=f"Unknown model '{name}'")
+
+@router.get("")
+async def get_models():
+    """Live version and metadata of each screening model in this worker"""
+    return ml_service.models_info()
+
+@router.get("/drift")
+async def get_drift_stats():
+    """Histograms of the inputs each model scored in this worker, and the classes it predicted
+
+    Counters are cumulative since startup; compare two snapshots (or the
+    readapt_drift_* series on /metrics) to see how traffic shifts over time.
+    """
+    return ml_service.drift_stats()
+
+@router.get("/shadow")
+async def get_shadow_stats():
+    """Agreement and latency of each shadow candidate against the live model, in this worker"""
+    return shadow_scorer.stats()
+
+@router.get("/{name}/versions")
+async def get_model_versions(name: str):
+    """Every version in the registry, plus the live and the loaded one"""
+    _check_model_name(name)
+    return {
+        "name": name,
+        "current": model_registry.current_version(name),
+        "loaded": ml_service.models_info()[name]["version"],
+        "versions": model_registry.list_versions(name)
+    }
+
+@router.post("/{name}/reload")
+async def reload_model(name: str, request: ModelReloadRequest, x_admin_token: Optional[str] = Header(None)):
+    """Load, validate and warm up a registry version in the background, then swap it in
+
+    Requests in flight finish on the previous version. With activate set the
+    version is also marked live, so other workers pick it up from the registry.
+    """
+    _check_admin_token(x_admin_token)
+    _check_model_name(name)
+
+    try:
+        info = await maintenance_executor.run(ml_service.reload_model, name, request.version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if request.activate and info["version"] != model_registry.current_version(name):
+        model_registry.activate(name, info["version"])
+    return {"name": name, "activated": request.activate, **info}
+
+@router.post("/{name}/shadow")
+async def set_shadow_model(name: str, request: ShadowRequest, x_admin_token: Optional[str] = Header(None)):
+    """Score a registry version in shadow on live prediction traffic, or stop with version null
+
+    The version is validated and warmed up here, then marked in the registry so
+    every worker's watcher starts shadowing it too.
+    """
+    _check_admin_token(x_admin_token)
+    _check_model_name(name)
+
+    try:
+        info = await maintenance_executor.run(shadow_scorer.set_candidate, name, request.version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    model_registry.set_shadow(name, request.version)
+    return {"name": name, "shadow": request.version, "model": info}
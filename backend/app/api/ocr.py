@@ -1,7 +1,14 @@
+import json
+import time
+from functools import partial
 from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
-from app.services.ocr_service import ocr_service
+from app.services.executors import ocr_executor, adaptation_executor, ExecutorSaturated
+from app.services.ocr_documents import OCR_MAX_PAGES, DocumentError, open_document, stream_pages
+from app.services.ocr_service import ocr_service, OCRTimeout
+from app.services.ocr_cache import ocr_cache
 from app.services.text_service import text_service
 
 router = APIRouter()
@@ -17,13 +24,13 @@ async def extract_text_from_upload(file: UploadFile = File(...)):
     try:
         # Validate file type
         if not file.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
+            raise HTTPException(status_code=400, detail="File must be an image (use /extract-pages for PDFs)")
         
         # Read file data
         image_data = await file.read()
         
-        # Extract text using OCR
-        result = ocr_service.extract_text_from_image(image_data)
+        # Extract text using OCR (Tesseract runs on the ocr pool, not the event loop)
+        result = await ocr_executor.run(ocr_service.extract_text_from_image, image_data)
         
         if not result["success"]:
             raise HTTPException(status_code=500, detail=result.get("error", "OCR failed"))
@@ -34,20 +41,77 @@ async def extract_text_from_upload(file: UploadFile = File(...)):
             "extracted_text": result["extracted_text"],
             "character_count": result["character_count"],
             "word_count": result["word_count"],
-            "confidence": result["confidence"]
+            "confidence": result["confidence"],
+            "preprocessing": result["preprocessing"],
+            "cached": result["cached"]
         }
         
-    except HTTPException:
+    except (HTTPException, ExecutorSaturated):
         raise
+    except OCRTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OCR processing failed: {str(e)}")
 
+@router.post("/extract-pages")
+async def extract_pages_from_upload(file: UploadFile = File(...)):
+    """Extract text from every page of a PDF or multi-frame TIFF, streamed as NDJSON in page order
+
+    One JSON object per line: a "document" header, one "page" line per page
+    as soon as it and the pages before it are read, then a "done" summary.
+    Born-digital PDF pages are read from their text layer; scanned pages are
+    rasterized one at a time and OCRed in parallel on the ocr pool.
+    """
+    data = await file.read()
+    try:
+        document = await ocr_executor.run(open_document, data)
+    except DocumentError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    if document.page_count > OCR_MAX_PAGES:
+        raise HTTPException(status_code=413, detail=f"Document has {document.page_count} pages; the limit is {OCR_MAX_PAGES}")
+
+    # Submits the first pages now, so a saturated pool is still a 503 rather than a broken stream
+    pages = stream_pages(document.page_count, partial(ocr_service.extract_text_from_page, document), ocr_executor)
+
+    async def lines():
+        started = time.perf_counter()
+        words = failed = 0
+        methods = {"text_layer": 0, "ocr": 0}
+        yield json.dumps({"type": "document", "filename": file.filename, "kind": document.kind,
+                          "pages": document.page_count}) + "\n"
+        try:
+            async for index, result in pages:
+                # method: "text_layer" (embedded PDF text, no OCR) or "ocr"
+                method = result.get("method", "ocr")
+                line = {"type": "page", "page": index + 1, "success": result["success"], "method": method,
+                        "extracted_text": result["extracted_text"]}
+                if result["success"]:
+                    words += result["word_count"]
+                    methods[method] += 1
+                    line.update(character_count=result["character_count"], word_count=result["word_count"],
+                                confidence=result["confidence"])
+                    if method == "ocr":
+                        line.update(preprocessing=result["preprocessing"], cached=result["cached"])
+                else:
+                    failed += 1
+                    line["error"] = result.get("error", "OCR failed")
+                yield json.dumps(line) + "\n"
+        finally:
+            # The client went away mid-document: drop the pages not yet started
+            await pages.aclose()
+        yield json.dumps({"type": "done", "pages": document.page_count, "failed_pages": failed, "methods": methods,
+                          "word_count": words, "elapsed_ms": round((time.perf_counter() - started) * 1000)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.post("/extract-and-adapt")
 async def extract_and_adapt_text(request: OCRBase64Request):
     """Extract text from base64 image and apply accessibility adaptations"""
     try:
         # Extract text from image
-        ocr_result = ocr_service.extract_text_from_base64(request.image_base64)
+        ocr_result = await ocr_executor.run(ocr_service.extract_text_from_base64, request.image_base64)
         
         if not ocr_result["success"]:
             raise HTTPException(status_code=500, detail=ocr_result.get("error", "OCR failed"))
@@ -67,21 +131,24 @@ async def extract_and_adapt_text(request: OCRBase64Request):
         if request.disorder_type and request.disorder_type != "normal":
             # Apply adaptation for single disorder only
             if request.disorder_type == "dyslexia":
-                adapted_result = text_service.adapt_text(
+                adapted_result = await adaptation_executor.run(
+                    text_service.adapt_text,
                     extracted_text, 
                     dyslexia_preset=request.severity,
                     adhd_preset="normal",
                     vision_preset="normal"
                 )
             elif request.disorder_type == "adhd":
-                adapted_result = text_service.adapt_text(
+                adapted_result = await adaptation_executor.run(
+                    text_service.adapt_text,
                     extracted_text,
                     dyslexia_preset="normal", 
                     adhd_preset=request.severity,
                     vision_preset="normal"
                 )
             elif request.disorder_type == "vision":
-                adapted_result = text_service.adapt_text(
+                adapted_result = await adaptation_executor.run(
+                    text_service.adapt_text,
                     extracted_text,
                     dyslexia_preset="normal",
                     adhd_preset="normal", 
@@ -101,16 +168,26 @@ async def extract_and_adapt_text(request: OCRBase64Request):
             "severity_applied": request.severity
         }
         
-    except HTTPException:
+    except (HTTPException, ExecutorSaturated):
         raise
+    except OCRTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OCR and adaptation failed: {str(e)}")
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Get OCR result cache counters for monitoring (this worker's lookups; the disk is shared)"""
+    if ocr_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **ocr_cache.stats()}
+
 @router.get("/supported-formats")
 async def get_supported_formats():
     """Get supported image formats for OCR"""
     return {
         "supported_formats": ["jpg", "jpeg", "png", "bmp", "tiff", "gif"],
+        "multi_page_formats": ["pdf", "tiff"],
         "max_file_size": "10MB",
         "recommended_dpi": "300 DPI for best results",
         "tips": [
@@ -6,6 +6,7 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.database.database import get_db
 from app.database.models import User
+from app.services.executors import crypto_executor
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -52,8 +53,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: str):
     db_user = User(
         email=user.email,
         hashed_password=hashed_password,
@@ -64,11 +64,12 @@ def create_user(db: Session, user: UserCreate):
     db.refresh(db_user)
     return db_user
 
-def authenticate_user(db: Session, email: str, password: str):
+async def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    # bcrypt is deliberately slow; verify on the crypto pool so the event loop keeps serving
+    if not await crypto_executor.run(verify_password, password, user.hashed_password):
         return False
     return user
 
@@ -95,11 +96,12 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     db_user = get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return create_user(db=db, user=user)
+    hashed_password = await crypto_executor.run(get_password_hash, user.password)
+    return create_user(db=db, user=user, hashed_password=hashed_password)
 
 @router.post("/token", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,11 +1,18 @@
-from fastapi import FastAPI
+import os
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import dyslexia, adhd, adaptation, agentic_api, tts_simple, user_profile, ocr, summary
+from app.api import dyslexia, adhd, adaptation, agentic_api, tts_simple, user_profile, ocr, summary, ml_models
 from app.analytics import dashboard, export
 from app.auth import auth_routes
 from app.database.database import create_tables
+from app.services.text_service import text_service
+from app.services.prediction_batcher import batchers
+from app.services.executors import executors, shutdown_executors, ExecutorSaturated
+from app.services.ml_service import ml_service
+from app.services.shadow_inference import shadow_scorer
+from app.services.ocr_cache import ocr_cache
 # from deployment.monitoring import comprehensive_health_check, metrics_middleware, get_metrics
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, JSONResponse
 
 # Create database tables
 create_tables()
@@ -24,10 +31,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    """A full worker pool sheds the request instead of queueing it without limit"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+@app.on_event("startup")
+async def start_model_watcher():
+    # Each worker polls the model registry, hot-swaps versions marked live and shadows candidates
+    poll_seconds = float(os.getenv("ML_REGISTRY_POLL_SECONDS", 0))
+    ml_service.watch_registry(poll_seconds)
+    shadow_scorer.watch_registry(poll_seconds)
+
+@app.on_event("shutdown")
+async def stop_executors():
+    shutdown_executors(wait=False)
+
 # Traditional ML API routes
 app.include_router(dyslexia.router, prefix="/api/dyslexia", tags=["dyslexia"])
 app.include_router(adhd.router, prefix="/api/adhd", tags=["adhd"])
 app.include_router(adaptation.router, prefix="/api/adaptation", tags=["adaptation"])
+app.include_router(ml_models.router, prefix="/api/models", tags=["models"])
 
 # Authentication routes
 app.include_router(auth_routes.router, prefix="/auth", tags=["authentication"])
@@ -62,8 +90,20 @@ async def health_check():
 
 @app.get("/metrics", response_class=PlainTextResponse)
 async def metrics():
-    """Simple metrics endpoint"""
-    return "# No metrics configured\n"
+    """Simple metrics endpoint (Prometheus text format)"""
+    lines = []
+    for name, value in text_service.cache.stats().items():
+        lines.append(f"readapt_adaptation_cache_{name} {value}")
+    for batcher in batchers:
+        lines.extend(batcher.prometheus_lines())
+    for executor in executors.values():
+        lines.extend(executor.prometheus_lines())
+    lines.extend(shadow_scorer.prometheus_lines())
+    lines.extend(ml_service.drift_prometheus_lines())
+    if ocr_cache is not None:
+        for name, value in ocr_cache.stats().items():
+            lines.append(f"readapt_ocr_cache_{name} {value}")
+    return "\n".join(lines) + "\n"
 
 if __name__ == "__main__":
     import uvicorn
@@ -11,6 +11,16 @@ class DyslexiaResult(BaseModel):
     preset: int  # 0: severe, 1: mild, 2: normal
     recommendations: List[str] = []
 
+class DyslexiaBatchInput(BaseModel):
+    speed: List[float]  # one column per feature, row i is one student
+    survey_score: List[float]
+
+class DyslexiaBatchResult(BaseModel):
+    count: int
+    severity: List[int]  # 0: severe, 1: mild, 2: normal
+    confidence: List[float]
+    adaptation_preset: List[str]
+
 class ADHDInput(BaseModel):
     q1_responses: List[int]  # Q1_1 to Q1_9 (hyperactivity)
     q2_responses: List[int]  # Q2_1 to Q2_9 (inattention)
@@ -21,6 +31,17 @@ class ADHDResult(BaseModel):
     preset: int  # 0-3
     recommendations: List[str] = []
 
+class ADHDBatchInput(BaseModel):
+    responses: List[List[float]]  # one row of 18 answers (Q1_1..Q1_9, Q2_1..Q2_9) per student
+
+class ADHDBatchResult(BaseModel):
+    count: int
+    type: List[int]
+    confidence: List[float]
+    adaptation_preset: List[str]
+    hyperactivity_score: List[float]
+    inattention_score: List[float]
+
 class VisionInput(BaseModel):
     glasses_power: float  # Diopter value
 
@@ -34,4 +55,20 @@ class TextAdaptation(BaseModel):
     text: str
     dyslexia_preset: str = "normal"
     adhd_preset: str = "normal"
-    vision_preset: str = "normal"
\ No newline at end of file
+    vision_preset: str = "normal"
+    output_format: str = "html"  # "html" (inline spans) or "annotations" (text + offset ranges)
+    annotation_encoding: str = "ranges"  # "ranges" or "delta"
+
+class BatchTextAdaptation(BaseModel):
+    texts: List[str]
+    dyslexia_preset: str = "normal"
+    adhd_preset: str = "normal"
+    vision_preset: str = "normal"
+    stream: bool = False  # NDJSON results in completion order instead of one ordered JSON list
+
+class IncrementalTextAdaptation(BaseModel):
+    text: str
+    dyslexia_preset: str = "normal"
+    adhd_preset: str = "normal"
+    vision_preset: str = "normal"
+    known_blocks: List[str] = []  # block ids the client already holds adapted HTML for
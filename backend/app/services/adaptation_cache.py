@@ -0,0 +1,137 @@
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Tuple
+
+
+class AdaptationCache:
+    """Content-addressed LRU cache for adaptation results with a byte budget
+
+    Identical requests that arrive while a result is still being computed wait
+    on the first computation instead of starting their own.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.collapsed = 0
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text: str, *presets: str) -> str:
+        """Hash the source text together with the presets applied to it"""
+        digest = hashlib.sha256()
+        for preset in presets:
+            digest.update(preset.encode("utf-8"))
+            digest.update(b"\x00")
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return the cached result for key, computing it at most once if missing"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.collapsed += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._in_flight[key]
+            self._store(key, value)
+        future.set_result(value)
+        return value
+
+    def get(self, key: str):
+        """Return the cached result for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store a result computed outside the cache (e.g. in a worker process)"""
+        with self._lock:
+            self._store(key, value)
+
+    def clear(self):
+        """Drop every cached entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "collapsed": self.collapsed,
+                "in_flight": len(self._in_flight),
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _store(self, key: str, value: Dict[str, Any]):
+        """Insert value and evict least recently used entries over budget (lock held)"""
+        size = self._estimate_size(key, value)
+        if size > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= previous[1]
+        self._entries[key] = (value, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+    def _estimate_size(self, key: str, value: Dict[str, Any]) -> int:
+        """Approximate memory held by an entry; dominated by the adapted HTML or annotations"""
+        annotations = value.get("annotations", ())
+        # [start, end, class] lists cost ~136 bytes each; delta-encoded values are mostly cached small ints
+        annotation_bytes = len(annotations) * (136 if annotations and isinstance(annotations[0], list) else 16)
+        return (
+            sys.getsizeof(key)
+            + sys.getsizeof(value.get("adapted_text", ""))
+            + sys.getsizeof(value.get("text", ""))
+            + annotation_bytes
+            + 1024  # css/features dicts and bookkeeping
+        )
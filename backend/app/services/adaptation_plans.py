@@ -0,0 +1,231 @@
+import re
+import html
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from app.services.hyphenation import hyphenator
+from app.services.text_analysis import AnalyzedText
+
+# Mirror letters (b/d, p/q, m/w, n/u) take precedence over vowel colouring
+MIRROR_LETTERS = "bdpqmwnu"
+VOWELS = "aeiou"
+
+DYSLEXIC_LETTER_PATTERN = re.compile(f"[{MIRROR_LETTERS}{VOWELS}]", re.IGNORECASE)
+
+ANNOTATION_CLASSES = (
+    "dyslexic-mirror",
+    "dyslexic-vowel",
+    "dyslexic-syllables",
+    "syllable-break",
+    "reading-line-odd",
+    "reading-line-even",
+    "sentence-chunk",
+    "adhd-highlight"
+)
+ANNOTATION_CLASS_INDEX = {name: index for index, name in enumerate(ANNOTATION_CLASSES)}
+
+
+def _build_dyslexic_char_table() -> Dict[int, str]:
+    """Precompute the HTML emitted for every character that needs escaping or highlighting"""
+    table = {ord(char): html.escape(char) for char in "&<>\"'"}
+    for letter in MIRROR_LETTERS + MIRROR_LETTERS.upper():
+        table[ord(letter)] = f'<span class="dyslexic-mirror">{letter}</span>'
+    for vowel in VOWELS + VOWELS.upper():
+        table.setdefault(ord(vowel), f'<span class="dyslexic-vowel">{vowel}</span>')
+    return table
+
+
+DYSLEXIC_CHAR_TABLE = _build_dyslexic_char_table()
+DYSLEXIC_LETTER_CLASSES = {
+    ord(char): ANNOTATION_CLASS_INDEX["dyslexic-mirror" if char.lower() in MIRROR_LETTERS else "dyslexic-vowel"]
+    for char in MIRROR_LETTERS + MIRROR_LETTERS.upper() + VOWELS + VOWELS.upper()
+}
+
+
+@lru_cache(maxsize=65536)
+def render_dyslexic_word(word: str) -> str:
+    """Highlight mirror letters and vowels, splitting long words into syllables (memoized per word)"""
+    if len(word) > 6:
+        syllables = hyphenator.syllables(word)
+        return (
+            '<span class="dyslexic-syllables">'
+            + '·'.join(syllable.translate(DYSLEXIC_CHAR_TABLE) for syllable in syllables)
+            + '</span>'
+        )
+    return word.translate(DYSLEXIC_CHAR_TABLE)
+
+
+def annotate_dyslexic_letters(analysis: AnalyzedText) -> list:
+    """Annotation ranges for mirror letters, vowels and syllable breaks in long words"""
+    text = analysis.text
+    annotations = [
+        (match.start(), match.end(), DYSLEXIC_LETTER_CLASSES[ord(match.group())])
+        for match in DYSLEXIC_LETTER_PATTERN.finditer(text)
+    ]
+
+    syllables_class = ANNOTATION_CLASS_INDEX["dyslexic-syllables"]
+    break_class = ANNOTATION_CLASS_INDEX["syllable-break"]
+    for start, end in analysis.words:
+        if end - start > 6:
+            annotations.append((start, end, syllables_class))
+            position = start
+            for syllable in hyphenator.syllables(text[start:end])[:-1]:
+                position += len(syllable)
+                annotations.append((position, position, break_class))
+    return annotations
+
+
+# Transform name -> what it contributes to a compiled plan:
+#   word_renderer     renders each word's HTML (default: escaping only)
+#   word_annotator    produces extra annotation ranges from the analyzed text
+#   highlight_stride  wrap every Nth word in an adhd-highlight span
+#   sentence_classes  wrap sentences in divs, cycling through these classes
+TRANSFORMS = {
+    "dyslexic_letters": {
+        "word_renderer": render_dyslexic_word,
+        "word_annotator": annotate_dyslexic_letters
+    },
+    "reading_ruler": {
+        "sentence_classes": ("reading-line-odd", "reading-line-even")
+    },
+    "sentence_chunks": {
+        "sentence_classes": ("sentence-chunk",)
+    },
+    "every_third_word": {
+        "highlight_stride": 3
+    }
+}
+
+
+@dataclass(frozen=True)
+class AdaptationPlan:
+    """Immutable, precompiled adaptation for one (disorder, preset) pair"""
+
+    primary_disorder: str
+    preset: str
+    css_styles: Mapping[str, str]
+    features: Tuple[str, ...]
+    transforms: Tuple[str, ...]
+    word_renderer: Callable[[str], str] = html.escape
+    word_annotator: Optional[Callable[[AnalyzedText], list]] = None
+    highlight_stride: int = 0
+    sentence_classes: Tuple[str, ...] = ()
+
+    @property
+    def tts_enabled(self) -> bool:
+        return "tts_enabled" in self.features
+
+    @property
+    def tldr_available(self) -> bool:
+        return "tldr_available" in self.features
+
+    def metadata(self) -> Dict[str, Any]:
+        """Styles and feature flags shared by every output format"""
+        return {
+            "css_styles": dict(self.css_styles),
+            "features": list(self.features),
+            "primary_disorder": self.primary_disorder,
+            "tts_enabled": self.tts_enabled,
+            "tldr_available": self.tldr_available
+        }
+
+    def continuation(self, word_offset: int, sentence_offset: int) -> Tuple[int, int]:
+        """The part of a position in a document that changes how the text after it renders
+
+        Highlighting counts words and the sentence classes alternate, so a
+        paragraph renders the same wherever these residues are the same.
+        """
+        return (
+            word_offset % self.highlight_stride if self.highlight_stride else 0,
+            sentence_offset % len(self.sentence_classes) if self.sentence_classes else 0
+        )
+
+    def render_html(self, analysis: AnalyzedText, word_offset: int = 0, sentence_offset: int = 0) -> str:
+        """Render the analyzed text to inline HTML in a single pass
+
+        When the text is one paragraph of a longer document, word_offset and
+        sentence_offset count the words and sentences before it, so word
+        highlighting and sentence alternation carry on from the paragraphs
+        before instead of restarting.
+        """
+        if not self.transforms:
+            return analysis.text
+
+        parts: List[str] = []
+        if self.sentence_classes:
+            classes = self.sentence_classes
+            for index, (first, end) in enumerate(analysis.sentences):
+                parts.append(f'<div class="{classes[(sentence_offset + index) % len(classes)]}">')
+                self._render_words(analysis, first, end, parts, word_offset)
+                parts.append('</div>')
+        else:
+            self._render_words(analysis, 0, len(analysis.words), parts, word_offset)
+        return ''.join(parts)
+
+    def _render_words(self, analysis: AnalyzedText, first: int, end: int, parts: List[str], word_offset: int = 0):
+        """Append the HTML for words[first:end], keeping the whitespace between them"""
+        text = analysis.text
+        words = analysis.words
+        render_word = self.word_renderer
+        stride = self.highlight_stride
+        for index in range(first, end):
+            start, stop = words[index]
+            if index > first:
+                parts.append(text[words[index - 1][1]:start])
+            word_html = render_word(text[start:stop])
+            if stride and (word_offset + index) % stride == stride - 1:
+                word_html = f'<span class="adhd-highlight">{word_html}</span>'
+            parts.append(word_html)
+
+    def annotate(self, analysis: AnalyzedText) -> list:
+        """(start, end, class index) ranges over the original text, sorted for nesting"""
+        annotations = []
+        if self.word_annotator is not None:
+            annotations.extend(self.word_annotator(analysis))
+
+        if self.highlight_stride:
+            highlight_class = ANNOTATION_CLASS_INDEX["adhd-highlight"]
+            stride = self.highlight_stride
+            annotations.extend(
+                (start, end, highlight_class)
+                for start, end in analysis.words[stride - 1::stride]
+            )
+
+        if self.sentence_classes:
+            class_indexes = [ANNOTATION_CLASS_INDEX[name] for name in self.sentence_classes]
+            for index, sentence in enumerate(analysis.sentences):
+                start, end = analysis.sentence_span(sentence)
+                annotations.append((start, end, class_indexes[index % len(class_indexes)]))
+
+        annotations.sort(key=lambda annotation: (annotation[0], -annotation[1]))
+        return annotations
+
+
+def compile_plan(primary_disorder: str, preset: str, definition: Dict[str, Any]) -> AdaptationPlan:
+    """Fold a plan definition's transforms into one immutable plan"""
+    options: Dict[str, Any] = {}
+    for name in definition["transforms"]:
+        for option, value in TRANSFORMS[name].items():
+            if option in options and options[option] != value:
+                raise ValueError(
+                    f"Preset {primary_disorder}/{preset}: transform '{name}' conflicts on '{option}'"
+                )
+            options[option] = value
+
+    return AdaptationPlan(
+        primary_disorder=primary_disorder,
+        preset=preset,
+        css_styles=MappingProxyType(dict(definition["css_styles"])),
+        features=tuple(definition["features"]),
+        transforms=tuple(definition["transforms"]),
+        **options
+    )
+
+
+def compile_plans(definitions: Dict[Tuple[str, str], Dict[str, Any]]) -> Dict[Tuple[str, str], AdaptationPlan]:
+    """Compile every (disorder, preset) definition once at startup"""
+    return {
+        (primary_disorder, preset): compile_plan(primary_disorder, preset, definition)
+        for (primary_disorder, preset), definition in definitions.items()
+    }
@@ -0,0 +1,198 @@
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+CONFIDENCE_BINS = 10
+# A thread folds its pending rows into its histograms once it holds this many rows or batches
+FLUSH_ROWS = 1024
+FLUSH_BATCHES = 256
+
+
+class _Counts:
+    """Cumulative histograms and moments"""
+
+    __slots__ = ("rows", "bins", "out_of_range", "sums", "squares", "labels", "confidence")
+
+    def __init__(self, n_features: int, n_bins: int, n_classes: int):
+        self.rows = 0
+        self.bins = np.zeros((n_features, n_bins), dtype=np.int64)
+        self.out_of_range = np.zeros(n_features, dtype=np.int64)
+        self.sums = np.zeros(n_features)
+        self.squares = np.zeros(n_features)
+        self.labels = np.zeros(n_classes + 1, dtype=np.int64)  # last slot: labels outside the known classes
+        self.confidence = np.zeros(CONFIDENCE_BINS, dtype=np.int64)
+
+    def add(self, other: "_Counts"):
+        self.rows += other.rows
+        self.bins += other.bins
+        self.out_of_range += other.out_of_range
+        self.sums += other.sums
+        self.squares += other.squares
+        self.labels += other.labels
+        self.confidence += other.confidence
+
+
+class _Shard:
+    """One thread's counts plus the scored batches it has not folded in yet
+
+    Only the owning thread writes. It replaces state as a whole when it folds,
+    so a reader that takes state once sees the counts and pending batches
+    that belong together.
+    """
+
+    __slots__ = ("state", "pending_rows")
+
+    def __init__(self, counts: _Counts):
+        self.state: Tuple[_Counts, list] = (counts, [])
+        self.pending_rows = 0
+
+
+class DriftStats:
+    """Constant-memory input and output statistics for one model
+
+    Every feature gets a fixed-bin histogram over its expected range
+    [low, high], with values outside it counted separately, plus running sums
+    for mean and standard deviation; predicted classes and confidences are
+    counted too. Memory does not grow with traffic, and the counters are
+    cumulative, so drift over any window is the difference of two snapshots
+    (or a rate() over the Prometheus series).
+
+    observe() takes no lock and does no arithmetic: each thread appends the
+    scored batch to its own shard and folds the shard into its histograms
+    with a few vectorised numpy calls once FLUSH_ROWS rows have piled up,
+    which makes the cost per request a fraction of a microsecond on average.
+    """
+
+    def __init__(self, name: str, features: Sequence[Tuple[str, float, float]], n_bins: int, n_classes: int):
+        self.name = name
+        self.feature_names = [feature for feature, _, _ in features]
+        self.low = np.array([low for _, low, _ in features], dtype=np.float64)
+        self.high = np.array([high for _, _, high in features], dtype=np.float64)
+        self.n_bins = n_bins
+        self.n_classes = n_classes  # labels are 0..n_classes-1; anything else is counted as "other"
+        self._scale = n_bins / (self.high - self.low)
+        self._offsets = np.arange(len(self.feature_names)) * n_bins
+        self._shards: List[_Shard] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()  # only taken when a thread writes for the first time
+
+    def _new_counts(self) -> _Counts:
+        return _Counts(len(self.feature_names), self.n_bins, self.n_classes)
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(self._new_counts())
+            with self._lock:
+                self._shards = self._shards + [shard]
+            self._local.shard = shard
+        return shard
+
+    def observe(self, features: np.ndarray, labels: np.ndarray, confidences: np.ndarray):
+        """Record a scored (n_rows, n_features) matrix with its labels and confidences; the arrays must not be modified later"""
+        if not len(features):
+            return
+        shard = self._shard()
+        counts, pending = shard.state
+        pending.append((features, labels, confidences))
+        shard.pending_rows += len(features)
+        if shard.pending_rows >= FLUSH_ROWS or len(pending) >= FLUSH_BATCHES:
+            folded = self._new_counts()
+            folded.add(counts)
+            self._fold(folded, pending)
+            shard.state = (folded, [])
+            shard.pending_rows = 0
+
+    def _fold(self, counts: _Counts, pending: list):
+        """Add scored batches to counts"""
+        features = np.concatenate([batch for batch, _, _ in pending])
+        labels = np.concatenate([batch for _, batch, _ in pending]).astype(np.intp)
+        confidences = np.concatenate([batch for _, _, batch in pending])
+
+        # NaN fails both comparisons and lands in out_of_range with the values outside [low, high]
+        scaled = (features - self.low) * self._scale
+        in_range = (scaled >= 0) & (scaled <= self.n_bins)
+        # Out-of-range values (NaN among them) are masked out below; zero them so the cast stays defined
+        bins = np.minimum(np.where(in_range, scaled, 0.0).astype(np.intp), self.n_bins - 1)
+        # One bincount over flattened (feature, bin) indices instead of a loop over features
+        counts.bins += np.bincount((bins + self._offsets)[in_range], minlength=counts.bins.size).reshape(counts.bins.shape)
+        counts.out_of_range += len(features) - in_range.sum(axis=0)
+
+        finite = np.where(np.isfinite(features), features, 0.0)
+        counts.sums += finite.sum(axis=0)
+        counts.squares += np.einsum("ij,ij->j", finite, finite)
+        counts.rows += len(features)
+
+        known = (labels >= 0) & (labels < self.n_classes)
+        counts.labels += np.bincount(np.where(known, labels, self.n_classes), minlength=self.n_classes + 1)
+        confidence_bins = np.minimum((confidences * CONFIDENCE_BINS).astype(np.intp), CONFIDENCE_BINS - 1)
+        counts.confidence += np.bincount(confidence_bins, minlength=CONFIDENCE_BINS)
+
+    def _totals(self) -> _Counts:
+        total = self._new_counts()
+        for shard in self._shards:
+            counts, pending = shard.state
+            total.add(counts)
+            pending = list(pending)  # the owner may append meanwhile
+            if pending:
+                self._fold(total, pending)
+        return total
+
+    def _quantiles(self, counts: np.ndarray, index: int, quantiles: Sequence[float]) -> List[float]:
+        """Quantiles interpolated within the histogram bins (in-range values only)"""
+        total = counts.sum()
+        if not total:
+            return [None] * len(quantiles)
+        cumulative = np.cumsum(counts)
+        width = (self.high[index] - self.low[index]) / self.n_bins
+        result = []
+        for quantile in quantiles:
+            target = quantile * total
+            bin_index = int(np.searchsorted(cumulative, target))
+            before = cumulative[bin_index - 1] if bin_index else 0
+            fraction = (target - before) / counts[bin_index] if counts[bin_index] else 0.0
+            result.append(round(float(self.low[index] + (bin_index + fraction) * width), 4))
+        return result
+
+    def snapshot(self, presets: Dict[int, str]) -> Dict:
+        """Histograms, moments and approximate quartiles per feature, plus the output class distribution"""
+        total = self._totals()
+        rows = total.rows
+        features = {}
+        for index, feature in enumerate(self.feature_names):
+            mean = total.sums[index] / rows if rows else 0.0
+            variance = max(total.squares[index] / rows - mean * mean, 0.0) if rows else 0.0
+            features[feature] = {
+                "range": [float(self.low[index]), float(self.high[index])],
+                "bins": total.bins[index].tolist(),
+                "out_of_range": int(total.out_of_range[index]),
+                "mean": round(float(mean), 4),
+                "std": round(float(np.sqrt(variance)), 4),
+                "quartiles": self._quantiles(total.bins[index], index, (0.25, 0.5, 0.75))
+            }
+        labels = {presets.get(label, str(label)): int(count) for label, count in enumerate(total.labels[:-1])}
+        labels["other"] = int(total.labels[-1])
+        return {
+            "rows": rows,
+            "features": features,
+            "predictions": labels,
+            "confidence_bins": total.confidence.tolist()
+        }
+
+    def prometheus_lines(self, presets: Dict[int, str]) -> List[str]:
+        """Per-bin input counts and output class counts as cumulative counters"""
+        total = self._totals()
+        model = f'model="{self.name}"'
+        lines = [f"readapt_drift_rows{{{model}}} {total.rows}"]
+        for index, feature in enumerate(self.feature_names):
+            label = f'{model},feature="{feature}"'
+            width = (self.high[index] - self.low[index]) / self.n_bins
+            for bin_index, count in enumerate(total.bins[index]):
+                lower = round(float(self.low[index] + bin_index * width), 4)
+                lines.append(f'readapt_drift_input_bin{{{label},bin="{lower}"}} {count}')
+            lines.append(f"readapt_drift_input_out_of_range{{{label}}} {total.out_of_range[index]}")
+        for label, count in enumerate(total.labels[:-1]):
+            lines.append(f'readapt_drift_predictions{{{model},class="{presets.get(label, label)}"}} {count}')
+        lines.append(f'readapt_drift_predictions{{{model},class="other"}} {total.labels[-1]}')
+        return lines
@@ -0,0 +1,218 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+
+from app.services.metrics import Histogram
+
+CPU_COUNT = os.cpu_count() or 1
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 30000)
+RUN_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class ExecutorSaturated(Exception):
+    """A pool's queue is full; the request should be shed (503 + Retry-After)"""
+
+    def __init__(self, name: str, retry_after: int = 1):
+        super().__init__(f"The {name} workers are busy, retry shortly")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class BoundedExecutor:
+    """A named thread or process pool with a bounded queue and saturation metrics
+
+    At most max_workers jobs run and at most max_queue more wait; further
+    submissions raise ExecutorSaturated instead of queueing without limit.
+    Jobs are counted from submission to completion in the calling process, so
+    the same accounting covers thread and process pools (pools run FIFO, so
+    the first max_workers in-flight jobs are the running ones). Thread pools
+    also time each job's queue wait and run time, which sets the Retry-After
+    of a rejection to roughly how long the backlog takes to drain.
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int, max_queue: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Executor {name}: unknown kind '{kind}'")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.peak_in_flight = 0
+        self.queue_wait_ms = Histogram(WAIT_BUCKETS_MS)
+        self.run_ms = Histogram(RUN_BUCKETS_MS)
+        self._in_flight = 0
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        """Create the pool on first use (and again after a process pool broke)"""
+        if self._executor is None:
+            if self.kind == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs), or raise ExecutorSaturated if the queue is full"""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(self.name, self._retry_after())
+            self._in_flight += 1
+            self.submitted += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+            executor = self._get_executor()
+
+        try:
+            if self.kind == "thread":
+                future = executor.submit(self._timed, time.perf_counter(), fn, args, kwargs)
+            else:
+                future = executor.submit(fn, *args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                self._in_flight -= 1
+                self.failed += 1
+                if isinstance(e, BrokenProcessPool) and self._executor is executor:
+                    self._executor = None
+            raise
+        future.add_done_callback(self._job_done)
+        return future
+
+    def _timed(self, enqueued: float, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.queue_wait_ms.observe((started - enqueued) * 1000)
+                self.run_ms.observe((finished - started) * 1000)
+
+    def _retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, from the mean job time (at least 1)"""
+        if not self.run_ms.count:
+            return 1
+        return max(1, math.ceil(self._in_flight * self.run_ms.mean / 1000 / self.max_workers))
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn in the pool; the event loop only awaits the result"""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _job_done(self, future: Future):
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+            error = None if future.cancelled() else future.exception()
+            if error is not None:
+                self.failed += 1
+                # A crashed worker poisons the whole process pool; start a fresh one for later jobs
+                if isinstance(error, BrokenProcessPool):
+                    self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and saturation for monitoring"""
+        with self._lock:
+            in_flight = self._in_flight
+            active = min(in_flight, self.max_workers)
+            return {
+                "kind": self.kind,
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": active,
+                "queued": in_flight - active,
+                "saturation": round(active / self.max_workers, 3),
+                "queue_utilization": round((in_flight - active) / self.max_queue, 3) if self.max_queue else 0.0,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "peak_in_flight": self.peak_in_flight,
+                "mean_queue_wait_ms": round(self.queue_wait_ms.mean, 3),
+                "mean_run_ms": round(self.run_ms.mean, 3)
+            }
+
+    def prometheus_lines(self) -> List[str]:
+        """Pool gauges and counters, plus queue wait and run time histograms, in Prometheus text format"""
+        label = f'pool="{self.name}"'
+        lines = [f"readapt_executor_{name}{{{label}}} {value}"
+                 for name, value in self.stats().items() if name != "kind" and not name.startswith("mean_")]
+        if self.kind == "thread":
+            with self._lock:
+                lines.extend(self.queue_wait_ms.prometheus_lines("readapt_executor_queue_wait_ms", label))
+                lines.extend(self.run_ms.prometheus_lines("readapt_executor_run_ms", label))
+        return lines
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+# Server processes sharing this machine (uvicorn reads the same variable as its --workers default);
+# CPU-bound pools split the cores between them instead of each claiming all of them
+WEB_CONCURRENCY = max(1, _env_int("WEB_CONCURRENCY", 1))
+
+
+# Workload class -> (pool kind, default workers, default queue bound)
+#   ml                sklearn / compiled-forest scoring (NumPy releases the GIL for the heavy parts)
+#   adaptation        single-document adaptation, annotations and TL;DR
+#   adaptation_batch  batch adaptation across processes (pure-Python work that holds the GIL)
+#   ocr               Tesseract runs as a single-threaded subprocess, so threads overlap fully; one per core
+#   http              blocking outbound HTTP (Gemini)
+#   crypto            bcrypt password hashing and verification
+#   maintenance       rare admin work such as model reloads, kept apart from request-serving pools
+#   shadow            scoring candidate models on live traffic; small on purpose so it sheds instead of competing
+POOL_DEFAULTS = {
+    "ml": ("thread", 2, 512),
+    "adaptation": ("thread", 4, 256),
+    "adaptation_batch": ("process", _env_int("ADAPTATION_BATCH_WORKERS", CPU_COUNT), 4096),
+    "ocr": ("thread", max(1, CPU_COUNT // WEB_CONCURRENCY), 32),
+    "http": ("thread", 16, 256),
+    "crypto": ("thread", 2, 128),
+    "maintenance": ("thread", 1, 8),
+    "shadow": ("thread", 1, 64),
+}
+
+
+def _build_executors() -> Dict[str, BoundedExecutor]:
+    """One pool per workload class, sized by EXECUTOR_<NAME>_WORKERS / EXECUTOR_<NAME>_QUEUE"""
+    pools = {}
+    for name, (kind, workers, queue) in POOL_DEFAULTS.items():
+        prefix = f"EXECUTOR_{name.upper()}"
+        pools[name] = BoundedExecutor(
+            name, kind,
+            max_workers=_env_int(f"{prefix}_WORKERS", workers),
+            max_queue=_env_int(f"{prefix}_QUEUE", queue)
+        )
+    return pools
+
+
+executors = _build_executors()
+ml_executor = executors["ml"]
+adaptation_executor = executors["adaptation"]
+adaptation_batch_executor = executors["adaptation_batch"]
+ocr_executor = executors["ocr"]
+http_executor = executors["http"]
+crypto_executor = executors["crypto"]
+maintenance_executor = executors["maintenance"]
+shadow_executor = executors["shadow"]
+
+
+def shutdown_executors(wait: bool = True):
+    for executor in executors.values():
+        executor.shutdown(wait=wait)
@@ -0,0 +1,279 @@
+import json
+import os
+import shutil
+import warnings
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+# Rows per traversal chunk in batch scoring; bounds the (rows, trees, classes) leaf buffer
+BATCH_CHUNK_ROWS = 4096
+# Single rows decide every split at once while the forest has at most this many nodes per
+# (tree, level) step; larger forests walk level by level, touching one node per tree per step
+WHOLE_FOREST_NODES_PER_STEP = 12
+# On-disk layout: one .npy per node array plus forest.json, so workers can map them read-only
+FOREST_ARRAYS = ("feature", "threshold", "left", "right", "value", "roots", "children", "classes")
+FOREST_FORMAT = 2
+
+
+class CompiledForest:
+    """A fitted RandomForestClassifier flattened into NumPy node arrays
+
+    Every tree's nodes are concatenated into one set of arrays:
+        feature    split feature per node
+        threshold  split threshold per node (go left when x[feature] <= threshold)
+        left       left child per node (global index)
+        right      right child per node (global index)
+        value      class probabilities per node, normalised as sklearn's predict_proba does
+    Leaves point to themselves, so every row can take exactly max_depth steps
+    and end on its leaf without per-tree bookkeeping. Probabilities are summed
+    over trees in estimator order and divided by the tree count, matching
+    sklearn's accumulation.
+
+    The arrays may be read-only memory maps (see load_compiled_forest); they
+    are never written after construction.
+    """
+
+    __slots__ = (
+        "feature", "threshold", "left", "right", "value", "roots",
+        "max_depth", "classes_", "n_features_in_", "_children", "_whole_forest_single"
+    )
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, max_depth: int, classes: np.ndarray, n_features: int,
+                 children: Optional[np.ndarray] = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        # The source model's input width: features the trees never split on still have to be sent
+        self.n_features_in_ = n_features
+        # children[2 * node + went_left] -> next node
+        self._children = np.stack([right, left], axis=1).ravel() if children is None else children
+        self._whole_forest_single = len(feature) <= WHOLE_FOREST_NODES_PER_STEP * len(roots) * max(max_depth, 1)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities, identical to the source model's predict_proba"""
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected a 2D array with {self.n_features_in_} features, got shape {X.shape}")
+        if not np.isfinite(X).all():
+            raise ValueError("Input contains NaN or infinity")
+
+        if X.shape[0] == 1 and self._whole_forest_single:
+            return self._predict_one(X[0])[np.newaxis, :]
+
+        proba = np.empty((X.shape[0], len(self.classes_)))
+        for start in range(0, X.shape[0], BATCH_CHUNK_ROWS):
+            chunk = X[start:start + BATCH_CHUNK_ROWS]
+            proba[start:start + len(chunk)] = self._predict_batch(chunk)
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def _predict_one(self, x: np.ndarray) -> np.ndarray:
+        """Single row: decide every split once, then hop max_depth times from all roots together
+
+        For one row of a small forest, a whole-forest comparison is a couple of
+        vectorized ops, whereas walking level by level pays NumPy call overhead
+        several times per level.
+        """
+        went_left = x[self.feature] <= self.threshold
+        next_node = np.where(went_left, self.left, self.right)
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            nodes = next_node[nodes]
+        return self.value[nodes].sum(axis=0) / len(nodes)
+
+    def _predict_batch(self, X: np.ndarray) -> np.ndarray:
+        """Many rows: advance a (rows, trees) frontier one level per step"""
+        n_rows, n_features = X.shape
+        flat_x = X.ravel()
+        row_offsets = (np.arange(n_rows) * n_features)[:, np.newaxis]
+        nodes = np.repeat(self.roots[np.newaxis, :], n_rows, axis=0)
+        feature, threshold, children = self.feature, self.threshold, self._children
+        for _ in range(self.max_depth):
+            went_left = flat_x.take(row_offsets + feature.take(nodes)) <= threshold.take(nodes)
+            nodes = children.take(2 * nodes + went_left)
+        return self.value.take(nodes, axis=0).sum(axis=1) / nodes.shape[1]
+
+
+def compile_forest(model) -> CompiledForest:
+    """Flatten a fitted sklearn forest classifier (single output) into a CompiledForest"""
+    estimators = getattr(model, "estimators_", None)
+    if not estimators:
+        raise ValueError("Model is not a fitted tree ensemble")
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise ValueError("Only single-output forests can be compiled")
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count, dtype=np.intp)
+        is_leaf = tree.children_left == -1
+
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold).astype(np.float64))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left).astype(np.intp) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right).astype(np.intp) + offset)
+
+        # Same normalisation as DecisionTreeClassifier.predict_proba
+        counts = tree.value[:, 0, :].astype(np.float64)
+        normalizer = counts.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(counts / normalizer)
+
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    return CompiledForest(
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        left=np.concatenate(lefts),
+        right=np.concatenate(rights),
+        value=np.ascontiguousarray(np.concatenate(values)),
+        roots=np.asarray(roots, dtype=np.intp),
+        max_depth=max_depth,
+        classes=np.asarray(model.classes_),
+        n_features=int(model.n_features_in_)
+    )
+
+
+def save_compiled_forest(compiled: CompiledForest, directory: str, metadata: Optional[Dict[str, Any]] = None):
+    """Write the node arrays as .npy files plus forest.json, replacing directory atomically
+
+    The arrays are written to a sibling temporary directory first, so a reader
+    never maps a half-written artifact. Processes that already mapped the old
+    files keep them until they reload.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    arrays = {
+        "feature": compiled.feature, "threshold": compiled.threshold, "left": compiled.left,
+        "right": compiled.right, "value": compiled.value, "roots": compiled.roots,
+        "children": compiled._children, "classes": compiled.classes_
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+    info = dict(metadata or {})
+    info.update({
+        "format": FOREST_FORMAT,
+        "max_depth": compiled.max_depth,
+        "n_features": compiled.n_features_in_,
+        "n_trees": compiled.n_trees,
+        "n_nodes": compiled.n_nodes
+    })
+    with open(os.path.join(staging, "forest.json"), "w") as f:
+        json.dump(info, f, indent=2)
+
+    retired = f"{directory}.old-{os.getpid()}"
+    if os.path.exists(directory):
+        os.rename(directory, retired)
+    os.rename(staging, directory)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def load_compiled_forest(directory: str, mmap_mode: Optional[str] = "r") -> Tuple[CompiledForest, Dict[str, Any]]:
+    """Load a forest written by save_compiled_forest, plus its forest.json metadata
+
+    With mmap_mode="r" (the default) the arrays are read-only views of the page
+    cache: every process mapping the same files shares one physical copy, and
+    nothing is parsed or copied at startup.
+    """
+    with open(os.path.join(directory, "forest.json")) as f:
+        info = json.load(f)
+    if info.get("format") != FOREST_FORMAT:
+        raise ValueError(f"Unsupported forest format {info.get('format')} in {directory}")
+
+    arrays = {}
+    for name in FOREST_ARRAYS:
+        array = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+        # Plain ndarray views: indexing a np.memmap would wrap every temporary result
+        arrays[name] = array.view(np.ndarray) if isinstance(array, np.memmap) else array
+
+    n_nodes = len(arrays["feature"])
+    if any(len(arrays[name]) != n_nodes for name in ("threshold", "left", "right", "value")) \
+            or len(arrays["children"]) != 2 * n_nodes or n_nodes != info["n_nodes"]:
+        raise ValueError(f"Inconsistent node arrays in {directory}")
+
+    compiled = CompiledForest(
+        feature=arrays["feature"],
+        threshold=arrays["threshold"],
+        left=arrays["left"],
+        right=arrays["right"],
+        value=arrays["value"],
+        roots=arrays["roots"],
+        max_depth=int(info["max_depth"]),
+        classes=arrays["classes"],
+        n_features=int(info["n_features"]),
+        children=arrays["children"]
+    )
+    return compiled, info
+
+
+def probe_inputs(compiled: CompiledForest, n_rows: int = 512, seed: int = 0) -> np.ndarray:
+    """Random rows spanning each feature's split thresholds, plus the thresholds themselves
+
+    Rows landing exactly on a threshold exercise the <= boundary and the float32 cast.
+    """
+    rng = np.random.default_rng(seed)
+    n_features = compiled.n_features_in_
+    low = np.zeros(n_features)
+    high = np.ones(n_features)
+    for feature in range(n_features):
+        split_thresholds = compiled.threshold[
+            (compiled.feature == feature) & (compiled.left != np.arange(compiled.n_nodes))
+        ]
+        if len(split_thresholds):
+            margin = max(1.0, np.ptp(split_thresholds)) * 0.1
+            low[feature] = split_thresholds.min() - margin
+            high[feature] = split_thresholds.max() + margin
+
+    rows = rng.uniform(low, high, size=(n_rows, n_features))
+    on_threshold = rows[: n_rows // 4]
+    split_nodes = np.flatnonzero(compiled.left != np.arange(compiled.n_nodes))
+    if len(split_nodes):
+        picked = rng.choice(split_nodes, size=len(on_threshold))
+        on_threshold[np.arange(len(picked)), compiled.feature[picked]] = compiled.threshold[picked]
+    return rows
+
+
+def verify_compiled_forest(model, compiled: CompiledForest, X: Optional[np.ndarray] = None) -> float:
+    """Largest absolute probability difference from sklearn on X (default: probe_inputs)
+
+    Checks both the batch path and the single-row path; 0.0 means identical.
+    """
+    if X is None:
+        X = probe_inputs(compiled)
+    with warnings.catch_warnings():
+        # Models fitted on DataFrames warn about ndarray input; the values are what is compared
+        warnings.simplefilter("ignore", UserWarning)
+        expected = model.predict_proba(np.asarray(X, dtype=np.float64))
+    batch = compiled.predict_proba(X)
+    single = np.vstack([compiled.predict_proba(row[np.newaxis, :]) for row in X[:64]])
+    if not np.array_equal(model.classes_, compiled.classes_):
+        return float("inf")
+    return float(max(
+        np.abs(batch - expected).max(initial=0.0),
+        np.abs(single - expected[:64]).max(initial=0.0)
+    ))
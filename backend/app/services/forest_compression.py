@@ -0,0 +1,124 @@
+import copy
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+TREE_LEAF = -1
+TREE_UNDEFINED = -2
+
+
+def _node_depths(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Depth of every node; sklearn numbers children after their parent"""
+    depth = np.zeros(len(left), dtype=np.intp)
+    for node in range(len(left)):
+        if left[node] != TREE_LEAF:
+            depth[left[node]] = depth[right[node]] = depth[node] + 1
+    return depth
+
+
+def prune_tree(tree, max_depth: Optional[int] = None, merge_leaves: bool = False):
+    """A new sklearn Tree with subtrees below max_depth collapsed and same-class sibling leaves merged
+
+    A collapsed node becomes a leaf predicting its own class counts, which
+    sklearn already stores for every internal node, so the result is the tree
+    that training with that depth limit (or without those splits) would have
+    grown. Merging only removes splits whose two leaves vote for the same
+    class, so each tree's hard vote is unchanged; the forest's averaged
+    probabilities shift slightly. Unreachable nodes are dropped and the rest
+    renumbered in preorder, as sklearn's builder numbers them.
+    """
+    state = tree.__getstate__()
+    nodes, values = state["nodes"], state["values"]
+    left, right = nodes["left_child"], nodes["right_child"]
+
+    is_leaf = left == TREE_LEAF
+    if max_depth is not None:
+        is_leaf = is_leaf | (_node_depths(left, right) >= max_depth)
+    if merge_leaves:
+        is_leaf = is_leaf.copy()
+        predicted = values[:, 0, :].argmax(axis=1)
+        # Children come after parents, so a reverse scan merges bottom-up and cascades
+        for node in range(len(nodes) - 1, -1, -1):
+            if not is_leaf[node] and is_leaf[left[node]] and is_leaf[right[node]] \
+                    and predicted[left[node]] == predicted[right[node]]:
+                is_leaf[node] = True
+
+    kept, depths, stack = [], [], [(0, 0)]
+    while stack:
+        node, depth = stack.pop()
+        kept.append(node)
+        depths.append(depth)
+        if not is_leaf[node]:
+            stack.append((right[node], depth + 1))
+            stack.append((left[node], depth + 1))
+    kept = np.asarray(kept, dtype=np.intp)
+    new_id = np.full(len(nodes), TREE_LEAF, dtype=np.intp)
+    new_id[kept] = np.arange(len(kept))
+
+    new_nodes = nodes[kept].copy()
+    kept_leaf = is_leaf[kept]
+    new_nodes["left_child"] = np.where(kept_leaf, TREE_LEAF, new_id[left[kept]])
+    new_nodes["right_child"] = np.where(kept_leaf, TREE_LEAF, new_id[right[kept]])
+    new_nodes["feature"] = np.where(kept_leaf, TREE_UNDEFINED, new_nodes["feature"])
+    new_nodes["threshold"] = np.where(kept_leaf, float(TREE_UNDEFINED), new_nodes["threshold"])
+    if "missing_go_to_left" in new_nodes.dtype.names:
+        new_nodes["missing_go_to_left"] = np.where(kept_leaf, 0, new_nodes["missing_go_to_left"])
+
+    pruned = type(tree)(*tree.__reduce__()[1])
+    pruned.__setstate__({
+        "max_depth": int(max(depths)),
+        "node_count": len(kept),
+        "nodes": new_nodes,
+        "values": np.ascontiguousarray(values[kept])
+    })
+    return pruned
+
+
+def compress_forest(model, n_trees: Optional[int] = None, max_depth: Optional[int] = None,
+                    merge_leaves: bool = False):
+    """A smaller copy of a fitted forest: its first n_trees trees, depth-limited and leaf-merged
+
+    Trees of a random forest are identically distributed, so the first n_trees
+    are as good a subset as any. The source model is not modified.
+    """
+    estimators = model.estimators_[:n_trees] if n_trees else list(model.estimators_)
+    compressed_estimators = []
+    for estimator in estimators:
+        compressed = copy.copy(estimator)
+        if max_depth is not None or merge_leaves:
+            compressed.tree_ = prune_tree(estimator.tree_, max_depth, merge_leaves)
+        compressed_estimators.append(compressed)
+
+    forest = copy.copy(model)
+    forest.estimators_ = compressed_estimators
+    forest.n_estimators = len(compressed_estimators)
+    return forest
+
+
+def compression_grid(model, depths: Sequence[Optional[int]] = (None, 12, 10, 8, 6, 4),
+                     tree_fractions: Sequence[float] = (1.0, 0.5, 0.25, 0.1), min_trees: int = 5) -> List[Dict]:
+    """Compression settings worth trying for a fitted forest (depths below its own depth only)"""
+    n_trees = len(model.estimators_)
+    model_depth = max(estimator.tree_.max_depth for estimator in model.estimators_)
+    tree_counts = sorted({max(min_trees, int(round(n_trees * fraction))) for fraction in tree_fractions
+                          if n_trees * fraction >= min_trees or fraction == 1.0}, reverse=True)
+    depth_limits = [depth for depth in depths if depth is None or depth < model_depth]
+    return [
+        {"n_trees": count, "max_depth": depth, "merge_leaves": merge}
+        for count in tree_counts for depth in depth_limits for merge in (False, True)
+    ]
+
+
+def pareto_front(candidates: List[Dict], objectives: Sequence[Tuple[str, str]]) -> List[int]:
+    """Indices of candidates no other candidate beats on every objective
+
+    objectives are (key, "max" | "min") pairs, e.g. accuracy up, latency and size down.
+    """
+    signs = [1.0 if direction == "max" else -1.0 for _, direction in objectives]
+    scores = np.array([[sign * candidate[key] for (key, _), sign in zip(objectives, signs)]
+                       for candidate in candidates])
+    front = []
+    for index, score in enumerate(scores):
+        dominated = np.any(np.all(scores >= score, axis=1) & np.any(scores > score, axis=1))
+        if not dominated:
+            front.append(index)
+    return front
@@ -2,6 +2,9 @@ import os
 import requests
 from typing import Dict, Any, Optional
 import logging
+from app.services.executors import http_executor
+from app.services.summarizer import summarizer
+from app.services.text_analysis import analyze_text
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +46,9 @@ class GeminiService:
                 "Content-Type": "application/json"
             }
             
-            response = requests.post(
+            # requests blocks; a saturated http pool raises and falls back to the local summary
+            response = await http_executor.run(
+                requests.post,
                 f"{self.base_url}?key={self.api_key}",
                 json=payload,
                 headers=headers,
@@ -73,34 +78,26 @@ class GeminiService:
             return self._fallback_summary(text, max_length)
     
     def _fallback_summary(self, text: str, max_length: int) -> Dict[str, Any]:
-        """Fallback summary generation using simple text processing"""
-        sentences = text.split('. ')
+        """Fallback summary generation with the local extractive summarizer"""
+        analysis = analyze_text(text)
         
-        # Take first few sentences up to max_length words
-        summary_sentences = []
-        word_count = 0
-        
-        for sentence in sentences:
-            sentence_words = len(sentence.split())
-            if word_count + sentence_words <= max_length:
-                summary_sentences.append(sentence)
-                word_count += sentence_words
-            else:
-                break
+        # Take the highest ranked sentences that fit in max_length words
+        selected = summarizer.select(analysis, max_words=max_length)
+        summary_sentences = [analysis.sentence_texts()[index] for index in selected]
+        word_count = sum(analysis.sentence_word_count(index) for index in selected)
         
         if not summary_sentences:
             # If no complete sentences fit, take first max_length words
-            words = text.split()[:max_length]
-            summary = ' '.join(words) + '...'
+            word_count = min(max_length, analysis.word_count)
+            summary = ' '.join(analysis.word(i) for i in range(word_count)) + '...'
         else:
-            summary = '. '.join(summary_sentences)
-            if not summary.endswith('.'):
-                summary += '.'
+            # Sentences keep their own terminal punctuation
+            summary = ' '.join(summary_sentences)
         
         return {
             "success": True,
             "summary": summary,
-            "word_count": len(summary.split()),
+            "word_count": word_count,
             "source": "fallback"
         }
     
@@ -139,7 +136,9 @@ class GeminiService:
                 "Content-Type": "application/json"
             }
             
-            response = requests.post(
+            # requests blocks; a saturated http pool raises and falls back to the local summary
+            response = await http_executor.run(
+                requests.post,
                 f"{self.base_url}?key={self.api_key}",
                 json=payload,
                 headers=headers,
@@ -165,17 +164,17 @@ class GeminiService:
     
     def _fallback_adhd_summary(self, text: str) -> Dict[str, Any]:
         """Fallback ADHD summary with bullet points"""
-        sentences = text.split('. ')[:5]  # Take first 5 sentences
+        analysis = analyze_text(text)
         
         bullet_points = []
-        for i, sentence in enumerate(sentences):
-            if sentence.strip():
-                # Keep sentences short (max 15 words)
-                words = sentence.split()[:15]
-                bullet_point = '• ' + ' '.join(words)
-                if not bullet_point.endswith('.'):
-                    bullet_point += '.'
-                bullet_points.append(bullet_point)
+        for index in summarizer.select(analysis, max_sentences=5):  # Take the 5 key sentences
+            first, end = analysis.sentences[index]
+            # Keep sentences short (max 15 words)
+            words = ' '.join(analysis.word(i) for i in range(first, min(end, first + 15)))
+            bullet_point = '• ' + words
+            if not bullet_point.endswith(('.', '!', '?')):
+                bullet_point += '.'
+            bullet_points.append(bullet_point)
         
         summary = '\n'.join(bullet_points)
         
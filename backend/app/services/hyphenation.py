@@ -0,0 +1,120 @@
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Tuple
+
+DEFAULT_PATTERNS_PATH = os.path.join(os.path.dirname(__file__), "data", "hyph_en_US.dic")
+
+# Leading punctuation, the hyphenatable core (letters and apostrophes), trailing punctuation
+WORD_PARTS = re.compile(r"^([^\w']*)([\w']*?)([^\w']*)$", re.UNICODE)
+POINTS_KEY = ""  # trie nodes keep their pattern's inter-letter values under this key
+
+
+class Hyphenator:
+    """Liang/TeX pattern hyphenation with a pattern trie and a per-word LRU cache"""
+
+    def __init__(self, patterns_path: str = DEFAULT_PATTERNS_PATH, cache_size: int = 65536):
+        self.left_min = 2
+        self.right_min = 3
+        self.pattern_count = 0
+        self.trie: Dict[str, dict] = {}
+        self._load_patterns(patterns_path)
+        self.syllables = lru_cache(maxsize=cache_size)(self._syllables_uncached)
+
+    def _load_patterns(self, patterns_path: str):
+        """Parse a hunspell/libhyphen .dic pattern file into the trie"""
+        interned: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+        with open(patterns_path, encoding="utf-8") as patterns_file:
+            for line in patterns_file:
+                line = line.strip()
+                if not line or line.startswith("%") or line == "UTF-8":
+                    continue
+                if line.startswith("LEFTHYPHENMIN"):
+                    self.left_min = int(line.split()[1])
+                    continue
+                if line.startswith("RIGHTHYPHENMIN"):
+                    self.right_min = int(line.split()[1])
+                    continue
+                if line[0].isupper() and " " in line:
+                    continue  # other libhyphen directives (COMPOUND*, NEXTLEVEL)
+
+                letters = re.sub(r"\d", "", line)
+                points = [0] * (len(letters) + 1)
+                position = 0
+                for char in line:
+                    if char.isdigit():
+                        points[position] = int(char)
+                    else:
+                        position += 1
+
+                node = self.trie
+                for char in letters:
+                    node = node.setdefault(char, {})
+                # Many patterns share the same value vector; store each once
+                points_tuple = tuple(points)
+                node[POINTS_KEY] = interned.setdefault(points_tuple, points_tuple)
+                self.pattern_count += 1
+
+    def hyphenate_positions(self, word: str) -> list:
+        """Offsets inside word (letters only) where a hyphen may be inserted"""
+        length = len(word)
+        if length < self.left_min + self.right_min:
+            return []
+
+        padded = "." + word.lower() + "."
+        points = [0] * (len(padded) + 1)
+        trie = self.trie
+        for start in range(len(padded)):
+            node = trie
+            for char in padded[start:]:
+                node = node.get(char)
+                if node is None:
+                    break
+                pattern_points = node.get(POINTS_KEY)
+                if pattern_points:
+                    for offset, value in enumerate(pattern_points):
+                        if value > points[start + offset]:
+                            points[start + offset] = value
+
+        # points[i + 1] is the value between word[i - 1] and word[i] (offset for the leading ".")
+        return [
+            i for i in range(self.left_min, length - self.right_min + 1)
+            if points[i + 1] % 2
+        ]
+
+    def _syllables_uncached(self, word: str) -> Tuple[str, ...]:
+        """Split a token into syllables, keeping surrounding punctuation attached"""
+        match = WORD_PARTS.match(word)
+        if match is None:
+            return (word,)
+
+        prefix, core, suffix = match.groups()
+        positions = self.hyphenate_positions(core) if core.replace("'", "").isalpha() else []
+        if not positions:
+            return (word,)
+
+        pieces = []
+        previous = 0
+        for position in positions:
+            pieces.append(core[previous:position])
+            previous = position
+        pieces.append(core[previous:])
+        pieces[0] = prefix + pieces[0]
+        pieces[-1] = pieces[-1] + suffix
+        return tuple(pieces)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Memoization counters for monitoring"""
+        info = self.syllables.cache_info()
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize
+        }
+
+
+hyphenator = Hyphenator(
+    os.getenv("HYPHENATION_PATTERNS_PATH", DEFAULT_PATTERNS_PATH),
+    cache_size=int(os.getenv("HYPHENATION_CACHE_SIZE", 65536))
+)
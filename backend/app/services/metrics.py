@@ -0,0 +1,40 @@
+from bisect import bisect_left
+from typing import List, Sequence, Tuple
+
+
+class Histogram:
+    """Fixed-bucket histogram in Prometheus form (cumulative counts per upper bound)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        result = []
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def prometheus_lines(self, metric: str, labels: str) -> List[str]:
+        """_bucket, _sum and _count series for labels such as 'model="adhd"'"""
+        lines = [f'{metric}_bucket{{{labels},le="{bound}"}} {count}' for bound, count in self.cumulative()]
+        lines.append(f"{metric}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{metric}_count{{{labels}}} {self.count}")
+        return lines
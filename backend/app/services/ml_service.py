@@ -1,107 +1,413 @@
 import joblib
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-import pandas as pd
 import os
+import threading
+import time
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.services import model_registry
+from app.services.drift_stats import DriftStats
+from app.services.forest_compiler import CompiledForest, compile_forest, probe_inputs, verify_compiled_forest
+from app.services.model_artifacts import (
+    DEMO_MODELS_DIR, MODEL_NAMES, MODELS_DIR, has_models, load_forest, model_path, train_demo_models
+)
+
+DYSLEXIA_FEATURES = 2   # speed, survey_score
+ADHD_FEATURES = 18      # Q1_1..Q1_9 (hyperactivity), Q2_1..Q2_9 (inattention)
+MAX_BATCH_ROWS = int(os.getenv("PREDICTION_BATCH_MAX_ROWS", 10000))
+# Score with flattened node arrays instead of scikit-learn for rows up to ML_COMPILED_MAX_ROWS;
+# larger batches amortise scikit-learn's per-call overhead and use its compiled tree walk
+COMPILED_INFERENCE = os.getenv("ML_COMPILED_INFERENCE", "true").lower() == "true"
+COMPILED_MAX_ROWS = int(os.getenv("ML_COMPILED_MAX_ROWS", 256))
+# Map pre-built node arrays (models/compiled/<name>/*.npy) read-only instead of unpickling at startup;
+# all workers then share one physical copy and scikit-learn is only loaded for large batches
+MMAP_MODELS = os.getenv("ML_MMAP_MODELS", "true").lower() == "true"
+
+# Real dataset mapping: 0=severe, 1=mild, 2=no dyslexia
+DYSLEXIA_PRESETS = {
+    0: "severe",    # heavy spacing, highlight dyslexic letters, TTS
+    1: "mild",      # moderate spacing, moderate interline spacing
+    2: "normal"     # normal reading mode
+}
+
+DYSLEXIA_DESCRIPTIONS = {
+    0: "Severe dyslexia detected - Heavy adaptations recommended",
+    1: "Mild dyslexia detected - Moderate adaptations recommended",
+    2: "No dyslexia detected - Normal reading mode"
+}
+
+# Real dataset mapping: 0=No ADHD, 1=Inattentive, 2=Hyperactive, 3=Severe
+ADHD_PRESETS = {
+    0: "normal",        # normal text display
+    1: "inattentive",   # highlight every 3rd word
+    2: "hyperactive",   # chunk sentences + highlight + TL;DR
+    3: "severe"         # chunk + highlight + TTS + TL;DR
+}
+
+ADHD_DESCRIPTIONS = {
+    0: "No ADHD detected - Normal text display",
+    1: "Inattentive type ADHD - Focus enhancement recommended",
+    2: "Hyperactive-Impulsive type ADHD - Text chunking recommended",
+    3: "Severe ADHD - Full accessibility features recommended"
+}
+
+MODEL_FEATURES = {"dyslexia": DYSLEXIA_FEATURES, "adhd": ADHD_FEATURES}
+MODEL_PRESETS = {"dyslexia": DYSLEXIA_PRESETS, "adhd": ADHD_PRESETS}
+
+# Expected input ranges for the drift histograms: (feature, low, high) per model and bins per feature.
+# ADHD answers are 0-3, so four bins give one per answer.
+DRIFT_FEATURES = {
+    "dyslexia": ([("speed", 0.0, 1.0), ("survey_score", 0.0, 1.0)], 20),
+    "adhd": ([(f"Q{part}_{question}", 0.0, 3.0) for part in (1, 2) for question in range(1, 10)], 4)
+}
+
+class LoadedModel:
+    """One model version as served: its compiled forest plus the scikit-learn forest, unpickled on first use
+
+    MLService swaps whole LoadedModel objects, so a request that picked one up
+    finishes on it even if a newer version goes live meanwhile.
+    """
+
+    __slots__ = ("name", "version", "path", "forest", "metadata", "_model", "_lock")
+
+    def __init__(self, name: str, path: str, forest: Optional[CompiledForest] = None, model=None,
+                 version: Optional[str] = None, metadata: Optional[Dict] = None):
+        self.name = name
+        self.path = path
+        self.forest = forest
+        self.version = version
+        self.metadata = metadata or {}
+        self._model = model
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = joblib.load(self.path)
+        return self._model
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return self.forest.classes_ if self.forest is not None else self.model.classes_
+
+    def info(self) -> Dict:
+        return {
+            "version": self.version,
+            "source": self.path,
+            "compiled": self.forest is not None,
+            "sklearn_loaded": self._model is not None,
+            "metadata": self.metadata
+        }
+
 
 class MLService:
     def __init__(self):
-        self.dyslexia_model = None
-        self.adhd_model = None
+        # Replaced as a whole on (re)load; readers take one snapshot per request
+        self._active: Dict[str, LoadedModel] = {}
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        # Inputs and outputs of live scoring, across model versions
+        self.drift = {
+            name: DriftStats(name, features, n_bins, len(MODEL_PRESETS[name]))
+            for name, (features, n_bins) in DRIFT_FEATURES.items()
+        }
         self.load_models()
     
+    @property
+    def dyslexia_model(self):
+        return self._active["dyslexia"].model
+
+    @property
+    def adhd_model(self):
+        return self._active["adhd"].model
+
+    @property
+    def dyslexia_forest(self) -> Optional[CompiledForest]:
+        return self._active["dyslexia"].forest
+
+    @property
+    def adhd_forest(self) -> Optional[CompiledForest]:
+        return self._active["adhd"].forest
+
     def load_models(self):
-        """Load trained models or create dummy ones for demo"""
-        try:
-            self.dyslexia_model = joblib.load("models/dyslexia_model.pkl")
-            self.adhd_model = joblib.load("models/adhd_model.pkl")
-            print("Real trained models loaded successfully")
-        except FileNotFoundError:
-            print("Model files not found, creating dummy models for demo")
-            self.create_dummy_models()
-        except Exception as e:
-            print(f"Error loading models: {e}, using dummy models")
-            self.create_dummy_models()
+        """Load the registry's live versions, else the trained models, else the pre-built demo models
+
+        Nothing is built here: the compiled arrays and demo models come from the
+        build step (python train_kaggle_models.py --artifacts-only / --demo), so
+        starting workers never wait on each other.
+        """
+        if all(model_registry.current_version(name) for name in MODEL_NAMES):
+            try:
+                self._active = {name: self._load_version(name, model_registry.current_version(name)) for name in MODEL_NAMES}
+                print("Registry models loaded: " + ", ".join(f"{name} {loaded.version}" for name, loaded in self._active.items()))
+                return
+            except Exception as e:
+                print(f"Error loading registry models: {e}, falling back to {MODELS_DIR}")
+
+        for directory, description in ((MODELS_DIR, "Real trained models"), (DEMO_MODELS_DIR, "Demo models")):
+            if not has_models(directory):
+                print(f"No models in {directory}")
+                continue
+            try:
+                self._load_from(directory)
+                print(f"{description} loaded from {directory}")
+                return
+            except Exception as e:
+                print(f"Error loading models from {directory}: {e}")
+        self.create_dummy_models()
+
+    def _load_model(self, name: str, directory: str, version: Optional[str] = None,
+                    metadata: Optional[Dict] = None) -> LoadedModel:
+        """Map a model's compiled node arrays, or unpickle and compile it when they are missing or stale"""
+        path = model_path(directory, name)
+        forest = load_forest(directory, name) if COMPILED_INFERENCE and MMAP_MODELS else None
+        model = None
+        if forest is None:
+            model = joblib.load(path)
+            forest = self._compile(model, name)
+        return LoadedModel(name, path, forest, model, version, metadata)
+
+    def _load_version(self, name: str, version: str) -> LoadedModel:
+        metadata = model_registry.verify_version(name, version)
+        return self._load_model(name, model_registry.version_dir(name, version), version, metadata)
+
+    def _load_from(self, directory: str):
+        self._active = {name: self._load_model(name, directory) for name in MODEL_NAMES}
     
     def create_dummy_models(self):
-        """Create dummy models for demonstration"""
-        # Dummy dyslexia model
-        X_dyslexia = np.random.rand(1000, 2)  # speed, survey_score
-        y_dyslexia = np.random.randint(0, 3, 1000)  # 0,1,2 severity
-        self.dyslexia_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.dyslexia_model.fit(X_dyslexia, y_dyslexia)
+        """Last resort when no model loads from disk: throwaway demo forests, in memory for this worker only"""
+        print("No usable models on disk; build them with python train_kaggle_models.py --demo. "
+              "Training demo models in memory for this worker")
+        self._active = {
+            name: LoadedModel(name, "", self._compile(model, name), model)
+            for name, model in zip(MODEL_NAMES, train_demo_models())
+        }
+
+    def reload_model(self, name: str, version: Optional[str] = None) -> Dict:
+        """Load a registry version (default: the live one), validate and warm it up, then swap it in
         
-        # Dummy ADHD model
-        X_adhd = np.random.rand(1000, 18)  # 18 questionnaire responses
-        y_adhd = np.random.randint(0, 4, 1000)  # 0,1,2,3 types
-        self.adhd_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.adhd_model.fit(X_adhd, y_adhd)
+        Blocking; run it off the event loop. Requests already scoring keep the
+        previous version until they finish. On any failure the current version
+        stays in place and the error is raised.
+        """
+        if name not in MODEL_NAMES:
+            raise ValueError(f"Unknown model '{name}'")
+        version = version or model_registry.current_version(name)
+        if version is None:
+            raise FileNotFoundError(f"No live {name} version in the model registry")
+
+        with self._reload_lock:
+            loaded = self.load_version(name, version)
+            previous = self._active.get(name)
+            self._active = {**self._active, name: loaded}
+        print(f"{name} model {previous.version if previous else None} -> {version}")
+        return loaded.info()
     
-    def predict_dyslexia(self, speed: float, survey_score: float):
-        """Predict dyslexia severity based on real dataset patterns"""
-        features = np.array([[speed, survey_score]])
-        prediction = self.dyslexia_model.predict(features)[0]
-        confidence = max(self.dyslexia_model.predict_proba(features)[0])
+    def load_version(self, name: str, version: str) -> LoadedModel:
+        """A registry version, validated and warmed up but not serving; blocking"""
+        loaded = self._load_version(name, version)
+        self._warm_up(loaded)
+        return loaded
+
+    def _warm_up(self, loaded: LoadedModel):
+        """Reject a version that does not fit the API, and page in its arrays before it serves traffic"""
+        n_features = MODEL_FEATURES[loaded.name]
+        if loaded.metadata.get("n_features", n_features) != n_features:
+            raise ValueError(f"{loaded.name} model expects {loaded.metadata['n_features']} features, the API sends {n_features}")
+        unknown = set(int(label) for label in loaded.classes_) - set(MODEL_PRESETS[loaded.name])
+        if unknown:
+            raise ValueError(f"{loaded.name} model predicts classes without a preset: {sorted(unknown)}")
         
-        # Real dataset mapping: 0=severe, 1=mild, 2=no dyslexia
-        presets = {
-            0: "severe",    # heavy spacing, highlight dyslexic letters, TTS
-            1: "mild",      # moderate spacing, moderate interline spacing  
-            2: "normal"     # normal reading mode
-        }
+        if loaded.forest is not None:
+            # Exactness against the pickle, on a throwaway unpickled copy unless one is already loaded
+            reference = loaded._model if loaded._model is not None else joblib.load(loaded.path)
+            difference = verify_compiled_forest(reference, loaded.forest)
+            if difference != 0.0:
+                raise ValueError(f"Compiled {loaded.name} model differs from scikit-learn by {difference}")
+            if loaded.forest.n_features_in_ != n_features:
+                raise ValueError(f"{loaded.name} model expects {loaded.forest.n_features_in_} features, the API sends {n_features}")
+            rows = probe_inputs(loaded.forest)
+            scorers = (loaded.forest, reference)
+        else:
+            rows = np.random.default_rng(0).uniform(0, 3, (512, n_features))
+            scorers = (loaded.model,)
         
-        descriptions = {
-            0: "Severe dyslexia detected - Heavy adaptations recommended",
-            1: "Mild dyslexia detected - Moderate adaptations recommended", 
-            2: "No dyslexia detected - Normal reading mode"
-        }
+        # Single rows and a batch through every scorer, which also pages in mapped arrays before the swap
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            for scorer in scorers:
+                for batch in (rows[:1], rows):
+                    probabilities = scorer.predict_proba(batch)
+                    if not np.isfinite(probabilities).all() or not np.allclose(probabilities.sum(axis=1), 1.0):
+                        raise ValueError(f"{loaded.name} model returned invalid probabilities")
+
+    def models_info(self) -> Dict[str, Dict]:
+        """Version and metadata of each live model"""
+        return {name: loaded.info() for name, loaded in self._active.items()}
+
+    def watch_registry(self, interval: float):
+        """Poll the registry's CURRENT markers and hot-reload models whose live version changed"""
+        if self._watcher is not None or interval <= 0:
+            return
         
+        def poll():
+            while True:
+                time.sleep(interval)
+                for name in MODEL_NAMES:
+                    version = model_registry.current_version(name)
+                    if version is None or version == self._active[name].version:
+                        continue
+                    try:
+                        self.reload_model(name, version)
+                    except Exception as e:
+                        print(f"Could not load {name} model {version}, keeping {self._active[name].version}: {e}")
+
+        self._watcher = threading.Thread(target=poll, name="model-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    @staticmethod
+    def _compile(model, name: str) -> Optional[CompiledForest]:
+        """Compile a model, keeping scikit-learn inference unless probabilities match exactly"""
+        if not COMPILED_INFERENCE:
+            return None
+        try:
+            compiled = compile_forest(model)
+            difference = verify_compiled_forest(model, compiled)
+        except Exception as e:
+            print(f"Could not compile {name} model: {e}, using scikit-learn inference")
+            return None
+        if difference != 0.0:
+            print(f"Compiled {name} model differs from scikit-learn by {difference}, using scikit-learn inference")
+            return None
+        return compiled
+
+    def live_model(self, name: str) -> LoadedModel:
+        """The version serving a model right now"""
+        return self._active[name]
+
+    def _classify(self, name: str, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        labels, confidences = self.score(self._active[name], features)
+        self.drift[name].observe(features, labels, confidences)
+        return labels, confidences
+
+    def drift_stats(self) -> Dict[str, Dict]:
+        """Input histograms and output class distribution of each model since startup"""
+        return {name: stats.snapshot(MODEL_PRESETS[name]) for name, stats in self.drift.items()}
+
+    def drift_prometheus_lines(self) -> List[str]:
+        lines = []
+        for name, stats in self.drift.items():
+            lines.extend(stats.prometheus_lines(MODEL_PRESETS[name]))
+        return lines
+
+    @staticmethod
+    def score(loaded: LoadedModel, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Class labels and confidences for every row from a single predict_proba pass
+
+        Equivalent to model.predict() (argmax over classes_) without walking the trees twice.
+        """
+        if loaded.forest is not None and len(features) <= COMPILED_MAX_ROWS:
+            scorer = loaded.forest
+        else:
+            scorer = loaded.model
+        if not len(features):
+            return scorer.classes_[:0], np.empty(0)
+        probabilities = scorer.predict_proba(features)
+        best = probabilities.argmax(axis=1)
+        return scorer.classes_[best], probabilities[np.arange(len(best)), best]
+
+    @staticmethod
+    def _feature_matrix(rows, n_features: int) -> np.ndarray:
+        """Validate rows into a float (n_rows, n_features) matrix"""
+        if not len(rows):
+            return np.empty((0, n_features))
+        try:
+            features = np.asarray(rows, dtype=np.float64)
+        except ValueError:
+            raise ValueError(f"Every row must have exactly {n_features} numeric values")
+        if features.ndim != 2 or features.shape[1] != n_features:
+            raise ValueError(f"Every row must have exactly {n_features} numeric values")
+        return features
+
+    def classify_dyslexia(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Labels and confidences for an (n, 2) speed/survey_score matrix"""
+        return self._classify("dyslexia", features)
+
+    def classify_adhd(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Labels and confidences for an (n, 18) questionnaire matrix"""
+        return self._classify("adhd", features)
+
+    def predict_dyslexia(self, speed: float, survey_score: float):
+        """Predict dyslexia severity based on real dataset patterns"""
+        features = np.array([[speed, survey_score]], dtype=np.float64)
+        labels, confidences = self.classify_dyslexia(features)
+        return self.dyslexia_result(int(labels[0]), float(confidences[0]), speed, survey_score)
+
+    @staticmethod
+    def dyslexia_result(prediction: int, confidence: float, speed: float, survey_score: float) -> Dict:
+        """Response payload for one dyslexia prediction"""
         return {
-            "severity": int(prediction),
-            "confidence": float(confidence),
-            "adaptation_preset": presets[prediction],
-            "description": descriptions[prediction],
+            "severity": prediction,
+            "confidence": confidence,
+            "adaptation_preset": DYSLEXIA_PRESETS[prediction],
+            "description": DYSLEXIA_DESCRIPTIONS[prediction],
             "reading_speed_score": float(speed),
             "comprehension_score": float(survey_score)
         }
     
+    def predict_dyslexia_batch(self, speeds: Sequence[float], survey_scores: Sequence[float]) -> Dict[str, list]:
+        """Score many screenings with one vectorized predict_proba; results are columnar"""
+        if len(speeds) != len(survey_scores):
+            raise ValueError("speed and survey_score must have the same length")
+        features = self._feature_matrix(np.column_stack([speeds, survey_scores]), DYSLEXIA_FEATURES)
+        labels, confidences = self.classify_dyslexia(features)
+        labels = labels.tolist()
+
+        return {
+            "severity": labels,
+            "confidence": confidences.tolist(),
+            "adaptation_preset": [DYSLEXIA_PRESETS[label] for label in labels]
+        }
+
     def predict_adhd(self, q1_responses: list, q2_responses: list):
         """Predict ADHD type based on 18-question assessment"""
         # Combine all 18 responses (Q1_1 to Q1_9, Q2_1 to Q2_9)
         all_responses = q1_responses + q2_responses
-        features = np.array([all_responses])
-        
-        prediction = self.adhd_model.predict(features)[0]
-        confidence = max(self.adhd_model.predict_proba(features)[0])
-        
-        # Real dataset mapping: 0=No ADHD, 1=Inattentive, 2=Hyperactive, 3=Severe
-        presets = {
-            0: "normal",        # normal text display
-            1: "inattentive",   # highlight every 3rd word
-            2: "hyperactive",   # chunk sentences + highlight + TL;DR
-            3: "severe"         # chunk + highlight + TTS + TL;DR
-        }
-        
-        descriptions = {
-            0: "No ADHD detected - Normal text display",
-            1: "Inattentive type ADHD - Focus enhancement recommended",
-            2: "Hyperactive-Impulsive type ADHD - Text chunking recommended", 
-            3: "Severe ADHD - Full accessibility features recommended"
-        }
-        
+        features = np.array([all_responses], dtype=np.float64)
+        labels, confidences = self.classify_adhd(features)
+        return self.adhd_result(int(labels[0]), float(confidences[0]), q1_responses, q2_responses)
+
+    @staticmethod
+    def adhd_result(prediction: int, confidence: float, q1_responses: list, q2_responses: list) -> Dict:
+        """Response payload for one ADHD prediction"""
         # Calculate subscale scores
         hyperactivity_score = np.mean(q1_responses)
         inattention_score = np.mean(q2_responses)
         
         return {
-            "type": int(prediction),
-            "confidence": float(confidence),
-            "adaptation_preset": presets[prediction],
-            "description": descriptions[prediction],
+            "type": prediction,
+            "confidence": confidence,
+            "adaptation_preset": ADHD_PRESETS[prediction],
+            "description": ADHD_DESCRIPTIONS[prediction],
             "hyperactivity_score": float(hyperactivity_score),
             "inattention_score": float(inattention_score),
-            "total_responses": len(all_responses)
+            "total_responses": len(q1_responses) + len(q2_responses)
+        }
+
+    def predict_adhd_batch(self, responses: List[List[float]]) -> Dict[str, list]:
+        """Score many 18-answer questionnaires with one vectorized predict_proba; results are columnar"""
+        features = self._feature_matrix(responses, ADHD_FEATURES)
+        labels, confidences = self.classify_adhd(features)
+        labels = labels.tolist()
+
+        return {
+            "type": labels,
+            "confidence": confidences.tolist(),
+            "adaptation_preset": [ADHD_PRESETS[label] for label in labels],
+            "hyperactivity_score": features[:, :9].mean(axis=1).tolist(),
+            "inattention_score": features[:, 9:].mean(axis=1).tolist()
         }
     
     def classify_vision(self, glasses_power: float):
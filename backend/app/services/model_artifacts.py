@@ -0,0 +1,98 @@
+import hashlib
+import os
+from typing import Optional, Tuple
+
+import joblib
+import numpy as np
+
+from app.services.forest_compiler import (
+    CompiledForest, compile_forest, load_compiled_forest, save_compiled_forest, verify_compiled_forest
+)
+
+MODEL_NAMES = ("dyslexia", "adhd")
+MODELS_DIR = os.getenv("ML_MODELS_DIR", "models")
+DEMO_MODELS_DIR = os.path.join(MODELS_DIR, "demo")
+
+
+def model_path(directory: str, name: str) -> str:
+    """The pickled scikit-learn forest for a model"""
+    return os.path.join(directory, f"{name}_model.pkl")
+
+
+def forest_path(directory: str, name: str) -> str:
+    """The compiled node arrays built from model_path(directory, name)"""
+    return os.path.join(directory, "compiled", name)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_forest(model, directory: str, name: str) -> CompiledForest:
+    """Compile the pickled model at model_path(directory, name) into mappable node arrays
+
+    The arrays are only written when they reproduce scikit-learn's probabilities
+    exactly, and are tagged with the pickle's checksum so a retrained pickle
+    never runs against stale arrays.
+    """
+    compiled = compile_forest(model)
+    difference = verify_compiled_forest(model, compiled)
+    if difference != 0.0:
+        raise ValueError(f"Compiled {name} model differs from scikit-learn by {difference}")
+    save_compiled_forest(compiled, forest_path(directory, name), {
+        "name": name,
+        "source": os.path.basename(model_path(directory, name)),
+        "source_sha256": file_sha256(model_path(directory, name))
+    })
+    return compiled
+
+
+def load_forest(directory: str, name: str) -> Optional[CompiledForest]:
+    """Map the pre-built node arrays for a model, or None when missing or stale"""
+    location = forest_path(directory, name)
+    if not os.path.exists(os.path.join(location, "forest.json")):
+        return None
+    try:
+        compiled, info = load_compiled_forest(location)
+    except Exception as e:
+        print(f"Could not map compiled {name} model ({e}), compiling from the pickle")
+        return None
+    if info.get("source_sha256") != file_sha256(model_path(directory, name)):
+        print(f"Compiled {name} model is older than {model_path(directory, name)}, compiling from the pickle")
+        return None
+    return compiled
+
+
+def save_model(model, path: str):
+    """joblib.dump through a temporary file, so readers never see a partial pickle"""
+    staging = f"{path}.tmp-{os.getpid()}"
+    joblib.dump(model, staging)
+    os.replace(staging, path)
+
+
+def train_demo_models(seed: int = 42) -> Tuple[object, object]:
+    """Random-label forests with the production feature layout, for running without trained models"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(seed)
+    dyslexia_model = RandomForestClassifier(n_estimators=100, random_state=seed)
+    dyslexia_model.fit(rng.random((1000, 2)), rng.integers(0, 3, 1000))       # speed, survey_score -> 0,1,2 severity
+    adhd_model = RandomForestClassifier(n_estimators=100, random_state=seed)
+    adhd_model.fit(rng.integers(0, 4, (1000, 18)), rng.integers(0, 4, 1000))  # 18 answers -> 0,1,2,3 type
+    return dyslexia_model, adhd_model
+
+
+def build_demo_models(directory: str = DEMO_MODELS_DIR):
+    """Train the demo models once and persist them with their compiled node arrays"""
+    os.makedirs(directory, exist_ok=True)
+    for name, model in zip(MODEL_NAMES, train_demo_models()):
+        save_model(model, model_path(directory, name))
+        export_forest(model, directory, name)
+
+
+def has_models(directory: str) -> bool:
+    return all(os.path.exists(model_path(directory, name)) for name in MODEL_NAMES)
@@ -0,0 +1,140 @@
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.services.model_artifacts import MODELS_DIR, export_forest, file_sha256, model_path, save_model
+
+# <root>/<name>/<version>/{<name>_model.pkl, compiled/<name>/, metadata.json}; <root>/<name>/CURRENT names the
+# live version and <root>/<name>/SHADOW the candidate scored alongside it
+REGISTRY_DIR = os.getenv("ML_REGISTRY_DIR", os.path.join(MODELS_DIR, "registry"))
+METADATA_FILE = "metadata.json"
+CURRENT_FILE = "CURRENT"
+SHADOW_FILE = "SHADOW"
+
+
+def version_dir(name: str, version: str, root: str = REGISTRY_DIR) -> str:
+    if not version or os.sep in version or version.startswith("."):
+        raise ValueError(f"Invalid model version '{version}'")
+    return os.path.join(root, name, version)
+
+
+def new_version() -> str:
+    """Sortable UTC timestamp version, e.g. 20261017T021500Z"""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def publish(name: str, model, root: str = REGISTRY_DIR, version: Optional[str] = None,
+            activate_version: bool = False, **extra) -> Dict[str, Any]:
+    """Store a trained forest as a new immutable version with its node arrays and metadata.json
+
+    The version directory is assembled under a temporary name and renamed into
+    place, so watchers never see a version without its metadata.
+    """
+    import sklearn  # only needed when publishing; serving workers never import scikit-learn up front
+
+    version = version or new_version()
+    target = version_dir(name, version, root)
+    if os.path.exists(target):
+        raise ValueError(f"{name} version {version} already exists")
+    staging = f"{target}.tmp-{os.getpid()}"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    save_model(model, model_path(staging, name))
+    compiled = export_forest(model, staging, name)
+    metadata = {
+        "name": name,
+        "version": version,
+        "trained_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "n_features": int(model.n_features_in_),
+        "classes": [int(label) for label in model.classes_],
+        "sha256": file_sha256(model_path(staging, name)),
+        "size_bytes": os.path.getsize(model_path(staging, name)),
+        "n_trees": compiled.n_trees,
+        "n_nodes": compiled.n_nodes,
+        "max_depth": compiled.max_depth,
+        "sklearn_version": sklearn.__version__,
+        **extra
+    }
+    with open(os.path.join(staging, METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.rename(staging, target)
+
+    if activate_version:
+        activate(name, version, root)
+    return metadata
+
+
+def read_metadata(name: str, version: str, root: str = REGISTRY_DIR) -> Dict[str, Any]:
+    path = os.path.join(version_dir(name, version, root), METADATA_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No {name} model version {version}")
+    with open(path) as f:
+        return json.load(f)
+
+
+def verify_version(name: str, version: str, root: str = REGISTRY_DIR) -> Dict[str, Any]:
+    """Metadata for a version whose pickle still matches the recorded checksum"""
+    metadata = read_metadata(name, version, root)
+    actual = file_sha256(model_path(version_dir(name, version, root), name))
+    if actual != metadata.get("sha256"):
+        raise ValueError(f"{name} version {version}: checksum mismatch, the artifact was modified or truncated")
+    return metadata
+
+
+def list_versions(name: str, root: str = REGISTRY_DIR) -> List[Dict[str, Any]]:
+    """Metadata of every complete version, oldest first"""
+    directory = os.path.join(root, name)
+    if not os.path.isdir(directory):
+        return []
+    versions = []
+    for entry in sorted(os.listdir(directory)):
+        if os.path.exists(os.path.join(directory, entry, METADATA_FILE)):
+            versions.append(read_metadata(name, entry, root))
+    return versions
+
+
+def _read_marker(name: str, marker: str, root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, name, marker)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_marker(name: str, marker: str, version: str, root: str):
+    path = os.path.join(root, name, marker)
+    staging = f"{path}.tmp-{os.getpid()}"
+    with open(staging, "w") as f:
+        f.write(version + "\n")
+    os.replace(staging, path)
+
+
+def current_version(name: str, root: str = REGISTRY_DIR) -> Optional[str]:
+    """The version marked live for a model, or None if the registry has not been used"""
+    return _read_marker(name, CURRENT_FILE, root)
+
+
+def activate(name: str, version: str, root: str = REGISTRY_DIR):
+    """Mark a version live; every worker's registry watcher loads it on its next poll"""
+    read_metadata(name, version, root)
+    _write_marker(name, CURRENT_FILE, version, root)
+
+
+def shadow_version(name: str, root: str = REGISTRY_DIR) -> Optional[str]:
+    """The candidate version scored in shadow next to the live one, if any"""
+    return _read_marker(name, SHADOW_FILE, root)
+
+
+def set_shadow(name: str, version: Optional[str], root: str = REGISTRY_DIR):
+    """Mark a version as the shadow candidate for every worker, or stop shadowing with None"""
+    if version is None:
+        try:
+            os.remove(os.path.join(root, name, SHADOW_FILE))
+        except FileNotFoundError:
+            pass
+        return
+    read_metadata(name, version, root)
+    _write_marker(name, SHADOW_FILE, version, root)
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Persistent OCR results shared by every worker process on the host; OCR_CACHE=false disables it
+OCR_CACHE = os.getenv("OCR_CACHE", "true").lower() == "true"
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", "ocr_cache")
+OCR_CACHE_MAX_BYTES = int(os.getenv("OCR_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# Also match re-encodes of the same image (a second JPEG save, a screenshot of the photo) by perceptual hash;
+# off by default, since two pages with the same layout can hash alike at low resolution
+OCR_CACHE_PERCEPTUAL = os.getenv("OCR_CACHE_PERCEPTUAL", "false").lower() == "true"
+
+# Evicting goes down to this share of the budget, so a full cache is not swept on every write
+LOW_WATER = 0.9
+# Side of the difference hash grid: 16x16 gradients give a 256-bit hash
+PERCEPTUAL_GRID = 16
+# Differing hash bits still counted as the same image: re-encodes of a page differ by about 5, a copy at
+# half the resolution by about 20, different pages of text by more than 100
+PERCEPTUAL_MAX_DISTANCE = 24
+# Perceptual index records, as 64-bit words: 256-bit hash, then the binary content key of the entry it leads to
+RECORD_WORDS = 8
+HASH_WORDS = 4
+# Temporary files older than this were left by a crashed writer
+STALE_TMP_SECONDS = 3600
+
+OUTCOMES = ("raw_hit", "content_hit", "perceptual_hit", "miss")
+
+
+class OCRCache:
+    """Content-addressed OCR results on local disk, bounded in size and shared across workers
+
+    One JSON file per key, written atomically (temporary file + rename), so
+    any number of worker processes can read and write the directory at once.
+    A hit touches the file's mtime; when the directory outgrows max_bytes
+    the least recently used files are deleted. Counters are per process.
+    """
+
+    def __init__(self, root: str, max_bytes: int, perceptual: bool = False):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.perceptual = perceptual
+        self.counts = dict.fromkeys(OUTCOMES, 0)
+        self.writes = 0
+        self.evictions = 0
+        self.errors = 0
+        # Bytes on disk at the last sweep plus bytes written since; None until the first sweep
+        self.disk_bytes: Optional[int] = None
+        self._written_since_sweep = 0
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(data: bytes, *parts: str) -> str:
+        """Hash bytes (an upload, or decoded pixels) together with what else determines the OCR result"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x00")
+        digest.update(data)
+        return digest.hexdigest()
+
+    @classmethod
+    def content_key(cls, image: Image.Image, *parts: str) -> str:
+        """Key of the decoded, normalized image: identical pixels give identical keys whatever the file format"""
+        return cls.make_key(image.tobytes(), *parts, image.mode, f"{image.width}x{image.height}")
+
+    @staticmethod
+    def perceptual_hash(image: Image.Image) -> bytes:
+        """Difference hash: brightness gradients on a coarse grid, which survive re-encoding and rescaling"""
+        grid = np.asarray(image.convert("L").resize((PERCEPTUAL_GRID + 1, PERCEPTUAL_GRID), Image.Resampling.BOX),
+                          dtype=np.int16)
+        return np.packbits(grid[:, 1:] > grid[:, :-1]).tobytes()
+
+    def find_similar(self, perceptual_hash: bytes, *parts: str) -> Optional[str]:
+        """Content key of the closest indexed image within PERCEPTUAL_MAX_DISTANCE bits, or None
+
+        Near matches cannot be looked up by key, so the index (64 bytes per
+        entry) is scanned; for a full 256 MB cache that is about 20 ms of
+        numpy, paid only on the way to a Tesseract run.
+        """
+        records = self._read_index(self._index_path(*parts))
+        if not len(records):
+            return None
+        query = np.frombuffer(perceptual_hash, dtype=np.uint64)
+        differing = _bit_count(records[:, :HASH_WORDS] ^ query)
+        distances = sum(differing[:, word] for word in range(HASH_WORDS))
+        nearest = int(distances.argmin())
+        if distances[nearest] > PERCEPTUAL_MAX_DISTANCE:
+            return None
+        return records[nearest, HASH_WORDS:].tobytes().hex()
+
+    def index_similar(self, perceptual_hash: bytes, key: str, *parts: str):
+        """Make an entry findable by perceptual hash; appends of one record are atomic across processes"""
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self._index_path(*parts), "ab") as f:
+                f.write(perceptual_hash + bytes.fromhex(key))
+        except OSError as e:
+            self._error(f"Could not index OCR cache entry {key}: {e}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key, or None; a hit marks the entry recently used"""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self._error(f"Unreadable OCR cache entry {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def put(self, keys: List[str], value: Dict[str, Any]):
+        """Store a result under every key it can be found by; disk errors are logged, never raised"""
+        payload = json.dumps(value).encode("utf-8")
+        for key in keys:
+            path = self._path(key)
+            staging = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(staging, "wb") as f:
+                    f.write(payload)
+                os.replace(staging, path)
+            except OSError as e:
+                self._error(f"Could not write OCR cache entry {path}: {e}")
+                return
+            with self._lock:
+                self.writes += 1
+                self._written_since_sweep += len(payload)
+        if self.disk_bytes is None or self._written_since_sweep > self.max_bytes * (1 - LOW_WATER):
+            self.sweep()
+
+    def record(self, outcome: str):
+        """Count how an extraction was served: raw_hit, content_hit, perceptual_hit or miss"""
+        with self._lock:
+            self.counts[outcome] += 1
+
+    def sweep(self):
+        """Measure the directory and delete least recently used entries over budget
+
+        Several processes may sweep at once; an entry already deleted by
+        another is simply skipped. Within a process one sweep runs at a time.
+        """
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            entries = []
+            indexes = []
+            index_bytes = 0
+            now = time.time()
+            for shard in self._scan(self.root):
+                for entry in ([shard] if shard.is_file() else self._scan(shard.path)):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if ".tmp-" in entry.name:
+                        if now - stat.st_mtime > STALE_TMP_SECONDS:
+                            self._remove(entry.path)
+                    elif entry.name.endswith(".idx"):
+                        indexes.append(entry.path)
+                        index_bytes += stat.st_size
+                    else:
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+            # The perceptual indexes count against the budget but are only ever compacted
+            total = index_bytes + sum(size for _, size, _ in entries)
+            evicted = set()
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, path in entries:
+                    if total <= self.max_bytes * LOW_WATER:
+                        break
+                    if self._remove(path):
+                        evicted.add(path)
+                    total -= size
+            if evicted and indexes:
+                live = {os.path.basename(path)[:-len(".json")] for _, _, path in entries if path not in evicted}
+                for index in indexes:
+                    self._compact(index, live)
+            with self._lock:
+                self.disk_bytes = total
+                self._written_since_sweep = 0
+                self.evictions += len(evicted)
+        finally:
+            self._sweep_lock.release()
+
+    def _compact(self, index: str, live: set):
+        """Drop index records of evicted entries; appends racing with the rewrite are lost (they only miss)"""
+        records = self._read_index(index)
+        keep = np.array([record[HASH_WORDS:].tobytes().hex() in live for record in records], dtype=bool)
+        if keep.all():
+            return
+        staging = f"{index}.tmp-{os.getpid()}"
+        try:
+            records[keep].tofile(staging)
+            os.replace(staging, index)
+        except OSError as e:
+            self._error(f"Could not compact {index}: {e}")
+
+    @staticmethod
+    def _read_index(index: str) -> np.ndarray:
+        try:
+            words = np.fromfile(index, dtype=np.uint64)
+        except (OSError, ValueError):
+            words = np.empty(0, dtype=np.uint64)
+        # A record being appended right now may be cut short
+        return words[:len(words) - len(words) % RECORD_WORDS].reshape(-1, RECORD_WORDS)
+
+    def clear(self):
+        """Delete every cached entry (counters are kept)"""
+        for shard in self._scan(self.root):
+            for entry in ([shard] if shard.is_file() else self._scan(shard.path)):
+                self._remove(entry.path)
+        with self._lock:
+            self.disk_bytes = 0
+            self._written_since_sweep = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        with self._lock:
+            lookups = sum(self.counts.values())
+            hits = lookups - self.counts["miss"]
+            return {
+                "raw_hits": self.counts["raw_hit"],
+                "content_hits": self.counts["content_hit"],
+                "perceptual_hits": self.counts["perceptual_hit"],
+                "misses": self.counts["miss"],
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "errors": self.errors,
+                "bytes": (self.disk_bytes or 0) + self._written_since_sweep,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _index_path(self, *parts: str) -> str:
+        # One index per fingerprint, so a tesseract upgrade or new options never match old results
+        return os.path.join(self.root, f"perceptual-{self.make_key(b'', *parts)[:16]}.idx")
+
+    def _path(self, key: str) -> str:
+        # 256 subdirectories keep directory listings short
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    @staticmethod
+    def _scan(directory: str):
+        try:
+            with os.scandir(directory) as entries:
+                return [entry for entry in entries if not entry.name.startswith(".")]
+        except OSError:
+            return []
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _error(self, message: str):
+        logger.warning(message)
+        with self._lock:
+            self.errors += 1
+
+
+def _bit_count(words: np.ndarray) -> np.ndarray:
+    """Set bits per 64-bit word, in place (SWAR popcount; numpy < 2 has no bitwise_count)"""
+    words -= (words >> np.uint64(1)) & np.uint64(0x5555555555555555)
+    words = (words & np.uint64(0x3333333333333333)) + ((words >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    words += words >> np.uint64(4)
+    words &= np.uint64(0x0F0F0F0F0F0F0F0F)
+    words *= np.uint64(0x0101010101010101)
+    words >>= np.uint64(56)
+    return words
+
+
+ocr_cache = OCRCache(OCR_CACHE_DIR, OCR_CACHE_MAX_BYTES, OCR_CACHE_PERCEPTUAL) if OCR_CACHE else None
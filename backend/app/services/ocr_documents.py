@@ -0,0 +1,183 @@
+import asyncio
+import io
+import math
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, Tuple
+
+from PIL import Image
+
+from app.services.executors import BoundedExecutor, ExecutorSaturated
+
+# Longest document /api/ocr/extract-pages accepts
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", 500))
+# Pages of one document in flight at once (default: one per OCR worker); bounds rasterized pages in memory
+OCR_PAGE_LOOKAHEAD = int(os.getenv("OCR_PAGE_LOOKAHEAD", 0))
+# Pages larger than this are rasterized below the target DPI (a poster at 300 DPI would be hundreds of MP)
+MAX_PAGE_PIXELS = 40_000_000
+# Read the embedded text of born-digital PDF pages instead of OCRing them; false forces OCR for every page
+OCR_TEXT_LAYER = os.getenv("OCR_TEXT_LAYER", "true").lower() == "true"
+
+
+class DocumentError(ValueError):
+    """The upload is not a readable image, PDF or TIFF"""
+
+
+class PageSource:
+    """A multi-page document whose pages are decoded one at a time, on demand
+
+    render() may run on several OCR threads at once, so each call decodes its
+    page from the raw bytes independently; only the current pages of the
+    documents being read are ever held as pixels.
+    """
+
+    kind = "image"
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.page_count = 1
+
+    def render(self, index: int, dpi: int) -> Image.Image:
+        return Image.open(io.BytesIO(self.data))
+
+    def text_layer(self, index: int) -> Optional[Tuple[str, float]]:
+        """(embedded text, share of the page covered by images), or None when the page has no text layer"""
+        return None
+
+
+class TiffPages(PageSource):
+    """Multi-frame TIFF; each frame is one scanned page"""
+
+    kind = "tiff"
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        with Image.open(io.BytesIO(data)) as image:
+            self.page_count = getattr(image, "n_frames", 1)
+
+    def render(self, index: int, dpi: int) -> Image.Image:
+        image = Image.open(io.BytesIO(self.data))
+        image.seek(index)
+        return image
+
+
+class PdfPages(PageSource):
+    """PDF rasterized page by page with PyMuPDF (an optional dependency, imported on first use)"""
+
+    kind = "pdf"
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        try:
+            document = self._open()
+        except ImportError:
+            raise
+        except Exception as e:
+            raise DocumentError(f"Could not read the PDF: {e}")
+        with document:
+            if document.needs_pass:
+                raise DocumentError("The PDF is password protected")
+            self.page_count = document.page_count
+
+    def _open(self):
+        try:
+            import pymupdf
+        except ImportError:
+            raise ImportError("PDF support needs PyMuPDF (pip install PyMuPDF)")
+        return pymupdf.open(stream=self.data, filetype="pdf")
+
+    def render(self, index: int, dpi: int) -> Image.Image:
+        import pymupdf
+
+        # PyMuPDF documents are not thread-safe; every page job opens its own (cheap: only the xref is parsed)
+        with self._open() as document:
+            page = document.load_page(index)
+            width_in, height_in = page.rect.width / 72, page.rect.height / 72
+            dpi = min(dpi, int(math.sqrt(MAX_PAGE_PIXELS / max(width_in * height_in, 1e-6))))
+            pixmap = page.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY, alpha=False)
+            image = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+        image.info["dpi"] = (dpi, dpi)
+        return image
+
+    def text_layer(self, index: int) -> Optional[Tuple[str, float]]:
+        # Reads the content stream only: milliseconds per page, against a rasterization and a Tesseract pass
+        with self._open() as document:
+            page = document.load_page(index)
+            text = page.get_text("text")
+            page_area = max(page.rect.get_area(), 1e-6)
+            image_area = sum((page.rect & image["bbox"]).get_area() for image in page.get_image_info())
+        return text, min(1.0, image_area / page_area)
+
+
+def open_document(data: bytes) -> PageSource:
+    """Recognise a PDF, a TIFF or a single image from its first bytes; blocking for large PDFs"""
+    if data.startswith(b"%PDF"):
+        return PdfPages(data)
+    if data[:4] in (b"II*\x00", b"MM\x00*"):
+        try:
+            return TiffPages(data)
+        except Exception as e:
+            raise DocumentError(f"Could not read the TIFF: {e}")
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+    except Exception:
+        raise DocumentError("File must be an image, a PDF or a TIFF")
+    return PageSource(data)
+
+
+def stream_pages(page_count: int, read_page: Callable[[int], Dict[str, Any]], executor: BoundedExecutor,
+                 lookahead: int = OCR_PAGE_LOOKAHEAD) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """Iterate (index, read_page(index)) in page order while later pages are read in parallel
+
+    Keeps up to lookahead pages submitted to the executor; each time the
+    oldest finishes it is yielded and the next page is submitted, so pages
+    come out in order as soon as they and their predecessors are done. The
+    first pages are submitted right here, so a full pool raises
+    ExecutorSaturated while the caller can still answer 503; a full pool
+    later on just narrows the window. Closing the iterator (the client went
+    away) cancels the pages not yet started.
+    """
+    lookahead = max(1, lookahead or executor.max_workers)
+    pending: Deque[Tuple[int, asyncio.Future]] = deque()
+    next_page = 0
+
+    def fill():
+        nonlocal next_page
+        while next_page < page_count and len(pending) < lookahead:
+            try:
+                future = executor.submit(read_page, next_page)
+            except ExecutorSaturated:
+                if not pending:
+                    raise
+                return  # other requests hold the pool; continue with the pages already queued
+            pending.append((next_page, asyncio.wrap_future(future)))
+            next_page += 1
+
+    async def pages():
+        try:
+            while pending or next_page < page_count:
+                if not pending:
+                    # The pool was full at the last refill and none of our pages is in flight: wait for it to drain
+                    try:
+                        fill()
+                    except ExecutorSaturated as e:
+                        await asyncio.sleep(e.retry_after)
+                        continue
+                index, future = pending[0]
+                try:
+                    result = await future
+                except Exception as e:
+                    result = {"success": False, "error": str(e) or type(e).__name__, "extracted_text": ""}
+                pending.popleft()
+                try:
+                    fill()
+                except ExecutorSaturated:
+                    pass
+                yield index, result
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    fill()
+    return pages()
@@ -0,0 +1,152 @@
+import io
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+
+# Preprocessing before Tesseract; OCR_PREPROCESS=false restores the plain RGB conversion
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "true").lower() == "true"
+# Resolution Tesseract is given; its models are tuned for text scanned at about 300 DPI
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", 300))
+# Long side of the page (inches) assumed for photos, whose DPI metadata says nothing about the page
+OCR_PAGE_INCHES = float(os.getenv("OCR_PAGE_INCHES", 11))
+OCR_BINARIZE = os.getenv("OCR_BINARIZE", "true").lower() == "true"
+OCR_CROP = os.getenv("OCR_CROP", "true").lower() == "true"
+# Run Tesseract's orientation detection (an extra pass) when the first result looks unreadable
+OCR_AUTO_ROTATE = os.getenv("OCR_AUTO_ROTATE", "true").lower() == "true"
+
+# DPI values cameras and screenshots write by default; they carry no information about the page
+PLACEHOLDER_DPI = (72, 96)
+MAX_UPSCALE = 2.0
+# Bradley-Roth thresholding: a pixel is ink when darker than its neighbourhood mean by this fraction,
+# and by at least MIN_CONTRAST grey levels so sensor noise in dark, flat areas does not count
+THRESHOLD_FRACTION = 0.15
+MIN_CONTRAST = 20
+
+
+class PreprocessOptions:
+    """Which preprocessing steps run before OCR; defaults come from the OCR_* environment variables"""
+
+    def __init__(self, enabled: bool = OCR_PREPROCESS, target_dpi: int = OCR_TARGET_DPI,
+                 page_inches: float = OCR_PAGE_INCHES, binarize: bool = OCR_BINARIZE,
+                 crop: bool = OCR_CROP, auto_rotate: bool = OCR_AUTO_ROTATE):
+        self.enabled = enabled
+        self.target_dpi = target_dpi
+        self.page_inches = page_inches
+        self.binarize = binarize
+        self.crop = crop
+        self.auto_rotate = auto_rotate
+
+
+def _source_dpi(image: Image.Image) -> Optional[float]:
+    dpi = image.info.get("dpi")
+    if not dpi:
+        return None
+    value = float(dpi[0])
+    if value <= 0 or round(value) in PLACEHOLDER_DPI:
+        return None
+    return value
+
+
+def target_scale(size: Tuple[int, int], source_dpi: Optional[float], options: PreprocessOptions) -> float:
+    """Resize factor that brings the image to the target DPI
+
+    Scans carry a real DPI. For photos the page is assumed to fill the frame,
+    so the long side is scaled to page_inches at the target DPI; photos are
+    only ever shrunk this way, since their text size is unknown.
+    """
+    if source_dpi:
+        return min(options.target_dpi / source_dpi, MAX_UPSCALE)
+    return min(options.target_dpi * options.page_inches / max(size), 1.0)
+
+
+def ink_mask(gray: Image.Image, dpi: float) -> np.ndarray:
+    """True where a pixel is darker than its local mean (adaptive threshold, robust to shadows and gradients)"""
+    # A window of about 1/6 inch spans several strokes of body text; PIL's box blur is O(pixels) at any radius
+    radius = max(4, int(dpi / 12))
+    local_mean = np.asarray(gray.filter(ImageFilter.BoxBlur(radius)), dtype=np.int32)
+    pixels = np.asarray(gray, dtype=np.int32)
+    return (pixels * 100 < local_mean * int(100 * (1 - THRESHOLD_FRACTION))) & (pixels + MIN_CONTRAST < local_mean)
+
+
+def content_box(ink: np.ndarray, margin: int) -> Optional[Tuple[int, int, int, int]]:
+    """Bounding box of the rows and columns that hold ink, ignoring isolated specks; None for a blank page"""
+    height, width = ink.shape
+    rows = np.flatnonzero(ink.sum(axis=1) > max(1, width // 500))
+    columns = np.flatnonzero(ink.sum(axis=0) > max(1, height // 500))
+    if not len(rows) or not len(columns):
+        return None
+    return (max(0, int(columns[0]) - margin), max(0, int(rows[0]) - margin),
+            min(width, int(columns[-1]) + 1 + margin), min(height, int(rows[-1]) + 1 + margin))
+
+
+def _grayscale(image: Image.Image) -> Image.Image:
+    """8-bit grayscale, with transparent areas (common in screenshots) turned into white paper"""
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        image = Image.alpha_composite(Image.new("RGBA", image.size, "white"), image)
+    return image if image.mode == "L" else image.convert("L")
+
+
+def prepare_image(image_data: bytes, options: Optional[PreprocessOptions] = None) -> Tuple[Image.Image, Dict[str, Any]]:
+    """Decode an uploaded image into what Tesseract should read, plus a summary of what was done"""
+    return prepare_frame(Image.open(io.BytesIO(image_data)), options)
+
+
+def prepare_frame(image: Image.Image, options: Optional[PreprocessOptions] = None) -> Tuple[Image.Image, Dict[str, Any]]:
+    """Turn an opened image, a TIFF frame or a rasterized PDF page into what Tesseract should read
+
+    Steps: JPEG draft decode (the decoder skips detail below the target size
+    and converts to grayscale for free), EXIF rotation, resampling to the
+    target DPI, adaptive binarization and cropping to the inked area.
+    """
+    options = options or PreprocessOptions()
+    info: Dict[str, Any] = {"original_size": list(image.size)}
+
+    if not options.enabled:
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        info.update(size=list(image.size), has_ink=True)
+        return image, info
+
+    source_dpi = _source_dpi(image)
+    scale = target_scale(image.size, source_dpi, options)
+    target_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    if image.format == "JPEG" and scale < 1.0:
+        # Decodes at 1/2, 1/4 or 1/8 scale, the smallest not below target_size
+        image.draft("L", target_size)
+        if image.size != tuple(info["original_size"]):
+            info["draft_size"] = list(image.size)
+    image = ImageOps.exif_transpose(image)
+    image = _grayscale(image)
+
+    # The EXIF rotation may have swapped the axes since target_size was computed
+    if (image.width > image.height) != (target_size[0] > target_size[1]):
+        target_size = target_size[::-1]
+    if image.size != target_size:
+        image = image.resize(target_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    # A photo smaller than the assumed page has no known resolution; Tesseract then estimates it from the text
+    known_dpi = source_dpi * scale if source_dpi else (options.target_dpi if scale < 1.0 else None)
+    dpi = known_dpi or max(image.size) / options.page_inches
+    info.update(scale=round(scale, 3), dpi=round(known_dpi) if known_dpi else None)
+
+    has_ink = True
+    if options.binarize or options.crop:
+        ink = ink_mask(image, dpi)
+        if options.crop:
+            box = content_box(ink, margin=int(dpi / 10))
+            has_ink = box is not None
+            if box is not None and box != (0, 0, image.width, image.height):
+                image = image.crop(box)
+                ink = ink[box[1]:box[3], box[0]:box[2]]
+                info["crop"] = list(box)
+        if options.binarize:
+            image = Image.fromarray(~ink)  # mode "1": white paper, black ink
+
+    if known_dpi:
+        image.info["dpi"] = (round(known_dpi), round(known_dpi))
+    else:
+        image.info.pop("dpi", None)
+    info.update(size=list(image.size), mode=image.mode, has_ink=has_ink)
+    return image, info
@@ -1,44 +1,145 @@
 import pytesseract
 from PIL import Image
 import io
+import os
 import base64
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional, Tuple
 import logging
+from app.services.ocr_cache import OCRCache, ocr_cache
+from app.services.ocr_documents import OCR_TEXT_LAYER, PageSource
+from app.services.ocr_preprocessing import PreprocessOptions, prepare_frame
 
 logger = logging.getLogger(__name__)
 
+# Seconds before a tesseract process is killed and the request fails with 504
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", 30))
+
+# A page mostly covered by images is a scan unless its text layer has at least this many words
+# (scanners stamp page numbers and headers as text; OCR software leaves a full invisible text layer)
+SCANNED_PAGE_COVERAGE = 0.5
+TEXT_LAYER_MIN_WORDS = 20
+
+# The ocr pool runs one tesseract per core; tesseract's own OpenMP threads would oversubscribe the CPU
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+class OCRTimeout(Exception):
+    """Tesseract ran longer than OCR_TIMEOUT_SECONDS and was killed"""
+
 class OCRService:
-    def __init__(self):
-        # Configure Tesseract path if needed (Windows)
-        try:
-            pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-        except:
-            pass  # Use system PATH
+    def __init__(self, preprocess: Optional[PreprocessOptions] = None, cache: Optional[OCRCache] = None):
+        self.preprocess = preprocess or PreprocessOptions()
+        self.cache = cache
+        self._tesseract_version: Optional[str] = None
+
+        # Configure Tesseract path if needed (Windows); otherwise use system PATH
+        tesseract_cmd = os.getenv("TESSERACT_CMD")
+        if not tesseract_cmd and os.name == "nt":
+            tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
     
-    def extract_text_from_image(self, image_data: bytes) -> Dict[str, Any]:
+    def extract_text_from_image(self, image_data: bytes, options: Optional[PreprocessOptions] = None) -> Dict[str, Any]:
         """Extract text from image using OCR"""
+        options = options or self.preprocess
+        raw_key = None
+        fingerprint = self._cache_fingerprint(options)
+        if fingerprint is not None:
+            # A byte-identical upload is answered without even decoding it
+            raw_key = self.cache.make_key(image_data, fingerprint, "upload")
+            entry = self.cache.get(raw_key)
+            if entry is not None:
+                self.cache.record("raw_hit")
+                return {"success": True, **entry, "cached": True}
+        return self._extract(lambda: Image.open(io.BytesIO(image_data)), options, raw_key)
+
+    def extract_text_from_page(self, document: PageSource, index: int,
+                               options: Optional[PreprocessOptions] = None) -> Dict[str, Any]:
+        """Extract text from one page of a PDF or multi-frame TIFF, rasterizing only that page
+
+        Born-digital PDF pages are read from their embedded text layer; only
+        scanned pages (and pages whose text layer is missing or garbled) are
+        rasterized and OCRed. "method" tells which path the page took.
+        """
+        options = options or self.preprocess
+        if OCR_TEXT_LAYER:
+            try:
+                text = self._usable_text_layer(document.text_layer(index))
+            except Exception as e:
+                logger.warning(f"Text layer of page {index + 1} unreadable, falling back to OCR: {e}")
+                text = None
+            if text is not None:
+                cleaned_text = self._clean_extracted_text(text)
+                return {
+                    "success": True,
+                    "method": "text_layer",
+                    "extracted_text": cleaned_text,
+                    "character_count": len(cleaned_text),
+                    "word_count": len(cleaned_text.split()),
+                    "confidence": 1.0
+                }
+        result = self._extract(lambda: document.render(index, options.target_dpi), options)
+        result["method"] = "ocr"
+        return result
+
+    def _usable_text_layer(self, layer) -> Optional[str]:
+        """The page's embedded text when it can stand in for OCR, else None"""
+        if layer is None:
+            return None
+        text, image_coverage = layer
+        words = text.split()
+        if not words:
+            # No text at all: a scan, or text drawn as vector outlines
+            return None
+        if "\ufffd" in text or self._looks_unreadable(text):
+            # Fonts without a Unicode mapping extract as replacement characters or symbol soup
+            return None
+        if image_coverage >= SCANNED_PAGE_COVERAGE and len(words) < TEXT_LAYER_MIN_WORDS:
+            return None
+        return text
+
+    def _extract(self, load: Callable[[], Image.Image], options: Optional[PreprocessOptions],
+                 raw_key: Optional[str] = None) -> Dict[str, Any]:
+        options = options or self.preprocess
         try:
-            # Open image from bytes
-            image = Image.open(io.BytesIO(image_data))
+            # Decode, downscale, binarize and crop before Tesseract sees it
+            image, preprocessing = prepare_frame(load(), options)
             
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+            # Re-encodes of the same image normalize to the same pixels: look the prepared image up
+            fingerprint = self._cache_fingerprint(options) if preprocessing["has_ink"] else None
+            if fingerprint is not None:
+                entry, content_key, perceptual_hash = self._cache_lookup(image, fingerprint)
+                if entry is not None:
+                    if "rotated" in entry["preprocessing"]:
+                        preprocessing["rotated"] = entry["preprocessing"]["rotated"]
+                    entry["preprocessing"] = preprocessing
+                    if raw_key:
+                        self.cache.put([raw_key], entry)
+                    return {"success": True, **entry, "cached": True}
             
-            # Extract text using Tesseract
-            extracted_text = pytesseract.image_to_string(image, lang='eng')
+            # Extract text using Tesseract; a page without ink needs no OCR at all
+            extracted_text = self._image_to_string(image) if preprocessing["has_ink"] else ""
+            if options.enabled and options.auto_rotate and preprocessing["has_ink"] and self._looks_unreadable(extracted_text):
+                extracted_text, preprocessing["rotated"] = self._retry_rotated(image, extracted_text)
             
             # Clean up text
             cleaned_text = self._clean_extracted_text(extracted_text)
             
-            return {
-                "success": True,
+            result = {
                 "extracted_text": cleaned_text,
                 "character_count": len(cleaned_text),
                 "word_count": len(cleaned_text.split()),
-                "confidence": self._estimate_confidence(cleaned_text)
+                "confidence": self._estimate_confidence(cleaned_text),
+                "preprocessing": preprocessing
             }
+            if fingerprint is not None:
+                self.cache.record("miss")
+                self.cache.put([content_key] + ([raw_key] if raw_key else []), result)
+                if perceptual_hash is not None:
+                    self.cache.index_similar(perceptual_hash, content_key, fingerprint)
+            return {"success": True, **result, "cached": False}
             
+        except OCRTimeout:
+            raise
         except Exception as e:
             logger.error(f"OCR extraction failed: {str(e)}")
             return {
@@ -59,6 +160,8 @@ class OCRService:
             
             return self.extract_text_from_image(image_data)
             
+        except OCRTimeout:
+            raise
         except Exception as e:
             logger.error(f"Base64 OCR extraction failed: {str(e)}")
             return {
@@ -67,6 +170,86 @@ class OCRService:
                 "extracted_text": ""
             }
     
+    def _cache_lookup(self, image: Image.Image, fingerprint: str) -> Tuple[Optional[Dict[str, Any]], str, Optional[bytes]]:
+        """Cached result of a prepared image (same pixels first, then a near-identical image), plus its keys"""
+        content_key = self.cache.content_key(image, fingerprint)
+        entry = self.cache.get(content_key)
+        if entry is not None:
+            self.cache.record("content_hit")
+            return entry, content_key, None
+        if not self.cache.perceptual:
+            return None, content_key, None
+
+        perceptual_hash = self.cache.perceptual_hash(image)
+        similar = self.cache.find_similar(perceptual_hash, fingerprint)
+        entry = self.cache.get(similar) if similar else None
+        if entry is not None:
+            self.cache.record("perceptual_hit")
+            # Found by its own pixels from now on
+            self.cache.put([content_key], entry)
+        return entry, content_key, perceptual_hash
+
+    def _cache_fingerprint(self, options: PreprocessOptions) -> Optional[str]:
+        """Everything besides the pixels that changes the OCR result; None when results are not to be cached"""
+        if self.cache is None:
+            return None
+        if self._tesseract_version is None:
+            try:
+                self._tesseract_version = str(pytesseract.get_tesseract_version())
+            except Exception as e:
+                logger.warning(f"OCR cache bypassed, tesseract version unknown: {e}")
+                return None
+        return "|".join(str(part) for part in (
+            "ocr-v1", "eng", self._tesseract_version, options.enabled, options.target_dpi,
+            options.page_inches, options.binarize, options.crop, options.auto_rotate
+        ))
+
+    def _image_to_string(self, image: Image.Image) -> str:
+        """Run tesseract on one image, killing it after OCR_TIMEOUT_SECONDS"""
+        return self._run_tesseract(pytesseract.image_to_string, image, lang='eng')
+
+    def _run_tesseract(self, function, image: Image.Image, **kwargs):
+        try:
+            return function(image, timeout=OCR_TIMEOUT_SECONDS, **kwargs)
+        except RuntimeError as e:
+            if str(e) == "Tesseract process timeout":
+                logger.warning(f"OCR timed out after {OCR_TIMEOUT_SECONDS}s")
+                raise OCRTimeout(f"OCR took longer than {OCR_TIMEOUT_SECONDS:g} seconds")
+            raise
+
+    @staticmethod
+    def _readable_words(text: str) -> int:
+        """Words of mostly letters; OCR of a sideways or upside-down page yields mostly fragments and symbols"""
+        return sum(1 for word in text.split() if len(word) >= 2 and sum(c.isalpha() for c in word) >= 0.8 * len(word))
+
+    def _looks_unreadable(self, text: str) -> bool:
+        """Fewer than half the tokens are words (or no text at all from an inked page)"""
+        return self._readable_words(text) * 2 <= len(text.split())
+
+    def _retry_rotated(self, image: Image.Image, text: str):
+        """Detect the page orientation (a second Tesseract pass) and re-read the page if it is rotated
+
+        Only called when the first result looks unreadable; keeps whichever reading has more words.
+        """
+        try:
+            osd = self._run_tesseract(pytesseract.image_to_osd, image, output_type=pytesseract.Output.DICT)
+        except pytesseract.TesseractError as e:
+            # Too little text to tell the orientation
+            logger.info(f"Orientation detection skipped: {e}")
+            return text, 0
+        rotation = int(osd.get("rotate", 0))
+        if not rotation:
+            return text, 0
+
+        # OSD reports the clockwise rotation that makes the page upright; PIL rotates counter-clockwise
+        rotated = image.rotate(-rotation, expand=True, fillcolor="white")
+        if "dpi" in image.info:
+            rotated.info["dpi"] = image.info["dpi"]
+        rotated_text = self._image_to_string(rotated)
+        if self._readable_words(rotated_text) > self._readable_words(text):
+            return rotated_text, rotation
+        return text, 0
+
     def _clean_extracted_text(self, text: str) -> str:
         """Clean and format extracted text"""
         if not text:
@@ -101,4 +284,4 @@ class OCRService:
         else:
             return 0.7
 
-ocr_service = OCRService()
\ No newline at end of file
+ocr_service = OCRService(cache=ocr_cache)
\ No newline at end of file
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.executors import ml_executor
+from app.services.metrics import Histogram
+from app.services.ml_service import ml_service, DYSLEXIA_FEATURES, ADHD_FEATURES
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+QUEUE_WAIT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100)
+
+
+class InvalidFeatures(ValueError):
+    """A row the model cannot score (wrong width, NaN or infinity); rejected before it joins a batch"""
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row predictions into one batched model call
+
+    Rows submitted within max_wait_ms of the first pending row (or until
+    max_batch_size rows are pending) are scored together with one
+    predict_proba on the ml executor, and each caller's future is
+    resolved with its own (label, confidence) and the time the model took to
+    score the row's batch. If the batched call fails, its
+    rows are scored again one at a time, so only a failing row's caller gets
+    the error. All bookkeeping happens on the event loop thread, so no locks
+    are needed.
+    """
+
+    def __init__(self, name: str, classify: Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]],
+                 n_features: int, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        self.name = name
+        self.classify = classify
+        self.n_features = n_features
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self.failed_batches = 0
+        self.failed_rows = 0
+        self._pending: List[Tuple[np.ndarray, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running = set()
+
+    async def submit(self, row: Sequence[float]) -> Tuple[int, float, float]:
+        """Score one row as part of the next batch: label, confidence and scoring time in microseconds
+
+        Raises InvalidFeatures for a row the model cannot score.
+        """
+        features = np.asarray(row, dtype=np.float64)
+        if features.shape != (self.n_features,):
+            raise InvalidFeatures(f"Expected {self.n_features} numeric values, got {features.size}")
+        if not np.isfinite(features).all():
+            raise InvalidFeatures("Features must be finite numbers, not NaN or infinity")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size or self.max_wait == 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        """Hand every pending row to one batch run"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            # Keep a reference until done; the loop only holds weak references to tasks
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[np.ndarray, asyncio.Future, float]]):
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            self.queue_wait_ms.observe((started - enqueued) * 1000)
+        self.batch_sizes.observe(len(batch))
+
+        features = np.vstack([row for row, _, _ in batch])
+        try:
+            labels, confidences, scoring_us = await ml_executor.run(self._classify_timed, features)
+            results = [(label, confidence, scoring_us) for label, confidence in zip(labels.tolist(), confidences.tolist())]
+        except Exception as e:
+            self.failed_batches += 1
+            results = [e]
+            if len(batch) > 1:
+                try:
+                    results = await ml_executor.run(self._classify_rows, features)
+                except Exception as rescoring_error:
+                    results = [rescoring_error] * len(batch)
+
+        for (_, future, _), result in zip(batch, results):
+            # A caller that disconnected has a cancelled future
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                self.failed_rows += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _classify_timed(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float]:
+        """classify, plus its duration in microseconds (the model's time, without queueing); blocking"""
+        started = time.perf_counter()
+        labels, confidences = self.classify(features)
+        return labels, confidences, (time.perf_counter() - started) * 1e6
+
+    def _classify_rows(self, features: np.ndarray) -> List:
+        """(label, confidence, scoring_us) or the exception raised, scoring each row on its own; blocking"""
+        results = []
+        for row in features:
+            try:
+                labels, confidences, scoring_us = self._classify_timed(row[np.newaxis, :])
+                results.append((labels.tolist()[0], confidences.tolist()[0], scoring_us))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        """Counters for monitoring"""
+        batches = self.batch_sizes.count
+        return {
+            "batches": batches,
+            "items": int(self.batch_sizes.sum),
+            "mean_batch_size": round(self.batch_sizes.sum / batches, 2) if batches else 0.0,
+            "max_batch_size": int(self.batch_sizes.max),
+            "mean_queue_wait_ms": round(self.queue_wait_ms.sum / self.queue_wait_ms.count, 3) if batches else 0.0,
+            "max_queue_wait_ms": round(self.queue_wait_ms.max, 3),
+            "failed_batches": self.failed_batches,
+            "failed_rows": self.failed_rows,
+            "pending": len(self._pending)
+        }
+
+    def prometheus_lines(self) -> List[str]:
+        """Batch size and queue wait histograms plus counters in Prometheus text format"""
+        label = f'model="{self.name}"'
+        lines = []
+        for metric, histogram in (
+            ("readapt_prediction_batch_size", self.batch_sizes),
+            ("readapt_prediction_queue_wait_ms", self.queue_wait_ms),
+        ):
+            lines.extend(histogram.prometheus_lines(metric, label))
+        lines.append(f"readapt_prediction_failed_batches{{{label}}} {self.failed_batches}")
+        lines.append(f"readapt_prediction_failed_rows{{{label}}} {self.failed_rows}")
+        lines.append(f"readapt_prediction_pending{{{label}}} {len(self._pending)}")
+        return lines
+
+
+WINDOW_MS = float(os.getenv("PREDICTION_BATCH_WINDOW_MS", 2))
+MAX_BATCH_SIZE = int(os.getenv("PREDICTION_BATCH_MAX_SIZE", 64))
+
+dyslexia_batcher = MicroBatcher("dyslexia", ml_service.classify_dyslexia, DYSLEXIA_FEATURES, MAX_BATCH_SIZE, WINDOW_MS)
+adhd_batcher = MicroBatcher("adhd", ml_service.classify_adhd, ADHD_FEATURES, MAX_BATCH_SIZE, WINDOW_MS)
+batchers = (dyslexia_batcher, adhd_batcher)
+
+
+async def predict_dyslexia(speed: float, survey_score: float) -> Tuple[Dict, float]:
+    """ml_service.predict_dyslexia, scored as part of a micro-batch, plus the scoring time in microseconds"""
+    prediction, confidence, scoring_us = await dyslexia_batcher.submit([speed, survey_score])
+    return ml_service.dyslexia_result(int(prediction), float(confidence), speed, survey_score), scoring_us
+
+
+async def predict_adhd(q1_responses: list, q2_responses: list) -> Tuple[Dict, float]:
+    """ml_service.predict_adhd, scored as part of a micro-batch, plus the scoring time in microseconds"""
+    prediction, confidence, scoring_us = await adhd_batcher.submit(list(q1_responses) + list(q2_responses))
+    return ml_service.adhd_result(int(prediction), float(confidence), q1_responses, q2_responses), scoring_us
@@ -0,0 +1,213 @@
+import os
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from fastapi import BackgroundTasks
+
+from app.services import model_registry
+from app.services.executors import BoundedExecutor, ExecutorSaturated, shadow_executor
+from app.services.ml_service import ml_service, LoadedModel, MODEL_FEATURES, MODEL_PRESETS
+from app.services.metrics import Histogram
+from app.services.model_artifacts import MODEL_NAMES
+
+LATENCY_BUCKETS_US = (10, 25, 50, 100, 250, 500, 1000, 2500, 10000)
+
+# Fraction of eligible requests scored in shadow; the shadow pool sheds whatever it cannot keep up with
+SAMPLE_RATE = float(os.getenv("ML_SHADOW_SAMPLE_RATE", 1.0))
+
+
+class ShadowStats:
+    """Agreement and latency of one candidate against the served predictions, since it became the candidate"""
+
+    def __init__(self, version: str):
+        self.version = version
+        self.scored = 0
+        self.agreed = 0
+        self.shed = 0
+        self.failed = 0
+        self.confidence_delta = 0.0
+        self.outcomes = Counter()  # (live label, shadow label) -> rows
+        self.live_latency_us = Histogram(LATENCY_BUCKETS_US)
+        self.shadow_latency_us = Histogram(LATENCY_BUCKETS_US)
+
+
+class ShadowScorer:
+    """Scores a candidate model version on live traffic after the response has been sent
+
+    Routes hand their input row, the label and confidence they served and
+    the time the live model took to score it to schedule(), which adds a
+    background task that only enqueues the row on the shadow pool. One
+    shadow worker then scores the row with the candidate alone and aggregates
+    agreement and both latencies in memory; the live model is never scored
+    twice. The live latency is that of the micro-batch that served the row,
+    so compare it with the candidate's at similar batch sizes. When the pool
+    is full the row is dropped and counted as shed; live responses never wait
+    for shadow work.
+    """
+
+    def __init__(self, executor: BoundedExecutor, sample_rate: float = 1.0):
+        self.executor = executor
+        self.sample_rate = sample_rate
+        # Replaced as a whole when a candidate changes, like MLService._active
+        self._candidates: Dict[str, LoadedModel] = {}
+        self._stats: Dict[str, ShadowStats] = {}
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+
+    def set_candidate(self, name: str, version: Optional[str]) -> Optional[Dict]:
+        """Load, validate and warm up a registry version as the shadow candidate, or stop shadowing with None
+
+        Blocking; run it off the event loop. Statistics restart for the new candidate.
+        """
+        if name not in MODEL_NAMES:
+            raise ValueError(f"Unknown model '{name}'")
+        if version is None:
+            self._candidates = {key: value for key, value in self._candidates.items() if key != name}
+            return None
+
+        loaded = ml_service.load_version(name, version)
+        with self._lock:
+            self._stats[name] = ShadowStats(version)
+        self._candidates = {**self._candidates, name: loaded}
+        print(f"{name} model {version} scoring in shadow")
+        return loaded.info()
+
+    def candidate_version(self, name: str) -> Optional[str]:
+        candidate = self._candidates.get(name)
+        return candidate.version if candidate is not None else None
+
+    def schedule(self, background_tasks: BackgroundTasks, name: str, row: Sequence[float],
+                 label: int, confidence: float, latency_us: float):
+        """Score row in shadow once the response is sent, if a candidate is set for this model
+
+        label and confidence are what the live model answered for row, in latency_us microseconds.
+        """
+        if name not in self._candidates or len(row) != MODEL_FEATURES[name]:
+            return
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        background_tasks.add_task(self.observe, name, list(row), int(label), float(confidence), float(latency_us))
+
+    async def observe(self, name: str, row: List[float], label: int, confidence: float, latency_us: float):
+        """Queue one row for the shadow worker; runs on the event loop, so it must never block"""
+        candidate = self._candidates.get(name)
+        if candidate is None:
+            return
+        try:
+            self.executor.submit(self._score, name, candidate, row, label, confidence, latency_us)
+        except ExecutorSaturated:
+            with self._lock:
+                stats = self._stats.get(name)
+                if stats is not None and stats.version == candidate.version:
+                    stats.shed += 1
+
+    def _score(self, name: str, candidate: LoadedModel, row: List[float], live_label: int, live_confidence: float,
+               live_latency_us: float):
+        features = np.asarray([row], dtype=np.float64)
+        try:
+            started = time.perf_counter()
+            shadow_labels, shadow_confidences = ml_service.score(candidate, features)
+            shadow_done = time.perf_counter()
+        except Exception as e:
+            print(f"Shadow scoring of {name} model {candidate.version} failed: {e}")
+            failed = True
+        else:
+            failed = False
+
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None or stats.version != candidate.version:
+                return  # the candidate changed while this row was queued
+            if failed:
+                stats.failed += 1
+                return
+            shadow_label = int(shadow_labels[0])
+            stats.scored += 1
+            stats.agreed += live_label == shadow_label
+            stats.confidence_delta += abs(float(shadow_confidences[0]) - live_confidence)
+            stats.outcomes[(live_label, shadow_label)] += 1
+            stats.live_latency_us.observe(live_latency_us)
+            stats.shadow_latency_us.observe((shadow_done - started) * 1e6)
+
+    def sync_with_registry(self):
+        """Follow the registry's SHADOW markers: load new candidates, drop cleared ones"""
+        for name in MODEL_NAMES:
+            version = model_registry.shadow_version(name)
+            if version == self.candidate_version(name):
+                continue
+            try:
+                self.set_candidate(name, version)
+            except Exception as e:
+                print(f"Could not load {name} model {version} for shadow scoring: {e}")
+
+    def watch_registry(self, interval: float):
+        """Load the registry's shadow candidates now, and poll for changes every interval seconds if positive"""
+        if self._watcher is not None:
+            return
+
+        def poll():
+            while True:
+                self.sync_with_registry()
+                if interval <= 0:
+                    return
+                time.sleep(interval)
+
+        self._watcher = threading.Thread(target=poll, name="shadow-registry-watcher", daemon=True)
+        self._watcher.start()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per model: candidate, live version, agreement rate, live vs shadow latency and label outcomes"""
+        result = {}
+        with self._lock:
+            for name in MODEL_NAMES:
+                stats = self._stats.get(name)
+                active = name in self._candidates and stats is not None \
+                    and stats.version == self._candidates[name].version
+                if stats is None:
+                    result[name] = {"candidate": None, "live": ml_service.live_model(name).version}
+                    continue
+                presets = MODEL_PRESETS[name]
+                scored = stats.scored
+                result[name] = {
+                    "candidate": stats.version,
+                    "active": active,
+                    "live": ml_service.live_model(name).version,
+                    "scored": scored,
+                    "shed": stats.shed,
+                    "failed": stats.failed,
+                    "agreement_rate": round(stats.agreed / scored, 4) if scored else None,
+                    "mean_confidence_delta": round(stats.confidence_delta / scored, 4) if scored else None,
+                    "live_latency_us": _latency_summary(stats.live_latency_us),
+                    "shadow_latency_us": _latency_summary(stats.shadow_latency_us),
+                    "outcomes": {
+                        f"{presets.get(live, live)}->{presets.get(shadow, shadow)}": count
+                        for (live, shadow), count in sorted(stats.outcomes.items())
+                    }
+                }
+        return result
+
+    def prometheus_lines(self) -> List[str]:
+        """Shadow counters and live vs shadow latency histograms in Prometheus text format"""
+        lines = []
+        with self._lock:
+            for name, stats in self._stats.items():
+                label = f'model="{name}",candidate="{stats.version}"'
+                for counter in ("scored", "agreed", "shed", "failed"):
+                    lines.append(f"readapt_shadow_{counter}{{{label}}} {getattr(stats, counter)}")
+                for scorer, histogram in (("live", stats.live_latency_us), ("shadow", stats.shadow_latency_us)):
+                    lines.extend(histogram.prometheus_lines("readapt_shadow_latency_us", f'{label},scorer="{scorer}"'))
+        return lines
+
+
+def _latency_summary(histogram: Histogram) -> Dict[str, float]:
+    return {
+        "mean": round(histogram.mean, 2),
+        "max": round(histogram.max, 2)
+    }
+
+
+shadow_scorer = ShadowScorer(shadow_executor, SAMPLE_RATE)
@@ -0,0 +1,147 @@
+import os
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.text_analysis import AnalyzedText, strip_terminal_punctuation
+
+TERM_PATTERN = re.compile(r"[a-z][a-z']{2,}")
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers herself him himself his how i if in into is it its itself just
+me more most my myself no nor not now of off on once only or other our ours ourselves out over
+own same she should so some such than that the their theirs them themselves then there these
+they this those through to too under until up very was we were what when where which while who
+whom why will with would you your yours yourself yourselves
+""".split())
+
+
+class ExtractiveSummarizer:
+    """TextRank over TF-IDF sentence vectors, computed with NumPy matrix ops
+
+    Runs locally in a few milliseconds, so summaries never need a network
+    round trip: it backs the TL;DR, the Gemini fallbacks and the content agent.
+    """
+
+    def __init__(self, damping: float = 0.85, max_iterations: int = 50,
+                 tolerance: float = 1e-5, max_sentences: int = 2000):
+        self.damping = damping
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        # Similarity is quadratic in sentences; beyond this only the leading sentences are ranked
+        self.max_sentences = max_sentences
+
+    def score(self, analysis: AnalyzedText) -> np.ndarray:
+        """TextRank score per sentence (sums to 1 over the ranked sentences)"""
+        sentence_count = min(analysis.sentence_count, self.max_sentences)
+        scores = np.zeros(analysis.sentence_count)
+        if sentence_count == 0:
+            return scores
+        if sentence_count == 1:
+            scores[0] = 1.0
+            return scores
+
+        scores[:sentence_count] = self._pagerank(sentence_count, *self._tfidf_vectors(analysis, sentence_count))
+        return scores
+
+    def rank(self, analysis: AnalyzedText, min_chars: int = 0) -> List[int]:
+        """Sentence indexes, best first, skipping sentences shorter than min_chars"""
+        return list(self._ranked(analysis, min_chars))
+
+    def _ranked(self, analysis: AnalyzedText, min_chars: int) -> Iterator[int]:
+        # Stable sort on the negated scores: ties go to the earlier sentence
+        order = np.argsort(-self.score(analysis), kind="stable")
+        sentences = analysis.sentence_texts()
+        for index in order.tolist():
+            if len(strip_terminal_punctuation(sentences[index])) > min_chars:
+                yield index
+
+    def select(self, analysis: AnalyzedText, max_sentences: Optional[int] = None,
+               max_words: Optional[int] = None, min_chars: int = 0) -> List[int]:
+        """Best sentences within the budgets, returned in document order"""
+        selected = []
+        word_count = 0
+        for index in self._ranked(analysis, min_chars):
+            if max_sentences is not None and len(selected) >= max_sentences:
+                break
+            sentence_words = analysis.sentence_word_count(index)
+            if max_words is not None and word_count + sentence_words > max_words:
+                continue
+            selected.append(index)
+            word_count += sentence_words
+        return sorted(selected)
+
+    def summarize(self, analysis: AnalyzedText, max_sentences: Optional[int] = None,
+                  max_words: Optional[int] = None, min_chars: int = 0) -> List[str]:
+        """Text of the selected sentences, in document order"""
+        sentences = analysis.sentence_texts()
+        return [sentences[index] for index in self.select(analysis, max_sentences, max_words, min_chars)]
+
+    def _tfidf_vectors(self, analysis: AnalyzedText, sentence_count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sparse L2-normalised sublinear TF-IDF rows as (rows, terms, weights) arrays
+
+        Only terms shared by 2+ sentences are kept: a term found in a single
+        sentence changes that sentence's norm but never a similarity, so it is
+        dropped after normalising.
+        """
+        vocabulary: Dict[str, int] = {}
+        rows = []
+        term_ids = []
+        for row, sentence in enumerate(analysis.sentence_texts()[:sentence_count]):
+            for term in TERM_PATTERN.findall(sentence.lower()):
+                if term not in STOPWORDS:
+                    rows.append(row)
+                    term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+
+        vocabulary_size = max(len(vocabulary), 1)
+        # (sentence, term) pairs with their counts, without materialising a count matrix
+        pairs, counts = np.unique(
+            np.asarray(rows, dtype=np.int64) * vocabulary_size + np.asarray(term_ids, dtype=np.int64),
+            return_counts=True
+        )
+        pair_rows, pair_terms = np.divmod(pairs, vocabulary_size)
+        document_frequency = np.bincount(pair_terms, minlength=vocabulary_size)
+        idf = np.log((1 + sentence_count) / (1 + document_frequency)) + 1
+        weights = np.log1p(counts) * idf[pair_terms]
+        norms = np.sqrt(np.bincount(pair_rows, weights * weights, minlength=sentence_count))
+
+        keep = document_frequency[pair_terms] > 1
+        return pair_rows[keep], pair_terms[keep], weights[keep] / norms[pair_rows[keep]]
+
+    def _pagerank(self, size: int, rows: np.ndarray, terms: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Power iteration on the cosine-similarity graph of the sparse sentence vectors
+
+        The sentence x sentence similarity matrix is never built: with unit rows,
+        similarity @ x == X @ (X.T @ x) - self_similarity * x, and both products
+        are bincounts over the non-zero weights.
+        """
+        width = int(terms.max()) + 1 if len(terms) else 0
+
+        def neighbours(x: np.ndarray) -> np.ndarray:
+            term_mass = np.bincount(terms, weights * x[rows], minlength=width)
+            return np.bincount(rows, weights * term_mass[terms], minlength=size) - self_similarity * x
+
+        self_similarity = np.bincount(rows, weights * weights, minlength=size)
+        degree = neighbours(np.ones(size))
+        dangling = degree <= 1e-9
+        inverse_degree = np.zeros(size)
+        np.divide(1.0, degree, out=inverse_degree, where=~dangling)
+
+        scores = np.full(size, 1.0 / size)
+        teleport = (1 - self.damping) / size
+        for _ in range(self.max_iterations):
+            # Sentences sharing no terms spread their rank evenly
+            updated = teleport + self.damping * (
+                neighbours(scores * inverse_degree) + scores[dangling].sum() / size
+            )
+            if np.abs(updated - scores).sum() < self.tolerance:
+                return updated
+            scores = updated
+        return scores
+
+
+summarizer = ExtractiveSummarizer(
+    max_sentences=int(os.getenv("SUMMARIZER_MAX_SENTENCES", 2000))
+)
@@ -0,0 +1,132 @@
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import List, Tuple
+
+WORD_PATTERN = re.compile(r'\S+')
+PARAGRAPH_BREAK = re.compile(r'\n[ \t]*\n\s*')
+# The end of a word that may close a sentence: terminal punctuation, optionally followed by closing quotes/brackets
+SENTENCE_END_PATTERN = re.compile(r'[.!?]+["\'\)\]”’]*(?!\S)')
+TRAILING_PUNCTUATION = '.!?"\')]”’'
+
+# Words ending in "." that do not close a sentence
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "cf",
+    "fig", "no", "vol", "approx", "dept", "inc", "ltd", "co", "jan", "feb", "mar", "apr",
+    "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec", "u.s", "a.m", "p.m"
+})
+
+
+class AnalyzedText:
+    """Tokens, sentences and paragraphs of a text, computed in one pass and shared by every consumer
+
+    words       (start, end) character offsets of each whitespace-delimited word
+    sentences   (first word index, end word index) of each sentence
+    paragraphs  (first sentence index, end sentence index) of each paragraph
+    """
+
+    __slots__ = ("text", "words", "sentences", "paragraphs", "_sentence_texts")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.words: List[Tuple[int, int]] = [match.span() for match in WORD_PATTERN.finditer(text)]
+        self.sentences: List[Tuple[int, int]] = []
+        self.paragraphs: List[Tuple[int, int]] = []
+        self._sentence_texts = None
+
+        words = self.words
+        if not words:
+            return
+        last = len(words) - 1
+
+        # Jump between candidate boundaries instead of testing every word
+        word_ends = [end for _, end in words]
+        paragraph_ends = {
+            bisect_right(word_ends, match.start()) - 1 for match in PARAGRAPH_BREAK.finditer(text)
+        }
+        paragraph_ends.discard(-1)
+        paragraph_ends.add(last)
+        candidates = {bisect_left(word_ends, match.end()) for match in SENTENCE_END_PATTERN.finditer(text)}
+
+        first_word = 0
+        first_sentence = 0
+        for index in sorted(paragraph_ends | candidates):
+            paragraph_end = index in paragraph_ends
+            if paragraph_end or self._ends_sentence(index):
+                self.sentences.append((first_word, index + 1))
+                first_word = index + 1
+            if paragraph_end:
+                self.paragraphs.append((first_sentence, len(self.sentences)))
+                first_sentence = len(self.sentences)
+
+    def _ends_sentence(self, index: int) -> bool:
+        """Whether words[index], which ends in terminal punctuation, closes its sentence"""
+        text = self.text
+        start, end = self.words[index]
+        next_start = self.words[index + 1][0] if index + 1 < len(self.words) else None
+
+        core = text[start:end].rstrip(TRAILING_PUNCTUATION)
+        if text[start + len(core)] != ".":
+            return True  # "!" and "?" always close a sentence
+        if core.lower().lstrip('"\'([“‘') in ABBREVIATIONS:
+            return False
+        if len(core) == 1 and core.isalpha() and core.isupper():
+            return False  # an initial, e.g. "J. Smith"
+        # "... 3 p.m. and then" - a lowercase continuation means the "." was not a boundary
+        return next_start is None or not text[next_start].islower()
+
+    @property
+    def word_count(self) -> int:
+        return len(self.words)
+
+    @property
+    def sentence_count(self) -> int:
+        return len(self.sentences)
+
+    def word(self, index: int) -> str:
+        start, end = self.words[index]
+        return self.text[start:end]
+
+    def sentence_span(self, sentence: Tuple[int, int]) -> Tuple[int, int]:
+        """Character offsets covered by a (first word, end word) sentence"""
+        first, end = sentence
+        return self.words[first][0], self.words[end - 1][1]
+
+    def sentence_texts(self) -> List[str]:
+        """Each sentence as written, including its terminal punctuation"""
+        if self._sentence_texts is None:
+            text = self.text
+            self._sentence_texts = [
+                text[start:end] for start, end in map(self.sentence_span, self.sentences)
+            ]
+        return self._sentence_texts
+
+    def sentence_word_count(self, index: int) -> int:
+        first, end = self.sentences[index]
+        return end - first
+
+    def paragraph_texts(self) -> List[str]:
+        """Each paragraph from its first to its last word"""
+        paragraphs = []
+        for first_sentence, end_sentence in self.paragraphs:
+            start = self.sentence_span(self.sentences[first_sentence])[0]
+            end = self.sentence_span(self.sentences[end_sentence - 1])[1]
+            paragraphs.append(self.text[start:end])
+        return paragraphs
+
+    def average_word_length(self) -> float:
+        if not self.words:
+            return 0.0
+        return sum(end - start for start, end in self.words) / len(self.words)
+
+
+# Small on purpose: each entry holds offsets for a whole document
+@lru_cache(maxsize=8)
+def analyze_text(text: str) -> AnalyzedText:
+    """Analyze text once; repeated calls with the same text (same request/workflow) reuse the result"""
+    return AnalyzedText(text)
+
+
+def strip_terminal_punctuation(sentence: str) -> str:
+    """A sentence without its closing punctuation, for callers that re-punctuate"""
+    return sentence.rstrip(TRAILING_PUNCTUATION).strip()
@@ -1,196 +1,273 @@
-import re
-from typing import Dict, Any
-import html
+import os
+import copy
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from app.services.adaptation_cache import AdaptationCache
+from app.services.adaptation_plans import (
+    ANNOTATION_CLASSES,
+    AdaptationPlan,
+    compile_plan,
+    compile_plans
+)
+from app.services.summarizer import summarizer
+from app.services.text_analysis import PARAGRAPH_BREAK, analyze_text
+
+# (primary disorder, preset) -> inline styles, feature flags and ordered transforms.
+# New presets are new entries here; see adaptation_plans.TRANSFORMS for the transforms.
+PLAN_DEFINITIONS = {
+    ("dyslexia", "severe"): {
+        "css_styles": {
+            "letter-spacing": "4px",
+            "line-height": "3.0",
+            "word-spacing": "12px",
+            "font-family": "OpenDyslexic, 'Comic Sans MS', Arial, sans-serif",
+            "font-size": "120%",
+            "background-color": "#fefce8",
+            "color": "#1f2937",
+            "text-align": "left",
+            "max-width": "60ch",
+            "margin": "0 auto",
+            "padding": "20px"
+        },
+        "features": ["heavy_spacing", "dyslexic_highlighting", "syllable_breaks", "reading_ruler", "tts_enabled"],
+        "transforms": ["dyslexic_letters", "reading_ruler"]
+    },
+    ("dyslexia", "mild"): {
+        "css_styles": {
+            "letter-spacing": "2px",
+            "line-height": "2.2",
+            "word-spacing": "6px",
+            "font-family": "OpenDyslexic, Arial, sans-serif",
+            "background-color": "#fffbeb",
+            "max-width": "70ch",
+            "padding": "15px"
+        },
+        "features": ["moderate_spacing", "dyslexic_highlighting"],
+        "transforms": ["dyslexic_letters"]
+    },
+    ("adhd", "inattentive"): {
+        "css_styles": {},
+        "features": ["word_highlighting"],
+        "transforms": ["every_third_word"]
+    },
+    ("adhd", "hyperactive"): {
+        "css_styles": {"margin-bottom": "20px"},
+        "features": ["sentence_chunking", "word_highlighting", "tldr_available"],
+        "transforms": ["sentence_chunks", "every_third_word"]
+    },
+    ("adhd", "severe"): {
+        "css_styles": {"margin-bottom": "25px"},
+        "features": ["sentence_chunking", "word_highlighting", "tts_enabled", "tldr_available"],
+        "transforms": ["sentence_chunks", "every_third_word"]
+    },
+    ("vision", "mild"): {
+        "css_styles": {
+            "font-size": "125%",
+            "letter-spacing": "1px",
+            "line-height": "1.8"
+        },
+        "features": ["text_enlargement"],
+        "transforms": []
+    },
+    ("vision", "low_vision"): {
+        "css_styles": {
+            "font-size": "150%",
+            "background-color": "white",
+            "color": "black",
+            "letter-spacing": "2px",
+            "line-height": "2.2",
+            "font-weight": "bold"
+        },
+        "features": ["large_text", "high_contrast", "tts_enabled"],
+        "transforms": []
+    }
+}
+
+# Compiled once at import; every request reuses these immutable plans
+PRESET_PLANS = compile_plans(PLAN_DEFINITIONS)
+NORMAL_PLAN = compile_plan("normal", "normal", {"css_styles": {}, "features": [], "transforms": []})
+
+ANNOTATION_ENCODINGS = ("ranges", "delta")
+
+
+def _presets(*presets: Optional[str]) -> Tuple[str, ...]:
+    """A missing preset (e.g. severity: null from the OCR routes) means no adaptation for that disorder"""
+    return tuple(preset or "normal" for preset in presets)
+
 
 class TextAdaptationService:
     
+    def __init__(self):
+        self.cache = AdaptationCache(
+            max_bytes=int(os.getenv("ADAPTATION_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+        )
+
     def adapt_text(self, text: str, dyslexia_preset: str = "normal", 
                    adhd_preset: str = "normal", vision_preset: str = "normal") -> Dict[str, Any]:
-        """Apply text adaptations based on presets - single disorder focus"""
+        """Apply text adaptations based on presets - single disorder focus
+
+        Results are cached by content hash; callers get their own copy to modify.
+        """
+        dyslexia_preset, adhd_preset, vision_preset = _presets(dyslexia_preset, adhd_preset, vision_preset)
+        key = AdaptationCache.make_key(text, dyslexia_preset, adhd_preset, vision_preset)
+        result = self.cache.get_or_compute(
+            key, lambda: self._adapt_text_uncached(text, dyslexia_preset, adhd_preset, vision_preset)
+        )
+        return copy.deepcopy(result)
+
+    def _adapt_text_uncached(self, text: str, dyslexia_preset: str, adhd_preset: str,
+                             vision_preset: str) -> Dict[str, Any]:
+        """Compute the adaptation for a single disorder preset"""
+        plan = self.get_plan(dyslexia_preset, adhd_preset, vision_preset)
+        return {
+            "adapted_text": plan.render_html(analyze_text(text)),
+            **plan.metadata()
+        }
+
+    def annotate_text(self, text: str, dyslexia_preset: str = "normal", adhd_preset: str = "normal",
+                      vision_preset: str = "normal", encoding: str = "ranges") -> Dict[str, Any]:
+        """Describe the adaptation as offset annotations over the original text
         
-        adapted_text = text
-        css_styles = {}
-        features = []
-        primary_disorder = "normal"
+        Instead of inline HTML spans, the text is returned once alongside
+        (start, end, class) ranges; zero-width ranges mark syllable breaks.
+        With the "delta" encoding the ranges are flattened to
+        [start delta, length, class index, ...] triples.
+        """
+        if encoding not in ANNOTATION_ENCODINGS:
+            raise ValueError(f"Unknown annotation encoding: {encoding}")
+
+        dyslexia_preset, adhd_preset, vision_preset = _presets(dyslexia_preset, adhd_preset, vision_preset)
+        key = AdaptationCache.make_key(text, dyslexia_preset, adhd_preset, vision_preset, "annotations", encoding)
+        result = self.cache.get_or_compute(
+            key, lambda: self._annotate_text_uncached(text, dyslexia_preset, adhd_preset, vision_preset, encoding)
+        )
+        return copy.deepcopy(result)
+
+    def _annotate_text_uncached(self, text: str, dyslexia_preset: str, adhd_preset: str,
+                                vision_preset: str, encoding: str) -> Dict[str, Any]:
+        """Compute the annotation ranges for a single disorder preset"""
+        plan = self.get_plan(dyslexia_preset, adhd_preset, vision_preset)
+        annotations = plan.annotate(analyze_text(text))
         
+        if encoding == "delta":
+            annotations = self._delta_encode(annotations)
+        else:
+            annotations = [list(annotation) for annotation in annotations]
+
+        return {
+            "text": text,
+            "annotations": annotations,
+            "annotation_classes": list(ANNOTATION_CLASSES),
+            "encoding": encoding,
+            **plan.metadata()
+        }
+
+    def get_plan(self, dyslexia_preset: str = "normal", adhd_preset: str = "normal",
+                 vision_preset: str = "normal") -> AdaptationPlan:
+        """Pick the compiled plan for the single primary disorder"""
         # Determine primary disorder (only one at a time)
         if dyslexia_preset != "normal":
-            primary_disorder = "dyslexia"
+            key = ("dyslexia", dyslexia_preset)
         elif adhd_preset != "normal":
-            primary_disorder = "adhd"
+            key = ("adhd", adhd_preset)
         elif vision_preset != "normal":
-            primary_disorder = "vision"
+            key = ("vision", vision_preset)
+        else:
+            return NORMAL_PLAN
         
-        # Apply adaptations for single disorder only
-        if primary_disorder == "dyslexia":
-            if dyslexia_preset == "severe":
-                css_styles.update({
-                    "letter-spacing": "4px",
-                    "line-height": "3.0",
-                    "word-spacing": "12px",
-                    "font-family": "OpenDyslexic, 'Comic Sans MS', Arial, sans-serif",
-                    "font-size": "120%",
-                    "background-color": "#fefce8",
-                    "color": "#1f2937",
-                    "text-align": "left",
-                    "max-width": "60ch",
-                    "margin": "0 auto",
-                    "padding": "20px"
-                })
-                adapted_text = self.highlight_dyslexic_letters(adapted_text)
-                adapted_text = self.add_reading_ruler(adapted_text)
-                features.extend(["heavy_spacing", "dyslexic_highlighting", "syllable_breaks", "reading_ruler", "tts_enabled"])
-            elif dyslexia_preset == "mild":
-                css_styles.update({
-                    "letter-spacing": "2px",
-                    "line-height": "2.2",
-                    "word-spacing": "6px",
-                    "font-family": "OpenDyslexic, Arial, sans-serif",
-                    "background-color": "#fffbeb",
-                    "max-width": "70ch",
-                    "padding": "15px"
-                })
-                adapted_text = self.highlight_dyslexic_letters(adapted_text)
-                features.extend(["moderate_spacing", "dyslexic_highlighting"])
+        return PRESET_PLANS.get(key, NORMAL_PLAN)
+
+    def adapt_text_stream(self, text: str, dyslexia_preset: str = "normal",
+                          adhd_preset: str = "normal", vision_preset: str = "normal") -> Iterator[Dict[str, Any]]:
+        """Adapt text paragraph by paragraph, yielding each block as soon as it is ready
         
-        elif primary_disorder == "adhd":
-            if adhd_preset == "inattentive":
-                adapted_text = self.highlight_every_third_word(adapted_text)
-                features.append("word_highlighting")
-            elif adhd_preset == "hyperactive":
-                adapted_text = self.chunk_sentences(adapted_text)
-                adapted_text = self.highlight_every_third_word(adapted_text)
-                css_styles["margin-bottom"] = "20px"
-                features.extend(["sentence_chunking", "word_highlighting", "tldr_available"])
-            elif adhd_preset == "severe":
-                adapted_text = self.chunk_sentences(adapted_text)
-                adapted_text = self.highlight_every_third_word(adapted_text)
-                css_styles["margin-bottom"] = "25px"
-                features.extend(["sentence_chunking", "word_highlighting", "tts_enabled", "tldr_available"])
+        The first frame carries the CSS and feature metadata, followed by one frame per
+        adapted paragraph and a final "end" frame.
+        """
+        presets = _presets(dyslexia_preset, adhd_preset, vision_preset)
+        plan = self.get_plan(*presets)
+        yield {"type": "metadata", **plan.metadata()}
         
-        elif primary_disorder == "vision":
-            if vision_preset == "mild":
-                css_styles.update({
-                    "font-size": "125%",
-                    "letter-spacing": "1px",
-                    "line-height": "1.8"
-                })
-                features.append("text_enlargement")
-            elif vision_preset == "low_vision":
-                css_styles.update({
-                    "font-size": "150%",
-                    "background-color": "white",
-                    "color": "black",
-                    "letter-spacing": "2px",
-                    "line-height": "2.2",
-                    "font-weight": "bold"
-                })
-                features.extend(["large_text", "high_contrast", "tts_enabled"])
+        block_count = 0
+        for block in self._adapt_blocks(text, presets):
+            yield {"type": "block", **block}
+            block_count += 1
         
-        return {
-            "adapted_text": adapted_text,
-            "css_styles": css_styles,
-            "features": features,
-            "primary_disorder": primary_disorder,
-            "tts_enabled": "tts_enabled" in features,
-            "tldr_available": "tldr_available" in features
-        }
+        yield {"type": "end", "block_count": block_count}
     
-    def highlight_dyslexic_letters(self, text: str) -> str:
-        """Apply comprehensive dyslexia adaptations"""
-        text = html.escape(text)
+    def _adapt_blocks(self, text: str, presets: Tuple[str, ...], known_blocks=frozenset()) -> Iterator[Dict[str, Any]]:
+        """Adapt text paragraph by paragraph as parts of one document
         
-        # 1. Highlight mirror letters (b/d, p/q, m/w, n/u)
-        mirror_pairs = [('b', 'd'), ('p', 'q'), ('m', 'w'), ('n', 'u')]
-        for pair in mirror_pairs:
-            for letter in pair:
-                text = text.replace(letter, f'<span class="dyslexic-mirror">{letter}</span>')
-                text = text.replace(letter.upper(), f'<span class="dyslexic-mirror">{letter.upper()}</span>')
-        
-        # 2. Color-code vowels for easier recognition
-        vowels = ['a', 'e', 'i', 'o', 'u']
-        for vowel in vowels:
-            text = text.replace(vowel, f'<span class="dyslexic-vowel">{vowel}</span>')
-            text = text.replace(vowel.upper(), f'<span class="dyslexic-vowel">{vowel.upper()}</span>')
+        Word highlighting and sentence alternation continue from one paragraph
+        to the next, so the blocks render exactly what adapt_text renders for
+        the whole text. A block id hashes the paragraph, the presets and where
+        that count stands when the paragraph starts: a paragraph whose
+        predecessors changed length gets a new id. Known blocks are not rendered.
+        """
+        plan = self.get_plan(*presets)
+        words = sentences = 0
+        for index, paragraph in enumerate(self.iter_paragraphs(text)):
+            analysis = analyze_text(paragraph)
+            continuation = plan.continuation(words, sentences)
+            block_id = AdaptationCache.make_key(paragraph, *presets, "block", "%d:%d" % continuation)
+            block = {"index": index, "id": block_id}
+            if block_id not in known_blocks:
+                block["adapted_text"] = self.cache.get_or_compute(
+                    block_id, lambda: {"adapted_text": plan.render_html(analysis, *continuation)}
+                )["adapted_text"]
+            yield block
+            words += analysis.word_count
+            sentences += analysis.sentence_count
+
+    def adapt_text_incremental(self, text: str, dyslexia_preset: str = "normal", adhd_preset: str = "normal",
+                               vision_preset: str = "normal", known_blocks: List[str] = ()) -> Dict[str, Any]:
+        """Re-adapt only the paragraphs the client does not already have
         
-        # 3. Break long words with syllable markers
-        words = text.split(' ')
-        processed_words = []
-        for word in words:
-            clean_word = re.sub(r'<[^>]+>', '', word)
-            if len(clean_word) > 6:  # Long words
-                syllables = self._break_into_syllables(word)
-                processed_words.append('<span class="dyslexic-syllables">' + '·'.join(syllables) + '</span>')
-            else:
-                processed_words.append(word)
+        Each paragraph block is identified by the content hash of (paragraph, presets,
+        highlighting position); an edit that changes a paragraph's word or sentence
+        count therefore also renews the blocks after it whose rendering shifts.
+        Blocks listed in known_blocks are returned as bare ids for the client to keep;
+        only new or shifted blocks carry adapted HTML (and those reuse the result cache).
+        """
+        presets = _presets(dyslexia_preset, adhd_preset, vision_preset)
+        plan = self.get_plan(*presets)
+        blocks = list(self._adapt_blocks(text, presets, set(known_blocks)))
+        changed = sum(1 for block in blocks if "adapted_text" in block)
         
-        return ' '.join(processed_words)
+        return {
+            "blocks": blocks,
+            "changed_blocks": changed,
+            "reused_blocks": len(blocks) - changed,
+            **plan.metadata()
+        }
     
-    def highlight_every_third_word(self, text: str) -> str:
-        """Highlight every third word for ADHD focus"""
-        # Escape HTML to prevent XSS
-        text = html.escape(text)
-        words = text.split()
-        for i in range(2, len(words), 3):  # Every 3rd word (0-indexed)
-            words[i] = f'<span class="adhd-highlight">{words[i]}</span>'
-        return ' '.join(words)
+    def iter_paragraphs(self, text: str) -> Iterator[str]:
+        """Lazily yield the non-empty paragraphs of text (separated by blank lines)"""
+        start = 0
+        for match in PARAGRAPH_BREAK.finditer(text):
+            paragraph = text[start:match.start()].strip()
+            if paragraph:
+                yield paragraph
+            start = match.end()
+        paragraph = text[start:].strip()
+        if paragraph:
+            yield paragraph
     
-    def chunk_sentences(self, text: str) -> str:
-        """Add spacing between sentences for ADHD readers"""
-        sentences = re.split(r'([.!?]+)', text)
-        chunked = []
-        for i in range(0, len(sentences)-1, 2):
-            if i+1 < len(sentences):
-                sentence = sentences[i] + sentences[i+1]
-                chunked.append(f'<div class="sentence-chunk">{sentence.strip()}</div>')
-        return ''.join(chunked)
+    def _delta_encode(self, annotations: list) -> list:
+        """Flatten sorted ranges into [start delta, length, class index, ...]"""
+        encoded = []
+        previous_start = 0
+        for start, end, class_index in annotations:
+            encoded.extend((start - previous_start, end - start, class_index))
+            previous_start = start
+        return encoded
     
     def generate_tldr(self, text: str) -> str:
-        """Generate simple TL;DR summary"""
-        sentences = re.split(r'[.!?]+', text)
-        # Simple heuristic: take first and last meaningful sentences
-        meaningful_sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
-        if len(meaningful_sentences) >= 2:
-            return f"TL;DR: {meaningful_sentences[0]}. {meaningful_sentences[-1]}."
-        elif len(meaningful_sentences) == 1:
-            return f"TL;DR: {meaningful_sentences[0]}."
+        """Generate TL;DR summary from the two most central meaningful sentences"""
+        key_sentences = summarizer.summarize(analyze_text(text), max_sentences=2, min_chars=20)
+        if key_sentences:
+            return "TL;DR: " + " ".join(key_sentences)
         return "TL;DR: " + text[:100] + "..."
     
-    def _break_into_syllables(self, word: str) -> list:
-        """Simple syllable breaking for dyslexic readers"""
-        clean_word = re.sub(r'<[^>]+>', '', word)
-        if len(clean_word) <= 3:
-            return [word]
-        
-        syllables = []
-        current = ""
-        for i, char in enumerate(clean_word):
-            current += char
-            if char.lower() in 'aeiou' and i < len(clean_word) - 1:
-                if len(current) >= 2:
-                    syllables.append(current)
-                    current = ""
-        
-        if current:
-            if syllables:
-                syllables[-1] += current
-            else:
-                syllables.append(current)
-        
-        return syllables if len(syllables) > 1 else [word]
-    
-    def add_reading_ruler(self, text: str) -> str:
-        """Add reading ruler guides for dyslexic readers"""
-        sentences = re.split(r'([.!?]+)', text)
-        ruler_text = []
-        for i, sentence in enumerate(sentences):
-            if sentence.strip() and not re.match(r'^[.!?]+$', sentence):
-                ruler_class = "reading-line-odd" if i % 2 == 0 else "reading-line-even"
-                ruler_text.append(f'<div class="{ruler_class}">{sentence.strip()}</div>')
-            elif sentence.strip():
-                ruler_text.append(sentence)
-        return ''.join(ruler_text)
-    
     def apply_single_disorder_preset(self, text: str, disorder: str, severity: str) -> Dict[str, Any]:
         """Apply preset for single disorder only"""
         if disorder == "dyslexia":
@@ -202,4 +279,13 @@ class TextAdaptationService:
         else:
             return self.adapt_text(text)
 
-text_service = TextAdaptationService()
\ No newline at end of file
+text_service = TextAdaptationService()
+
+
+def adapt_text_worker(text: str, dyslexia_preset: str, adhd_preset: str, vision_preset: str) -> Dict[str, Any]:
+    """Process-pool entry point: adapt one document inside a worker process"""
+    return text_service._adapt_text_uncached(text, dyslexia_preset, adhd_preset, vision_preset)
+
+def tldr_worker(text: str) -> str:
+    """Process-pool entry point: TL;DR for one document inside a worker process"""
+    return text_service.generate_tldr(text)
@@ -0,0 +1,72 @@
+"""
+forest_benchmark.py
+Single-row and batch latency of scikit-learn's predict_proba vs. the
+compiled flat-array forest for the dyslexia and ADHD models, plus an exact
+equality check of the probabilities on random and on-threshold inputs.
+
+Run from backend/:  python -m benchmarks.forest_benchmark [rows]
+"""
+
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from app.services.forest_compiler import compile_forest, probe_inputs
+from app.services.ml_service import ml_service
+
+SINGLE_ROW_RUNS = 2000
+SKLEARN_SINGLE_ROW_RUNS = 200
+
+
+def latencies_us(predict, rows: np.ndarray, runs: int) -> list:
+    samples = []
+    for i in range(runs):
+        row = rows[i % len(rows)][np.newaxis, :]
+        started = time.perf_counter()
+        predict(row)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return sorted(samples)
+
+
+def percentile(samples: list, fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def benchmark(name: str, model, batch_rows: int):
+    started = time.perf_counter()
+    compiled = compile_forest(model)
+    compile_ms = (time.perf_counter() - started) * 1000
+    rows = probe_inputs(compiled, n_rows=batch_rows, seed=1)
+
+    expected = model.predict_proba(rows)
+    identical = np.array_equal(expected, compiled.predict_proba(rows)) and all(
+        np.array_equal(expected[i:i + 1], compiled.predict_proba(rows[i:i + 1])) for i in range(min(256, len(rows)))
+    )
+
+    print(f"\n{name}: {compiled.n_trees} trees, {compiled.n_nodes} nodes, depth {compiled.max_depth}, "
+          f"compiled in {compile_ms:.1f} ms")
+    print(f"  probabilities identical to scikit-learn on {len(rows)} rows: {identical}")
+    for label, predict, runs in (
+        ("scikit-learn", model.predict_proba, SKLEARN_SINGLE_ROW_RUNS),
+        ("compiled", compiled.predict_proba, SINGLE_ROW_RUNS),
+    ):
+        samples = latencies_us(predict, rows, runs)
+        print(f"  single row {label:<14}p50 {percentile(samples, 0.5):9.1f} us   p99 {percentile(samples, 0.99):9.1f} us")
+    for label, predict in (("scikit-learn", model.predict_proba), ("compiled", compiled.predict_proba)):
+        started = time.perf_counter()
+        predict(rows)
+        print(f"  batch of {len(rows)} {label:<14}{(time.perf_counter() - started) * 1000:9.1f} ms")
+
+
+def main():
+    batch_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    # Models fitted on DataFrames warn on every ndarray call; that noise is not what is measured
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    benchmark("dyslexia", ml_service.dyslexia_model, batch_rows)
+    benchmark("adhd", ml_service.adhd_model, batch_rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+hyphenation_benchmark.py
+Words/sec of the old vowel-counting syllable splitter vs. the pattern
+hyphenator (cold and memoized), plus a sample of the splits each produces.
+
+Run from backend/:  python -m benchmarks.hyphenation_benchmark [corpus.txt ...]
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+from app.services.hyphenation import Hyphenator
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[2] / "README.md"
+SAMPLE_WORDS = [
+    "understanding", "accessibility", "comprehension", "information",
+    "individuals", "challenging", "distinguish", "hyphenation",
+    "assessment", "dyslexia", "adaptation", "questionnaire"
+]
+
+
+def vowel_count_syllables(word: str) -> list:
+    """The previous TextAdaptationService._break_into_syllables, kept as the baseline"""
+    if len(word) <= 3:
+        return [word]
+
+    syllables = []
+    current = ""
+    for i, char in enumerate(word):
+        current += char
+        if char.lower() in 'aeiou' and i < len(word) - 1:
+            if len(current) >= 2:
+                syllables.append(current)
+                current = ""
+
+    if current:
+        if syllables:
+            syllables[-1] += current
+        else:
+            syllables.append(current)
+
+    return syllables if len(syllables) > 1 else [word]
+
+
+def load_words(paths: list) -> list:
+    """Long words (> 6 chars, as highlight_dyslexic_letters selects them) from the corpus"""
+    text = " ".join(Path(path).read_text(encoding="utf-8", errors="ignore") for path in paths)
+    return [word for word in re.findall(r"\S+", text) if len(word) > 6]
+
+
+def words_per_second(split, words: list, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for word in words:
+            split(word)
+    return len(words) * repeat / (time.perf_counter() - started)
+
+
+def main():
+    paths = sys.argv[1:] or [DEFAULT_CORPUS]
+    words = load_words(paths)
+    if not words:
+        print("Corpus contains no words longer than 6 characters")
+        return
+    repeat = max(1, 200000 // len(words))
+
+    started = time.perf_counter()
+    hyphenator = Hyphenator()
+    load_ms = (time.perf_counter() - started) * 1000
+
+    print(f"Corpus: {len(words)} long words ({len(set(words))} distinct), x{repeat} passes")
+    print(f"Pattern trie: {hyphenator.pattern_count} patterns loaded in {load_ms:.1f} ms")
+    print(f"{'vowel counting (before)':<28}{words_per_second(vowel_count_syllables, words, repeat):>14,.0f} words/sec")
+    print(f"{'patterns, uncached':<28}{words_per_second(hyphenator._syllables_uncached, words, repeat):>14,.0f} words/sec")
+    hyphenator.syllables.cache_clear()
+    print(f"{'patterns, memoized':<28}{words_per_second(hyphenator.syllables, words, repeat):>14,.0f} words/sec")
+    print(f"Cache: {hyphenator.cache_stats()}")
+
+    print("\nSample splits (before -> after):")
+    for word in SAMPLE_WORDS:
+        before = "·".join(vowel_count_syllables(word))
+        after = "·".join(hyphenator.syllables(word))
+        print(f"  {word:<16}{before:<24}{after}")
+
+
+if __name__ == "__main__":
+    main()
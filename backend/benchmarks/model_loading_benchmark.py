@@ -0,0 +1,76 @@
+"""
+model_loading_benchmark.py
+Cold-start time and per-worker memory of MLService when the forests are
+unpickled in every process vs. when the pre-built node arrays are memory
+mapped. Each mode starts N fresh worker processes side by side, so shared
+(mapped) pages show up in RSS but not in the private/proportional figures.
+Build the arrays first with: python train_kaggle_models.py --artifacts-only
+
+Run from backend/:  python -m benchmarks.model_loading_benchmark [workers]
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+WORKER = r"""
+import json, sys, time
+started = time.perf_counter()
+from app.services.ml_service import ml_service
+ml_service.predict_dyslexia(0.5, 0.5)
+ml_service.predict_adhd([1] * 9, [2] * 9)
+elapsed = time.perf_counter() - started
+
+memory = {}
+with open("/proc/self/smaps_rollup") as f:
+    for line in f:
+        key, _, value = line.partition(":")
+        if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+            memory[key] = int(value.split()[0])
+print(json.dumps({"seconds": elapsed, **memory}))
+sys.stdout.flush()
+sys.stdin.read()  # stay alive until every worker has measured, so mapped pages are really shared
+"""
+
+
+def run_workers(n_workers: int, mmap_models: bool) -> list:
+    env = dict(os.environ, ML_MMAP_MODELS="true" if mmap_models else "false")
+    workers = [
+        subprocess.Popen([sys.executable, "-c", WORKER], env=env, text=True,
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        for _ in range(n_workers)
+    ]
+    results = []
+    for worker in workers:
+        # Only the JSON line matters; MLService prints its own status messages first
+        for line in worker.stdout:
+            if line.startswith("{"):
+                results.append(json.loads(line))
+                break
+    for worker in workers:
+        worker.communicate("")
+    return results
+
+
+def mean(results: list, key: str) -> float:
+    return sum(result[key] for result in results) / len(results)
+
+
+def main():
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("This benchmark reads /proc/self/smaps_rollup and needs Linux")
+        return
+    n_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    print(f"{n_workers} workers per mode, means per worker")
+    print(f"{'mode':<10}{'cold start':>12}{'RSS':>12}{'PSS':>12}{'private':>12}")
+    for label, mmap_models in (("pickle", False), ("mmap", True)):
+        results = run_workers(n_workers, mmap_models)
+        private = mean(results, "Private_Clean") + mean(results, "Private_Dirty")
+        print(f"{label:<10}{mean(results, 'seconds') * 1000:>9.0f} ms"
+              f"{mean(results, 'Rss') / 1024:>9.1f} MB{mean(results, 'Pss') / 1024:>9.1f} MB"
+              f"{private / 1024:>9.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
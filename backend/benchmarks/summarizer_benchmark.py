@@ -0,0 +1,74 @@
+"""
+summarizer_benchmark.py
+Latency of the local TextRank summarizer against its budget (20 ms for a
+10k-word document), split into text analysis and ranking, plus the TL;DR
+it produces for the corpus.
+
+Run from backend/:  python -m benchmarks.summarizer_benchmark [corpus.txt ...]
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+from app.services.summarizer import ExtractiveSummarizer
+from app.services.text_analysis import AnalyzedText
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[2] / "README.md"
+TARGET_WORDS = 10000
+BUDGET_MS = 20.0
+RUNS = 30
+
+
+def load_document(paths: list, target_words: int) -> str:
+    """Repeat the corpus paragraphs until the document reaches target_words"""
+    text = "\n\n".join(Path(path).read_text(encoding="utf-8", errors="ignore") for path in paths)
+    paragraphs = [paragraph for paragraph in re.split(r"\n\s*\n", text) if paragraph.strip()]
+    document = []
+    words = 0
+    while paragraphs and words < target_words:
+        for paragraph in paragraphs:
+            document.append(paragraph)
+            words += len(paragraph.split())
+            if words >= target_words:
+                break
+    return "\n\n".join(document)
+
+
+def percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    paths = sys.argv[1:] or [DEFAULT_CORPUS]
+    document = load_document(paths, TARGET_WORDS)
+    if not document:
+        print("Corpus is empty")
+        return
+
+    summarizer = ExtractiveSummarizer()
+    analysis_ms = []
+    ranking_ms = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        analysis = AnalyzedText(document)
+        analyzed = time.perf_counter()
+        selected = summarizer.summarize(analysis, max_sentences=2, min_chars=20)
+        finished = time.perf_counter()
+        analysis_ms.append((analyzed - started) * 1000)
+        ranking_ms.append((finished - analyzed) * 1000)
+
+    totals = [a + r for a, r in zip(analysis_ms, ranking_ms)]
+    print(f"Document: {analysis.word_count} words, {analysis.sentence_count} sentences, {RUNS} runs")
+    print(f"{'text analysis':<20}p50 {percentile(analysis_ms, 0.5):7.2f} ms   p95 {percentile(analysis_ms, 0.95):7.2f} ms")
+    print(f"{'textrank':<20}p50 {percentile(ranking_ms, 0.5):7.2f} ms   p95 {percentile(ranking_ms, 0.95):7.2f} ms")
+    print(f"{'total':<20}p50 {percentile(totals, 0.5):7.2f} ms   p95 {percentile(totals, 0.95):7.2f} ms")
+    verdict = "within" if percentile(totals, 0.5) <= BUDGET_MS else "OVER"
+    print(f"Budget {BUDGET_MS:.0f} ms: {verdict}")
+    print("\nTL;DR: " + " ".join(selected))
+
+
+if __name__ == "__main__":
+    main()
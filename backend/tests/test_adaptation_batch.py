@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+from app.api import adaptation
+from app.models.predictions import BatchTextAdaptation
+from app.services.executors import BoundedExecutor
+
+
+def test_closing_the_batch_stream_cancels_pending_documents(monkeypatch):
+    adapted = []
+    second_started = threading.Event()
+    release = threading.Event()
+
+    def slow_worker(text, *presets):
+        # The first document is adapted at once; the second holds the only worker until the client has gone
+        if adapted:
+            second_started.set()
+            assert release.wait(10)
+        adapted.append(text)
+        return {"adapted_text": text, "tldr_available": False}
+
+    executor = BoundedExecutor("test_batch", "thread", 1, 100)
+    monkeypatch.setattr(adaptation, "adaptation_batch_executor", executor)
+    monkeypatch.setattr(adaptation, "adapt_text_worker", slow_worker)
+    request = BatchTextAdaptation(texts=[f"document {index}" for index in range(20)], stream=True)
+
+    async def read_one_then_disconnect():
+        response = await adaptation.adapt_batch(request)
+        lines = response.body_iterator
+        first = await lines.__anext__()
+        assert second_started.wait(10)
+        await lines.aclose()
+        # As on a server, the loop keeps running: the cancellations reach the pool on its next turns
+        for _ in range(100):
+            if not executor.stats()["queued"]:
+                break
+            await asyncio.sleep(0)
+        release.set()
+        return first
+
+    assert '"success": true' in asyncio.run(read_one_then_disconnect())
+    executor.shutdown(wait=True)
+    assert adapted == ["document 0", "document 1"]
+    assert executor.stats()["active"] + executor.stats()["queued"] == 0
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import ocr
+from app.services.adaptation_cache import AdaptationCache
+from app.services.text_service import text_service
+
+TEXT = "The quick brown fox jumps over the lazy dog. It was not amused by the dog at all."
+
+
+def test_make_key_separates_text_and_presets():
+    key = AdaptationCache.make_key(TEXT, "mild", "normal", "normal")
+    assert key == AdaptationCache.make_key(TEXT, "mild", "normal", "normal")
+    assert key != AdaptationCache.make_key(TEXT, "normal", "mild", "normal")
+    assert key != AdaptationCache.make_key(TEXT + " ", "mild", "normal", "normal")
+    # Presets are delimited, so they cannot run into each other
+    assert AdaptationCache.make_key("", "ab", "c") != AdaptationCache.make_key("", "a", "bc")
+
+
+def test_get_or_compute_collapses_concurrent_misses():
+    cache = AdaptationCache(max_bytes=1 << 20)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"adapted_text": "done"}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"adapted_text": "done"}] * 8
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] + stats["collapsed"] == 7
+
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = AdaptationCache(max_bytes=4000)
+    for index in range(10):
+        cache.put(str(index), {"adapted_text": "x" * 100})
+    stats = cache.stats()
+    assert stats["bytes"] <= 4000
+    assert stats["evictions"] > 0
+    assert cache.get("9") is not None
+    assert cache.get("0") is None
+
+
+def test_missing_preset_is_normal():
+    expected = text_service.adapt_text(TEXT, "normal", "normal", "normal")
+    assert text_service.adapt_text(TEXT, dyslexia_preset=None) == expected
+    assert text_service.annotate_text(TEXT, None, None, None) == text_service.annotate_text(TEXT)
+
+
+def test_extract_and_adapt_with_null_severity(monkeypatch):
+    monkeypatch.setattr(ocr.ocr_service, "extract_text_from_base64", lambda image: {
+        "success": True, "extracted_text": TEXT, "character_count": len(TEXT),
+        "word_count": len(TEXT.split()), "confidence": 0.9
+    })
+    app = FastAPI()
+    app.include_router(ocr.router, prefix="/api/ocr")
+
+    response = TestClient(app).post("/api/ocr/extract-and-adapt", json={
+        "image_base64": "aGVsbG8=", "disorder_type": "dyslexia", "severity": None
+    })
+
+    assert response.status_code == 200
+    assert response.json()["adaptation_result"]["adapted_text"] == TEXT
@@ -0,0 +1,102 @@
+import threading
+
+import numpy as np
+import pytest
+
+from app.services import drift_stats
+from app.services.drift_stats import DriftStats
+
+FEATURES = [("speed", 0.0, 1.0), ("survey_score", 0.0, 2.0)]
+PRESETS = {0: "severe", 1: "mild", 2: "none"}
+
+
+def scored_batches(n_batches, rows_per_batch, seed=0):
+    rng = np.random.default_rng(seed)
+    batches = []
+    for _ in range(n_batches):
+        features = rng.uniform(-0.2, 2.2, (rows_per_batch, 2))
+        features[rng.random(rows_per_batch) < 0.05, 0] = np.nan
+        features[0, 0] = 1.0  # the upper edge falls in the last bin
+        labels = rng.integers(0, 4, rows_per_batch)  # 3 is not a known class
+        confidences = rng.random(rows_per_batch)
+        confidences[0] = 1.0
+        batches.append((features, labels, confidences))
+    return batches
+
+
+def expected_snapshot(batches, n_bins):
+    features = np.concatenate([batch for batch, _, _ in batches])
+    labels = np.concatenate([batch for _, batch, _ in batches])
+    confidences = np.concatenate([batch for _, _, batch in batches])
+    rows = len(features)
+    expected = {}
+    for index, (feature, low, high) in enumerate(FEATURES):
+        column = features[:, index]
+        in_range = (column >= low) & (column <= high)
+        finite = np.where(np.isfinite(column), column, 0.0)
+        mean = finite.sum() / rows
+        expected[feature] = {
+            "bins": np.histogram(column[in_range], bins=n_bins, range=(low, high))[0].tolist(),
+            "out_of_range": int(rows - in_range.sum()),
+            "mean": round(float(mean), 4),
+            "std": round(float(np.sqrt(max((finite * finite).sum() / rows - mean * mean, 0.0))), 4)
+        }
+    predictions = {PRESETS[label]: int((labels == label).sum()) for label in range(3)}
+    predictions["other"] = int((labels == 3).sum())
+    confidence_bins = np.histogram(confidences, bins=drift_stats.CONFIDENCE_BINS, range=(0.0, 1.0))[0].tolist()
+    return rows, expected, predictions, confidence_bins
+
+
+def assert_matches(snapshot, batches, n_bins):
+    rows, expected, predictions, confidence_bins = expected_snapshot(batches, n_bins)
+    assert snapshot["rows"] == rows
+    for feature, values in expected.items():
+        assert {key: snapshot["features"][feature][key] for key in values} == values
+    assert snapshot["predictions"] == predictions
+    assert snapshot["confidence_bins"] == confidence_bins
+
+
+@pytest.mark.parametrize("flush_rows", [1, 50, 10 ** 9])
+def test_folded_and_pending_rows_count_alike(monkeypatch, flush_rows):
+    # 1 folds every batch, 50 folds every few batches and leaves some pending, 10**9 never folds
+    monkeypatch.setattr(drift_stats, "FLUSH_ROWS", flush_rows)
+    stats = DriftStats("dyslexia", FEATURES, 10, 3)
+    batches = scored_batches(23, 7)
+    for batch in batches:
+        stats.observe(*batch)
+    assert_matches(stats.snapshot(PRESETS), batches, 10)
+
+
+def test_threads_keep_separate_shards(monkeypatch):
+    monkeypatch.setattr(drift_stats, "FLUSH_ROWS", 30)
+    stats = DriftStats("dyslexia", FEATURES, 8, 3)
+    per_thread = [scored_batches(40, 5, seed) for seed in range(4)]
+    threads = [threading.Thread(target=lambda batches=batches: [stats.observe(*batch) for batch in batches])
+               for batches in per_thread]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(stats._shards) == 4
+    assert_matches(stats.snapshot(PRESETS), [batch for batches in per_thread for batch in batches], 8)
+
+
+def test_quartiles_and_prometheus_lines():
+    stats = DriftStats("dyslexia", FEATURES, 10, 3)
+    speed = np.linspace(0.0, 1.0, 1001)
+    stats.observe(np.column_stack([speed, speed]), np.zeros(1001, dtype=int), np.full(1001, 0.5))
+
+    quartiles = stats.snapshot(PRESETS)["features"]["speed"]["quartiles"]
+    assert quartiles == pytest.approx([0.25, 0.5, 0.75], abs=0.01)
+    lines = stats.prometheus_lines(PRESETS)
+    assert 'readapt_drift_rows{model="dyslexia"} 1001' in lines
+    assert 'readapt_drift_predictions{model="dyslexia",class="severe"} 1001' in lines
+
+
+def test_empty_batches_are_ignored():
+    stats = DriftStats("dyslexia", FEATURES, 10, 3)
+    stats.observe(np.empty((0, 2)), np.empty(0, dtype=int), np.empty(0))
+    snapshot = stats.snapshot(PRESETS)
+    assert snapshot["rows"] == 0
+    assert snapshot["features"]["speed"]["quartiles"] == [None, None, None]
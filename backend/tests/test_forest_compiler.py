@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.services.forest_compiler import (
+    compile_forest, load_compiled_forest, probe_inputs, save_compiled_forest, verify_compiled_forest
+)
+
+
+def fitted_forest(max_depth=None, n_rows=400, n_features=4, n_classes=3, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.random((n_rows, n_features))
+    X[:, -1] = 0.5  # a constant column no tree splits on
+    y = rng.integers(0, n_classes, n_rows)
+    return RandomForestClassifier(n_estimators=20, max_depth=max_depth, random_state=seed).fit(X, y)
+
+
+def assert_same_probabilities(actual, expected):
+    # Bit-identical with the pinned scikit-learn 1.3 (requirements.txt); later releases accumulate the
+    # trees' probabilities differently, which moves the last bits
+    assert np.allclose(actual, expected, rtol=0, atol=1e-6)
+
+
+# Sparse trees score single rows across the whole forest at once; bushy ones go level by level
+@pytest.mark.parametrize("max_depth, n_rows, whole_forest", [(3, 400, True), (None, 400, True), (8, 2000, False)])
+def test_compiled_probabilities_equal_sklearn(max_depth, n_rows, whole_forest):
+    model = fitted_forest(max_depth, n_rows)
+    compiled = compile_forest(model)
+    assert compiled._whole_forest_single == whole_forest
+    X = probe_inputs(compiled)
+
+    expected = model.predict_proba(X)
+    assert_same_probabilities(compiled.predict_proba(X), expected)
+    for row, probabilities in zip(X[:64], expected[:64]):
+        assert_same_probabilities(compiled.predict_proba(row[np.newaxis, :])[0], probabilities)
+    assert np.array_equal(compiled.predict(X), model.predict(X))
+    assert verify_compiled_forest(model, compiled) <= 1e-6
+
+
+def test_saved_forest_maps_back_identically(tmp_path):
+    model = fitted_forest()
+    compiled = compile_forest(model)
+    save_compiled_forest(compiled, str(tmp_path / "forest"), {"name": "test"})
+
+    loaded, info = load_compiled_forest(str(tmp_path / "forest"))
+    assert info["name"] == "test" and info["n_trees"] == 20
+    assert loaded.n_features_in_ == info["n_features"] == 4
+    X = probe_inputs(compiled)
+    assert_same_probabilities(loaded.predict_proba(X), model.predict_proba(X))
+
+
+def test_input_width_is_the_source_models():
+    compiled = compile_forest(fitted_forest())
+    assert compiled.feature.max() < 3
+    assert compiled.n_features_in_ == 4
+    compiled.predict_proba([[0.1, 0.2, 0.3, 0.5]])
+    for row in ([0.1, 0.2, 0.3], [0.1, 0.2, 0.3, 0.5, 0.9]):
+        with pytest.raises(ValueError):
+            compiled.predict_proba([row])
+
+
+def test_rejects_non_finite_input():
+    compiled = compile_forest(fitted_forest())
+    with pytest.raises(ValueError):
+        compiled.predict_proba([[0.1, np.nan, 0.3, 0.4]])
+    with pytest.raises(ValueError):
+        compiled.predict_proba([[0.1, 0.2, np.inf, 0.4]])
@@ -0,0 +1,49 @@
+import pytest
+
+from app.services.hyphenation import Hyphenator, hyphenator
+
+
+@pytest.mark.parametrize("word, syllables", [
+    ("hyphenation", ("hy", "phen", "ation")),
+    ("computer", ("com", "puter")),
+    ("reading", ("read", "ing")),
+    ("Table", ("Ta", "ble")),
+])
+def test_en_us_patterns(word, syllables):
+    assert hyphenator.syllables(word) == syllables
+
+
+def test_punctuation_stays_on_the_outer_syllables():
+    for token in ("(accessibility),", '"Wonderful!"'):
+        syllables = hyphenator.syllables(token)
+        assert len(syllables) > 1
+        assert "".join(syllables) == token
+    assert hyphenator.syllables("(accessibility),")[0] == "(ac"
+    assert hyphenator.syllables("(accessibility),")[-1] == "ity),"
+
+
+@pytest.mark.parametrize("token", ["cat", "don't", "abc123", "", "--"])
+def test_short_and_non_alphabetic_tokens_are_kept_whole(token):
+    assert hyphenator.syllables(token) == (token,)
+
+
+def test_pattern_file_directives_and_minimums(tmp_path):
+    patterns = tmp_path / "hyph_test.dic"
+    patterns.write_text("UTF-8\n% comment\nLEFTHYPHENMIN 1\nRIGHTHYPHENMIN 1\nCOMPOUNDLEFTHYPHENMIN 2\n1b\n")
+    custom = Hyphenator(str(patterns), cache_size=8)
+
+    assert custom.pattern_count == 1
+    assert (custom.left_min, custom.right_min) == (1, 1)
+    assert custom.syllables("abab") == ("a", "ba", "b")
+    assert custom.hyphenate_positions("ababab") == [1, 3, 5]
+    # Hyphens never fall inside the left and right minimums
+    custom.left_min, custom.right_min = 2, 2
+    assert custom.hyphenate_positions("ababab") == [3]
+
+
+def test_repeated_words_hit_the_cache():
+    custom = Hyphenator(cache_size=8)
+    custom.syllables("hyphenation")
+    custom.syllables("hyphenation")
+    assert custom.cache_stats()["hits"] == 1
+    assert custom.cache_stats()["misses"] == 1
@@ -0,0 +1,121 @@
+import io
+import json
+import os
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from app.services import ocr_cache as ocr_cache_module
+from app.services.ocr_cache import HASH_WORDS, LOW_WATER, OCRCache, _bit_count
+
+RESULT = {"success": True, "extracted_text": "hello", "confidence": 0.9}
+
+
+def entry_size():
+    return len(json.dumps(RESULT).encode("utf-8"))
+
+
+def page(seed=0):
+    """A page with dark blocks where lines of text would be"""
+    rng = np.random.default_rng(seed)
+    image = Image.new("L", (800, 1000), 255)
+    draw = ImageDraw.Draw(image)
+    for top in range(40, 960, 40):
+        left = int(rng.integers(40, 200))
+        draw.rectangle((left, top, left + int(rng.integers(200, 560)), top + 16), fill=0)
+    return image
+
+
+def test_put_get_round_trip(tmp_path):
+    cache = OCRCache(str(tmp_path), max_bytes=1 << 20)
+    key = OCRCache.make_key(b"image bytes", "eng", "--psm 3")
+    assert cache.get(key) is None
+    cache.put([key, OCRCache.make_key(b"other bytes")], RESULT)
+    assert cache.get(key) == RESULT
+    assert cache.stats()["writes"] == 2
+    assert cache.stats()["bytes"] == 2 * entry_size()
+
+
+def test_unreadable_entry_is_dropped(tmp_path):
+    cache = OCRCache(str(tmp_path), max_bytes=1 << 20)
+    key = OCRCache.make_key(b"image bytes")
+    cache.put([key], RESULT)
+    with open(cache._path(key), "w") as f:
+        f.write("{not json")
+    assert cache.get(key) is None
+    assert not os.path.exists(cache._path(key))
+    assert cache.stats()["errors"] == 1
+
+
+def test_sweep_evicts_least_recently_used_to_the_low_water_mark(tmp_path):
+    cache = OCRCache(str(tmp_path), max_bytes=10 * entry_size())
+    keys = [OCRCache.make_key(str(index).encode()) for index in range(10)]
+    cache.put(keys, RESULT)
+    now = time.time()
+    for age, key in enumerate(reversed(keys)):
+        os.utime(cache._path(key), (now - age, now - age))
+    cache.get(keys[0])  # the oldest entry is used again
+
+    cache.max_bytes = 5 * entry_size()
+    cache.sweep()
+
+    kept = [key for key in keys if os.path.exists(cache._path(key))]
+    assert kept == [keys[0]] + keys[7:]
+    assert cache.stats()["evictions"] == 6
+    assert cache.stats()["bytes"] == 4 * entry_size()
+
+
+def test_sweep_removes_stale_temporary_files(tmp_path):
+    cache = OCRCache(str(tmp_path), max_bytes=1 << 20)
+    shard = tmp_path / "ab"
+    shard.mkdir()
+    stale, fresh = shard / "ab12.json.tmp-1-1", shard / "ab34.json.tmp-1-2"
+    stale.write_text("{}")
+    fresh.write_text("{}")
+    old = time.time() - ocr_cache_module.STALE_TMP_SECONDS - 60
+    os.utime(stale, (old, old))
+
+    cache.sweep()
+    assert not stale.exists()
+    assert fresh.exists()
+
+
+def test_bit_count_matches_python():
+    words = np.random.default_rng(0).integers(0, 2 ** 63, 64, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    expected = [bin(int(word)).count("1") for word in words]
+    assert _bit_count(words.copy()).tolist() == expected
+
+
+def test_find_similar_matches_re_encodes_only(tmp_path):
+    cache = OCRCache(str(tmp_path), max_bytes=1 << 20, perceptual=True)
+    original = page()
+    key = OCRCache.content_key(original, "eng")
+    cache.put([key], RESULT)
+    cache.index_similar(OCRCache.perceptual_hash(original), key, "eng")
+
+    encoded = io.BytesIO()
+    original.save(encoded, format="JPEG", quality=60)
+    re_encoded = Image.open(io.BytesIO(encoded.getvalue()))
+    assert cache.find_similar(OCRCache.perceptual_hash(re_encoded), "eng") == key
+    assert cache.find_similar(OCRCache.perceptual_hash(original.resize((400, 500))), "eng") == key
+    # Another fingerprint has its own index, and a different page is too far away
+    assert cache.find_similar(OCRCache.perceptual_hash(original), "deu") is None
+    assert cache.find_similar(OCRCache.perceptual_hash(page(1)), "eng") is None
+
+
+def test_eviction_compacts_the_perceptual_index(tmp_path):
+    cache = OCRCache(str(tmp_path), max_bytes=1 << 20, perceptual=True)
+    images = [page(seed) for seed in range(3)]
+    keys = [OCRCache.content_key(image, "eng") for image in images]
+    for image, key in zip(images, keys):
+        cache.put([key], RESULT)
+        cache.index_similar(OCRCache.perceptual_hash(image), key, "eng")
+    os.utime(cache._path(keys[0]), (time.time() - 100, time.time() - 100))
+
+    # Room for two entries below the low water mark, so exactly the oldest one goes
+    cache.max_bytes = int((os.path.getsize(cache._index_path("eng")) + 2 * entry_size()) / LOW_WATER) + 1
+    cache.sweep()
+
+    records = cache._read_index(cache._index_path("eng"))
+    assert [record[HASH_WORDS:].tobytes().hex() for record in records] == keys[1:]
@@ -0,0 +1,55 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import dyslexia
+from app.services.ml_service import ml_service
+from app.services.prediction_batcher import InvalidFeatures, MicroBatcher
+
+
+async def submit_together(batcher, rows):
+    return await asyncio.gather(*(batcher.submit(row) for row in rows), return_exceptions=True)
+
+
+def test_non_finite_row_is_rejected_alone():
+    batcher = MicroBatcher("test", ml_service.classify_dyslexia, 2, max_batch_size=3, max_wait_ms=50)
+    rows = [[0.2, 0.4], [float("nan"), 0.5], [0.9, 0.1], [0.5, float("inf")]]
+
+    results = asyncio.run(submit_together(batcher, rows))
+
+    assert isinstance(results[1], InvalidFeatures) and isinstance(results[3], InvalidFeatures)
+    expected_labels, expected_confidences = ml_service.classify_dyslexia(np.asarray([rows[0], rows[2]]))
+    assert results[0][:2] == (expected_labels[0], expected_confidences[0])
+    assert results[2][:2] == (expected_labels[1], expected_confidences[1])
+    # Both rows were scored together, so they share the batch's scoring time
+    assert results[0][2] == results[2][2] > 0
+    assert batcher.stats()["failed_batches"] == 0
+
+
+def test_failing_row_does_not_fail_its_batch():
+    def classify(features):
+        if (features < 0).any():
+            raise ValueError("negative feature")
+        return features[:, 0].astype(int), features[:, 1]
+
+    batcher = MicroBatcher("test", classify, 2, max_batch_size=3, max_wait_ms=50)
+
+    results = asyncio.run(submit_together(batcher, [[1, 0.5], [-1, 0.5], [2, 0.25]]))
+
+    assert results[0][:2] == (1, 0.5) and results[2][:2] == (2, 0.25)
+    assert isinstance(results[1], ValueError)
+    assert batcher.stats()["batches"] == 1
+    assert (batcher.stats()["failed_batches"], batcher.stats()["failed_rows"]) == (1, 1)
+
+
+@pytest.mark.parametrize("speed", [float("nan"), float("inf")])
+def test_predict_rejects_non_finite_features(speed):
+    app = FastAPI()
+    app.include_router(dyslexia.router, prefix="/api/dyslexia")
+
+    response = TestClient(app).post("/api/dyslexia/predict", json={"speed": speed, "survey_score": 0.5})
+
+    assert response.status_code == 422
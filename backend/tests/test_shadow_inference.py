@@ -0,0 +1,32 @@
+import numpy as np
+
+from app.services.executors import BoundedExecutor
+from app.services.ml_service import ml_service
+from app.services.shadow_inference import ShadowScorer, ShadowStats
+
+ROW = [0.4, 0.7]
+
+
+def test_candidate_is_compared_with_the_served_prediction(monkeypatch):
+    candidate = ml_service.live_model("dyslexia")
+    labels, confidences = ml_service.score(candidate, np.asarray([ROW]))
+    scorer = ShadowScorer(BoundedExecutor("test_shadow", "thread", 1, 4))
+    scorer._candidates = {"dyslexia": candidate}
+    scorer._stats["dyslexia"] = ShadowStats(candidate.version)
+
+    scored = []
+    score = ml_service.score
+    monkeypatch.setattr(ml_service, "score", lambda loaded, features: scored.append(loaded) or score(loaded, features))
+    # The label served to the client, deliberately not the one the candidate gives
+    served = (int(labels[0]) + 1) % 3
+    scorer._score("dyslexia", candidate, ROW, served, float(confidences[0]) - 0.25, 40.0)
+
+    assert scored == [candidate]
+    stats = scorer._stats["dyslexia"]
+    assert (stats.scored, stats.agreed) == (1, 0)
+    assert stats.outcomes == {(served, int(labels[0])): 1}
+    assert abs(stats.confidence_delta - 0.25) < 1e-9
+    assert stats.shadow_latency_us.count == 1
+    assert (stats.live_latency_us.count, stats.live_latency_us.sum) == (1, 40.0)
+    summary = scorer.stats()["dyslexia"]
+    assert summary["live_latency_us"]["mean"] == 40.0 and summary["shadow_latency_us"]["mean"] > 0
@@ -0,0 +1,47 @@
+from app.services.text_analysis import AnalyzedText, analyze_text, strip_terminal_punctuation
+
+TEXT = (
+    "Dr. Smith met J. Doe at 3 p.m. yesterday. Was it fun? It was!\n\n"
+    "  Second para... ends here\n \n\n"
+    "Third"
+)
+
+
+def test_abbreviations_initials_and_times_do_not_end_sentences():
+    analysis = AnalyzedText(TEXT)
+    assert analysis.sentence_texts() == [
+        "Dr. Smith met J. Doe at 3 p.m. yesterday.", "Was it fun?", "It was!",
+        "Second para... ends here", "Third"
+    ]
+    assert [analysis.sentence_word_count(index) for index in range(analysis.sentence_count)] == [9, 3, 2, 4, 1]
+
+
+def test_paragraphs_close_their_last_sentence():
+    analysis = AnalyzedText(TEXT)
+    assert analysis.paragraphs == [(0, 3), (3, 4), (4, 5)]
+    assert analysis.paragraph_texts() == [
+        "Dr. Smith met J. Doe at 3 p.m. yesterday. Was it fun? It was!", "Second para... ends here", "Third"
+    ]
+
+
+def test_words_are_offsets_into_the_text():
+    analysis = AnalyzedText("  one two\tthree ")
+    assert analysis.words == [(2, 5), (6, 9), (10, 15)]
+    assert [analysis.word(index) for index in range(analysis.word_count)] == ["one", "two", "three"]
+    assert analysis.average_word_length() == 11 / 3
+
+
+def test_empty_text():
+    analysis = AnalyzedText("   \n\n ")
+    assert (analysis.word_count, analysis.sentence_count) == (0, 0)
+    assert analysis.paragraph_texts() == []
+    assert analysis.average_word_length() == 0.0
+
+
+def test_analyze_text_reuses_the_analysis():
+    assert analyze_text(TEXT) is analyze_text(TEXT)
+
+
+def test_strip_terminal_punctuation():
+    assert strip_terminal_punctuation("Is it over?!") == "Is it over"
+    assert strip_terminal_punctuation('It ended."') == "It ended"
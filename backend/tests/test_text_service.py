@@ -0,0 +1,51 @@
+import pytest
+
+from app.services.text_service import PRESET_PLANS, text_service
+
+DOCUMENT = (
+    "Alpha beta gamma delta epsilon. Zeta eta theta iota kappa.\n\n"
+    "Lambda mu nu xi. Omicron pi rho sigma tau upsilon!\n\n"
+    "Phi chi psi omega. Dr. Smith met J. Doe at 3 p.m. yesterday."
+)
+
+
+def stream_blocks(text, *presets):
+    return [frame for frame in text_service.adapt_text_stream(text, *presets) if frame["type"] == "block"]
+
+
+def join_blocks(blocks, plan):
+    # Sentence divs carry no whitespace between them; plain words keep the paragraph break
+    separator = "" if plan.sentence_classes else "\n\n"
+    return separator.join(block["adapted_text"] for block in blocks)
+
+
+def presets_for(primary_disorder, preset):
+    return tuple(preset if disorder == primary_disorder else "normal" for disorder in ("dyslexia", "adhd", "vision"))
+
+
+@pytest.mark.parametrize("key", sorted(PRESET_PLANS))
+def test_stream_renders_the_same_document(key):
+    presets = presets_for(*key)
+    full = text_service.adapt_text(DOCUMENT, *presets)["adapted_text"]
+    assert join_blocks(stream_blocks(DOCUMENT, *presets), PRESET_PLANS[key]) == full
+
+
+def test_stream_highlighting_continues_across_paragraphs():
+    blocks = stream_blocks(DOCUMENT, "normal", "severe", "normal")
+    assert '<span class="adhd-highlight">mu</span>' in blocks[1]["adapted_text"]
+    assert "Lambda</span>" not in blocks[1]["adapted_text"]
+
+
+@pytest.mark.parametrize("key", sorted(PRESET_PLANS))
+def test_incremental_matches_a_fresh_render_after_an_edit(key):
+    presets = presets_for(*key)
+    first = text_service.adapt_text_incremental(DOCUMENT, *presets)
+    edited = DOCUMENT.replace("Alpha beta", "Alpha", 1)
+    second = text_service.adapt_text_incremental(
+        edited, *presets, known_blocks=[block["id"] for block in first["blocks"]]
+    )
+
+    rendered = {block["id"]: block["adapted_text"] for block in first["blocks"]}
+    rendered.update((block["id"], block["adapted_text"]) for block in second["blocks"] if "adapted_text" in block)
+    merged = [{"adapted_text": rendered[block["id"]]} for block in second["blocks"]]
+    assert join_blocks(merged, PRESET_PLANS[key]) == text_service.adapt_text(edited, *presets)["adapted_text"]
@@ -1,204 +1,427 @@
-import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.metrics import accuracy_score, classification_report
+from itertools import product
+import argparse
+import hashlib
 import joblib
+import json
 import os
-import kagglehub
+import pickle
+import time
+from app.services import model_registry
+from app.services.forest_compiler import compile_forest
+from app.services.forest_compression import compress_forest, compression_grid, pareto_front
+from app.services.model_artifacts import MODEL_NAMES, build_demo_models, export_forest, model_path, save_model
 
-def download_kaggle_datasets():
-    """Download Kaggle datasets automatically"""
-    print("Downloading Kaggle datasets...")
-    
-    try:
-        # Download dyslexia dataset
-        dyslexia_path = kagglehub.dataset_download("dhruvildave/dyslexia-classification")
-        print(f"Dyslexia dataset downloaded to: {dyslexia_path}")
-        
-        # Download ADHD dataset  
-        adhd_path = kagglehub.dataset_download("arashnic/adhd-dataset")
-        print(f"ADHD dataset downloaded to: {adhd_path}")
-        
-        return dyslexia_path, adhd_path
-        
-    except Exception as e:
-        print(f"Failed to download Kaggle datasets: {e}")
-        return None, None
-
-def train_dyslexia_model():
-    """Train dyslexia model with real Kaggle dataset"""
-    print("Training Dyslexia Model...")
-    
-    # Try to download and load real Kaggle dataset
+# Local dataset locations, relative to backend/ (the repository's data/ directory is one level up)
+DATA_DIRS = ("data", os.path.join("..", "data"))
+CACHE_DIR = os.getenv("TRAINING_CACHE_DIR", ".training_cache")
+REPORT_PATH = os.path.join("models", "training_report.json")
+CACHE_FORMAT = 1
+RANDOM_STATE = 42
+
+ADHD_COLUMNS = [f'Q1_{i+1}' for i in range(9)] + [f'Q2_{i+1}' for i in range(9)]
+
+DATASETS = {
+    "dyslexia": {
+        "file": "labelled_dysx.csv",
+        "kaggle": "dhruvildave/dyslexia-classification",
+        "features": ["speed", "survey_score"],
+        "target_names": ['Severe', 'Mild', 'No Dyslexia']
+    },
+    "adhd": {
+        "file": "adhd_dataset.csv",
+        "kaggle": "arashnic/adhd-dataset",
+        "features": ADHD_COLUMNS,
+        "target_names": ['No ADHD', 'Inattentive', 'Hyperactive', 'Severe']
+    }
+}
+
+# The production configuration, trained when no search is requested
+DEFAULT_PARAMS = {"n_estimators": 100, "max_depth": None, "min_samples_leaf": 1}
+SEARCH_SPACE = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [None, 8, 12],
+    "min_samples_leaf": [1, 3]
+}
+LATENCY_RUNS = 500
+LATENCY_BATCH_ROWS = 1000
+# Compression candidates are compared on these; a candidate is on the Pareto front if none beats it on all three
+PARETO_OBJECTIVES = (("test_accuracy", "max"), ("single_row_p99_us", "min"), ("size_bytes", "min"))
+
+def synthetic_dyslexia(n_samples=1000):
+    """Synthetic speed/survey_score data with the Kaggle dataset's structure"""
+    rng = np.random.RandomState(RANDOM_STATE)
+    speed = rng.beta(2, 5, n_samples)
+    survey_score = rng.beta(3, 2, n_samples)
+
+    labels = np.select(
+        [(speed < 0.3) & (survey_score < 0.5), (speed < 0.6) & (survey_score < 0.7)],
+        [0, 1],     # Severe, Mild dyslexia
+        default=2   # No dyslexia
+    )
+    return np.column_stack([speed, survey_score]), labels
+
+def synthetic_adhd(n_samples=1000):
+    """Synthetic 18-answer questionnaires with the Kaggle dataset's structure"""
+    rng = np.random.RandomState(RANDOM_STATE)
+    responses = rng.randint(0, 4, (n_samples, 18))
+    hyperactivity_avg = responses[:, :9].mean(axis=1)
+    inattention_avg = responses[:, 9:].mean(axis=1)
+
+    labels = np.select(
+        [
+            (hyperactivity_avg < 1.0) & (inattention_avg < 1.0),                 # No ADHD
+            (inattention_avg > hyperactivity_avg) & (inattention_avg > 2.0),      # Inattentive type
+            (hyperactivity_avg > inattention_avg) & (hyperactivity_avg > 2.0),    # Hyperactive-Impulsive type
+            (hyperactivity_avg > 2.5) & (inattention_avg > 2.5)                   # Severe ADHD
+        ],
+        [0, 1, 2, 3],
+        default=0   # Default to No ADHD
+    )
+    return responses, labels
+
+SYNTHETIC = {"dyslexia": synthetic_dyslexia, "adhd": synthetic_adhd}
+
+def download_kaggle_dataset(handle):
+    """Download a Kaggle dataset and return its first CSV file, or None"""
     try:
-        # First try local data directory
-        if os.path.exists('data/labelled_dysx.csv'):
-            data = pd.read_csv('data/labelled_dysx.csv')
-            print(f"Loaded local dyslexia dataset: {len(data)} samples")
-        else:
-            # Download from Kaggle
-            dyslexia_path, _ = download_kaggle_datasets()
-            if dyslexia_path:
-                # Look for the dataset file in downloaded path
-                csv_files = [f for f in os.listdir(dyslexia_path) if f.endswith('.csv')]
-                if csv_files:
-                    data = pd.read_csv(os.path.join(dyslexia_path, csv_files[0]))
-                    print(f"Loaded Kaggle dyslexia dataset: {len(data)} samples")
-                else:
-                    raise FileNotFoundError("No CSV files found in downloaded dataset")
-            else:
-                raise FileNotFoundError("Failed to download dataset")
-                
+        import kagglehub
+        path = kagglehub.dataset_download(handle)
+        print(f"Dataset {handle} downloaded to: {path}")
     except Exception as e:
-        print(f"Kaggle dataset issue ({e}), using synthetic data as fallback...")
-        # Fallback to synthetic data
-        np.random.seed(42)
-        n_samples = 1000
-        
-        speed = np.random.beta(2, 5, n_samples)
-        survey_score = np.random.beta(3, 2, n_samples)
-        
-        labels = []
-        for s, ss in zip(speed, survey_score):
-            if s < 0.3 and ss < 0.5:
-                labels.append(0)  # Severe dyslexia
-            elif s < 0.6 and ss < 0.7:
-                labels.append(1)  # Mild dyslexia  
-            else:
-                labels.append(2)  # No dyslexia
-        
-        data = pd.DataFrame({
-            'speed': speed,
-            'survey_score': survey_score,
-            'label': labels
-        })
-    
-    # Prepare features and target
-    X = data[['speed', 'survey_score']]
-    y = data['label']
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Train model
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
+        print(f"Failed to download Kaggle dataset {handle}: {e}")
+        return None
+    csv_files = sorted(f for f in os.listdir(path) if f.endswith('.csv'))
+    return os.path.join(path, csv_files[0]) if csv_files else None
+
+def find_dataset_csv(name, offline):
+    """Local data/ file first, then Kaggle unless offline"""
+    spec = DATASETS[name]
+    for directory in DATA_DIRS:
+        path = os.path.join(directory, spec["file"])
+        if os.path.exists(path):
+            return path
+    if offline:
+        return None
+    return download_kaggle_dataset(spec["kaggle"])
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def parse_csv(name, path):
+    """Read only the needed columns, with explicit compact dtypes"""
+    import pandas as pd
+
+    features = DATASETS[name]["features"]
+    dtypes = {column: np.float32 for column in features}
+    dtypes["label"] = np.int64
+    df = pd.read_csv(path, usecols=lambda column: column in dtypes, dtype=dtypes)
+    missing = [column for column in features + ["label"] if column not in df.columns]
+    if missing:
+        raise ValueError(f"Dataset doesn't have expected column structure (missing {', '.join(missing)})")
+    return df[features].to_numpy(), df["label"].to_numpy()
+
+def load_dataset(name, offline=False, use_cache=True):
+    """Features, labels, cache key and provenance for a dataset, parsed once and cached as .npz
+
+    The cache key is the source file's checksum (or the synthetic generator's
+    seed), so an edited CSV is parsed again automatically.
+    """
+    started = time.perf_counter()
+    path = find_dataset_csv(name, offline)
+    key = f"{name}-csv-{file_digest(path)[:16]}" if path else f"{name}-synthetic-{RANDOM_STATE}"
+    cache_path = os.path.join(CACHE_DIR, f"{key}-v{CACHE_FORMAT}.npz")
+
+    if use_cache and os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            X, y, source = cached["X"], cached["y"].astype(np.int64), str(cached["source"])
+        cache_hit = True
+    else:
+        source = path or "synthetic"
+        try:
+            X, y = parse_csv(name, path) if path else SYNTHETIC[name]()
+        except Exception as e:
+            print(f"Dataset issue ({e}), using synthetic data as fallback...")
+            # The fallback is cached under the CSV's key, so a broken CSV is not re-parsed every run
+            source = "synthetic"
+            X, y = SYNTHETIC[name]()
+        # float32 is what the trees split on anyway; int8 labels keep the cache small
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        np.savez(cache_path, X=X, y=y.astype(np.int8), source=source)
+        cache_hit = False
+
+    info = {
+        "source": source,
+        "rows": int(len(y)),
+        "cache": cache_path,
+        "cache_hit": cache_hit,
+        "load_seconds": round(time.perf_counter() - started, 4)
+    }
+    print(f"Loaded {name} dataset from {source}: {len(y)} samples "
+          f"({'cached' if cache_hit else 'parsed'} in {info['load_seconds'] * 1000:.1f} ms)")
+    return X, y, key, info
+
+def cached_folds(key, y, n_splits):
+    """Stratified CV folds, computed once per dataset and shared by every candidate"""
+    cache_path = os.path.join(CACHE_DIR, f"{key}-folds{n_splits}-v{CACHE_FORMAT}.npz")
+    fold_of = None
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            fold_of = cached["fold_of"]
+        if len(fold_of) != len(y):
+            fold_of = None
+
+    if fold_of is None:
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=RANDOM_STATE)
+        fold_of = np.empty(len(y), dtype=np.int8)
+        for k, (_, test_index) in enumerate(splitter.split(np.zeros(len(y)), y)):
+            fold_of[test_index] = k
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        np.savez(cache_path, fold_of=fold_of)
+    return [(np.flatnonzero(fold_of != k), np.flatnonzero(fold_of == k)) for k in range(n_splits)]
+
+def build_model(params, n_jobs):
+    return RandomForestClassifier(random_state=RANDOM_STATE, n_jobs=n_jobs, **params)
+
+def measure_latency(model, X):
+    """Single-row latency as served (compiled forest) and scikit-learn batch time"""
+    compiled = compile_forest(model)
+    samples = []
+    for index in range(LATENCY_RUNS):
+        row = X[index % len(X)][np.newaxis, :]
+        started = time.perf_counter()
+        compiled.predict_proba(row)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+
+    batch = X[np.arange(LATENCY_BATCH_ROWS) % len(X)]
+    # The service scores on one thread per call; time it the same way
+    n_jobs = model.n_jobs
+    model.set_params(n_jobs=None)
+    started = time.perf_counter()
+    model.predict_proba(batch)
+    batch_ms = (time.perf_counter() - started) * 1000
+    model.set_params(n_jobs=n_jobs)
+    return {
+        "single_row_p50_us": round(samples[len(samples) // 2], 1),
+        "single_row_p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 1),
+        "batch_ms": round(batch_ms, 2)
+    }
+
+def evaluate_candidate(params, X_train, y_train, X_test, y_test, folds, n_jobs):
+    """Cross-validate on the cached folds (if any), fit on the whole training split and measure the model"""
+    result = {"params": params}
+    if folds:
+        scores, fit_seconds = [], []
+        for train_index, test_index in folds:
+            model = build_model(params, n_jobs)
+            started = time.perf_counter()
+            model.fit(X_train[train_index], y_train[train_index])
+            fit_seconds.append(time.perf_counter() - started)
+            scores.append(accuracy_score(y_train[test_index], model.predict(X_train[test_index])))
+        result["cv_accuracy"] = round(float(np.mean(scores)), 4)
+        result["cv_accuracy_std"] = round(float(np.std(scores)), 4)
+        result["cv_fit_seconds"] = round(float(np.mean(fit_seconds)), 3)
+
+    model = build_model(params, n_jobs)
+    started = time.perf_counter()
     model.fit(X_train, y_train)
-    
-    # Evaluate
-    y_pred = model.predict(X_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    
-    print(f"Dyslexia Model Accuracy: {accuracy:.3f}")
+    result["fit_seconds"] = round(time.perf_counter() - started, 3)
+    result["test_accuracy"] = round(float(accuracy_score(y_test, model.predict(X_test))), 4)
+    result["size_bytes"] = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    result["n_nodes"] = int(sum(estimator.tree_.node_count for estimator in model.estimators_))
+    result.update(measure_latency(model, X_test))
+    return model, result
+
+def search_candidates(search):
+    if not search:
+        return [dict(DEFAULT_PARAMS)]
+    keys = list(SEARCH_SPACE)
+    return [dict(zip(keys, values)) for values in product(*(SEARCH_SPACE[key] for key in keys))]
+
+def selection_score(result):
+    """CV accuracy (test accuracy without a search), then the smaller artifact"""
+    return (result.get("cv_accuracy", result["test_accuracy"]), -result["size_bytes"])
+
+def print_candidates(name, candidates):
+    print(f"\n{name} candidates (latency: compiled single row; batch: scikit-learn, {LATENCY_BATCH_ROWS} rows)")
+    print(f"  {'trees':>5} {'depth':>5} {'leaf':>4} {'cv acc':>7} {'test acc':>8} {'fit s':>6} "
+          f"{'size KB':>8} {'p50 us':>7} {'p99 us':>7} {'batch ms':>8}")
+    for candidate in candidates:
+        params = candidate["params"]
+        cv_accuracy = f"{candidate['cv_accuracy']:.3f}" if "cv_accuracy" in candidate else "-"
+        print(f"  {params['n_estimators']:>5} {str(params['max_depth']):>5} {params['min_samples_leaf']:>4} "
+              f"{cv_accuracy:>7} {candidate['test_accuracy']:>8.3f} {candidate['fit_seconds']:>6.2f} "
+              f"{candidate['size_bytes'] / 1024:>8.0f} {candidate['single_row_p50_us']:>7.1f} "
+              f"{candidate['single_row_p99_us']:>7.1f} {candidate['batch_ms']:>8.2f}")
+
+def describe_compression(settings):
+    return (f"{settings['n_trees']} trees, depth {settings['max_depth'] or 'full'}"
+            + (", merged leaves" if settings["merge_leaves"] else ""))
+
+def compress_model(model, baseline, X_test, y_test, args):
+    """Evaluate tree-count, depth and leaf-merge reductions; pick the smallest model within the SLO
+
+    A candidate qualifies when its single-row p99 latency meets --latency-slo-us
+    and its accuracy is at most --max-accuracy-drop below the uncompressed
+    model's. Accuracy is measured on the held-out test split.
+    """
+    candidates, models = [], []
+    for settings in compression_grid(model):
+        compressed = compress_forest(model, **settings)
+        result = {
+            "settings": settings,
+            "test_accuracy": round(float(accuracy_score(y_test, compressed.predict(X_test))), 4),
+            "size_bytes": len(pickle.dumps(compressed, protocol=pickle.HIGHEST_PROTOCOL)),
+            "n_nodes": int(sum(estimator.tree_.node_count for estimator in compressed.estimators_))
+        }
+        result.update(measure_latency(compressed, X_test))
+        candidates.append(result)
+        models.append(compressed)
+
+    front = pareto_front(candidates, PARETO_OBJECTIVES)
+    for index in front:
+        candidates[index]["pareto"] = True
+    min_accuracy = baseline["test_accuracy"] - args.max_accuracy_drop
+    eligible = [index for index in front
+                if candidates[index]["single_row_p99_us"] <= args.latency_slo_us
+                and candidates[index]["test_accuracy"] >= min_accuracy]
+    selected = min(eligible, key=lambda index: (candidates[index]["size_bytes"], candidates[index]["single_row_p99_us"]),
+                   default=None)
+
+    print(f"\nCompression Pareto front (accuracy / p99 latency / size), SLO p99 <= {args.latency_slo_us:.0f} us, "
+          f"accuracy >= {min_accuracy:.3f}:")
+    for index in sorted(front, key=lambda index: candidates[index]["size_bytes"]):
+        candidate = candidates[index]
+        marker = "*" if index == selected else " "
+        print(f" {marker} {describe_compression(candidate['settings']):<34} accuracy {candidate['test_accuracy']:.3f}  "
+              f"p99 {candidate['single_row_p99_us']:7.1f} us  {candidate['size_bytes'] / 1024:7.0f} KB")
+    if selected is None:
+        print("  No candidate meets the SLO; keeping the uncompressed model")
+
+    summary = {
+        "latency_slo_us": args.latency_slo_us,
+        "max_accuracy_drop": args.max_accuracy_drop,
+        "candidates": candidates,
+        "selected": candidates[selected] if selected is not None else None
+    }
+    return (models[selected] if selected is not None else None), summary
+
+def train_model(name, args):
+    """Load the (cached) dataset, evaluate the candidates and save the best one"""
+    print(f"\nTraining {name} model...")
+    X, y, key, dataset_info = load_dataset(name, offline=args.offline, use_cache=not args.no_cache)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=RANDOM_STATE)
+    folds = cached_folds(f"{key}-train", y_train, args.cv_folds) if args.search else None
+
+    candidates = []
+    best_model, best = None, None
+    for params in search_candidates(args.search):
+        model, result = evaluate_candidate(params, X_train, y_train, X_test, y_test, folds, args.n_jobs)
+        candidates.append(result)
+        if best is None or selection_score(result) > selection_score(best):
+            best_model, best = model, result
+    print_candidates(name, candidates)
+    model_report = {"dataset": dataset_info, "candidates": candidates, "selected": best}
+
+    if args.compress:
+        compressed, model_report["compression"] = compress_model(best_model, best, X_test, y_test, args)
+        if compressed is not None:
+            best_model = compressed
+            best = dict(best, **model_report["compression"]["selected"])
+            model_report["selected"] = best
+
+    y_pred = best_model.predict(X_test)
+    compressed_to = f", compressed to {describe_compression(best['settings'])}" if "settings" in best else ""
+    print(f"\n{name} model accuracy: {best['test_accuracy']:.3f} with {best['params']}{compressed_to}")
     print("\nClassification Report:")
-    print(classification_report(y_test, y_pred, target_names=['Severe', 'Mild', 'No Dyslexia']))
-    
-    # Save model
+    target_names = DATASETS[name]["target_names"]
+    labels = sorted(np.unique(np.concatenate([y_test, y_pred])))
+    print(classification_report(y_test, y_pred, labels=labels, target_names=[target_names[i] for i in labels],
+                                zero_division=0))
+
+    # n_jobs only speeds up training; the service scores one request per call
+    best_model.set_params(n_jobs=None)
     os.makedirs('models', exist_ok=True)
-    joblib.dump(model, 'models/dyslexia_model.pkl')
-    
-    return model, accuracy
-
-def train_adhd_model():
-    """Train ADHD model with real Kaggle dataset"""
-    print("\nTraining ADHD Model...")
-    
-    # Try to download and load real Kaggle dataset
-    try:
-        # First try local data directory
-        if os.path.exists('data/adhd_dataset.csv'):
-            df = pd.read_csv('data/adhd_dataset.csv')
-            print(f"Loaded local ADHD dataset: {len(df)} samples")
-        else:
-            # Download from Kaggle
-            _, adhd_path = download_kaggle_datasets()
-            if adhd_path:
-                # Look for the dataset file in downloaded path
-                csv_files = [f for f in os.listdir(adhd_path) if f.endswith('.csv')]
-                if csv_files:
-                    df = pd.read_csv(os.path.join(adhd_path, csv_files[0]))
-                    print(f"Loaded Kaggle ADHD dataset: {len(df)} samples")
-                else:
-                    raise FileNotFoundError("No CSV files found in downloaded dataset")
-            else:
-                raise FileNotFoundError("Failed to download dataset")
-        
-        # Ensure we have the expected columns
-        expected_cols = [f'Q1_{i+1}' for i in range(9)] + [f'Q2_{i+1}' for i in range(9)]
-        if not all(col in df.columns for col in expected_cols):
-            raise ValueError("Dataset doesn't have expected column structure")
-            
-    except Exception as e:
-        print(f"Kaggle dataset issue ({e}), using synthetic data as fallback...")
-        # Fallback to synthetic data
-        np.random.seed(42)
-        n_samples = 1000
-        
-        data = []
-        labels = []
-        
-        for _ in range(n_samples):
-            q1_responses = np.random.randint(0, 4, 9)
-            q2_responses = np.random.randint(0, 4, 9)
-            
-            hyperactivity_avg = np.mean(q1_responses)
-            inattention_avg = np.mean(q2_responses)
-            
-            if hyperactivity_avg < 1.0 and inattention_avg < 1.0:
-                label = 0  # No ADHD
-            elif inattention_avg > hyperactivity_avg and inattention_avg > 2.0:
-                label = 1  # Inattentive type
-            elif hyperactivity_avg > inattention_avg and hyperactivity_avg > 2.0:
-                label = 2  # Hyperactive-Impulsive type
-            elif hyperactivity_avg > 2.5 and inattention_avg > 2.5:
-                label = 3  # Severe ADHD
-            else:
-                label = 0  # Default to No ADHD
-            
-            all_responses = list(q1_responses) + list(q2_responses)
-            data.append(all_responses)
-            labels.append(label)
-        
-        columns = [f'Q1_{i+1}' for i in range(9)] + [f'Q2_{i+1}' for i in range(9)]
-        df = pd.DataFrame(data, columns=columns)
-        df['label'] = labels
-    
-    # Prepare features and target
-    X = df[columns]
-    y = df['label']
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Train model
-    model = RandomForestClassifier(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
-    
-    # Evaluate
-    y_pred = model.predict(X_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    
-    print(f"ADHD Model Accuracy: {accuracy:.3f}")
-    print("\nClassification Report:")
-    unique_labels = sorted(np.unique(y_test))
-    target_names = ['No ADHD', 'Inattentive', 'Hyperactive', 'Severe']
-    active_names = [target_names[i] for i in unique_labels]
-    print(classification_report(y_test, y_pred, target_names=active_names))
-    
-    # Save model
-    joblib.dump(model, 'models/adhd_model.pkl')
-    
-    return model, accuracy
+    # Workers read models/ when they start without a live registry version (hot reloads follow the
+    # registry's CURRENT marker only); a worker starting during training must not see a half-written pickle
+    save_model(best_model, model_path('models', name))
+    export_forest(best_model, 'models', name)
+
+    return best_model, best["test_accuracy"], model_report
+
+def write_report(report):
+    os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Training report written to {REPORT_PATH}")
+
+def export_artifacts(directory='models'):
+    """Build the memory-mappable node arrays for already trained pickles"""
+    for name in MODEL_NAMES:
+        export_forest(joblib.load(model_path(directory, name)), directory, name)
+        print(f"Compiled {name} model written to {directory}/compiled/{name}")
 
 if __name__ == "__main__":
-    print("TRAINING WITH REAL KAGGLE DATASETS")
-    print("=" * 50)
-    
-    # Train models with Kaggle data
-    dyslexia_model, dyslexia_acc = train_dyslexia_model()
-    adhd_model, adhd_acc = train_adhd_model()
-    
-    print(f"\nKAGGLE DATASET TRAINING COMPLETE!")
-    print(f"Dyslexia Model Accuracy: {dyslexia_acc:.1%}")
-    print(f"ADHD Model Accuracy: {adhd_acc:.1%}")
-    print(f"Models saved to /models/ directory")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the screening models and build their serving artifacts")
+    parser.add_argument("--artifacts-only", action="store_true",
+                        help="only rebuild models/compiled/ from the existing pickles (deploy build step)")
+    parser.add_argument("--demo", action="store_true",
+                        help="build the demo models used when no trained models are present")
+    parser.add_argument("--activate", action="store_true",
+                        help="mark the newly trained versions live in the model registry (running workers hot-reload them)")
+    parser.add_argument("--offline", action="store_true",
+                        help="never download from Kaggle; use data/ or the synthetic fallback")
+    parser.add_argument("--no-cache", action="store_true", help="re-parse datasets instead of using the .npz cache")
+    parser.add_argument("--search", action="store_true",
+                        help="cross-validated hyperparameter search over SEARCH_SPACE with cached folds")
+    parser.add_argument("--cv-folds", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="cores used to fit each forest (-1 = all)")
+    parser.add_argument("--compress", action="store_true",
+                        help="reduce trees, limit depth and merge leaves; keep the smallest model within the SLO")
+    parser.add_argument("--latency-slo-us", type=float, default=100.0,
+                        help="single-row p99 latency budget for --compress, in microseconds")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01,
+                        help="largest test accuracy loss --compress may trade for size and latency")
+    parser.add_argument("--models", nargs="+", choices=MODEL_NAMES, default=list(MODEL_NAMES))
+    args = parser.parse_args()
+
+    if args.artifacts_only:
+        export_artifacts()
+    elif args.demo:
+        build_demo_models()
+        print("Demo models saved to models/demo/")
+    else:
+        print("TRAINING WITH REAL KAGGLE DATASETS")
+        print("=" * 50)
+
+        started = time.perf_counter()
+        report = {"generated_at": model_registry.new_version(), "n_jobs": args.n_jobs, "search": args.search, "models": {}}
+        accuracies = {}
+        for name in args.models:
+            model, accuracy, model_report = train_model(name, args)
+            accuracies[name] = accuracy
+
+            # Versioned copy for the registry; running servers only switch to it once activated
+            metadata = model_registry.publish(name, model, activate_version=args.activate,
+                                              accuracy=accuracy, params=model_report["selected"]["params"],
+                                              compression=model_report["selected"].get("settings"))
+            model_report["version"] = metadata["version"]
+            report["models"][name] = model_report
+            state = "live" if args.activate else "activate with POST /api/models/" + name + "/reload"
+            print(f"Registered {name} model version {metadata['version']} ({state})")
+        report["total_seconds"] = round(time.perf_counter() - started, 2)
+        write_report(report)
+
+        print(f"\nKAGGLE DATASET TRAINING COMPLETE in {report['total_seconds']:.1f} s")
+        for name, accuracy in accuracies.items():
+            print(f"{name} model accuracy: {accuracy:.1%}")
+        print(f"Models saved to /models/ directory")